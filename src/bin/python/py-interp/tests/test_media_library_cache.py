@@ -0,0 +1,220 @@
+#
+# Copyright (C) 2025  Autodesk, Inc. All Rights Reserved.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+"""
+Tests the download cache of the media library demo plugin against a local
+HTTP server standing in for a media server.
+"""
+
+import gzip
+import hashlib
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PLUGIN_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "..",
+    "..",
+    "..",
+    "plugins",
+    "rv-packages",
+    "media_library_demo",
+    "media_library_environment_variable_reader_plugin.py",
+)
+
+MB = 1024 * 1024
+
+
+def load_plugin():
+    spec = importlib.util.spec_from_file_location("media_library_environment_variable_reader_plugin", PLUGIN_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class MediaServer(ThreadingHTTPServer):
+    """
+    Serves the bytes in files, with ETags, conditional and range requests. A path in cut_once has its next
+    full response cut halfway, and gzip compresses every response, whatever the client asked for.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), MediaHandler)
+        self.files = {}
+        self.cut_once = set()
+        self.gzip = False
+        self.delay = 0.0
+        self.lock = threading.Lock()
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+
+    def url(self, path):
+        return "http://127.0.0.1:%d%s" % (self.server_address[1], path)
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            self.respond(server)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def respond(self, server):
+        data = server.files.get(self.path)
+        if data is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") in (None, etag):
+            start = int(range_header.split("=")[1].split("-")[0])
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes %d-%d/%d" % (start, len(data) - 1, len(data)))
+        else:
+            self.send_response(200)
+
+        body = data[start:]
+        if server.gzip:
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if start == 0 and self.path in server.cut_once:
+            server.cut_once.discard(self.path)
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+
+        self.wfile.write(body)
+
+
+class TestMediaLibraryCache(unittest.TestCase):
+    def setUp(self):
+        self.plugin = load_plugin()
+        self.server = MediaServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def fetcher(self, max_bytes=100 * MB, workers=4):
+        return self.plugin.MediaFetcher(self.plugin.MediaCache(self.directory, max_bytes), workers)
+
+    def add_file(self, path, size):
+        self.server.files[path] = os.urandom(size)
+        return self.server.url(path)
+
+    def assert_downloaded(self, path, url):
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), self.server.files[url[url.index("/", len("http://")) :]])
+
+    def test_download_is_kept_across_sessions(self):
+        url = self.add_file("/a010.mov", 2 * MB)
+
+        path = self.fetcher().redirect(url)
+        self.assert_downloaded(path, url)
+        self.assertEqual(len(self.server.requests), 1)
+
+        # A new RV session only checks that the file is unchanged.
+        self.assertEqual(self.fetcher().redirect(url), path)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertIn("If-None-Match", self.server.requests[-1][1])
+
+        self.server.files["/a010.mov"] = b"changed"
+        self.assert_downloaded(self.fetcher().redirect(url), url)
+
+    def test_interrupted_download_is_resumed(self):
+        url = self.add_file("/a020.exr", 3 * MB)
+        self.server.cut_once.add("/a020.exr")
+
+        path = self.fetcher().redirect(url)
+
+        self.assert_downloaded(path, url)
+        self.assertTrue(any("Range" in headers for _, headers in self.server.requests))
+
+    def test_content_encoding_is_not_requested(self):
+        url = self.add_file("/a030.mov", 2 * MB)
+
+        self.assert_downloaded(self.fetcher().redirect(url), url)
+        self.assertEqual(self.server.requests[0][1].get("Accept-Encoding"), "identity")
+
+    def test_content_encoded_download(self):
+        url = self.add_file("/a040.mov", 3 * MB)
+        self.server.gzip = True
+        self.server.cut_once.add("/a040.mov")
+
+        self.assert_downloaded(self.fetcher().redirect(url), url)
+
+    def test_prefetch_downloads_concurrently(self):
+        urls = [self.add_file("/shot%d.mov" % i, MB) for i in range(4)]
+        self.server.delay = 0.2
+
+        os.environ[self.plugin.DOWNLOAD_ENV] = "1"
+        self.plugin.media_fetcher = self.fetcher()
+        try:
+            self.plugin.prefetch(urls)
+            for url in urls:
+                self.assert_downloaded(self.plugin.get_http_redirection(url), url)
+        finally:
+            del os.environ[self.plugin.DOWNLOAD_ENV]
+
+        self.assertEqual(len(self.server.requests), len(urls))
+        self.assertGreater(self.server.max_active, 1)
+
+    def test_cache_size_is_enforced(self):
+        urls = [self.add_file("/b%d.mov" % i, 2 * MB) for i in range(4)]
+        fetcher = self.fetcher(max_bytes=5 * MB)
+
+        paths = [fetcher.redirect(url) for url in urls]
+
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(self.directory) for f in files)
+        self.assertLessEqual(size, 5 * MB)
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[-1]))
+
+        # Evicted media is downloaded again when it is asked for.
+        self.assert_downloaded(fetcher.redirect(urls[0]), urls[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
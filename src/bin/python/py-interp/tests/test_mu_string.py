@@ -0,0 +1,87 @@
+#
+# Copyright (C) 2025  Autodesk, Inc. All Rights Reserved.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+"""
+Tests muString, which quotes Python strings as Mu string literals, in the
+network package and in the copy of rvNetwork.py that ships with rvnuke.
+"""
+
+import importlib.util
+import os
+import re
+import unittest
+
+PLUGINS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "plugins")
+
+RVNETWORK_PATHS = [
+    os.path.join(PLUGINS_PATH, "python", "network", "network", "rvNetwork.py"),
+    os.path.join(PLUGINS_PATH, "rv-packages", "rvnuke", "rvNetwork.py"),
+]
+
+
+def load_module(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def read_mu_string(literal):
+    """
+    Decode a Mu string literal the way the Mu lexer does: \\u takes every
+    hex digit that follows it (at least four) as one code point.
+    """
+    assert literal[0] == literal[-1] == '"'
+    token = re.compile(r'\\u([0-9a-fA-F]{4,})|\\(["\\])|([^"\\])')
+    out = []
+    pos = 1
+    while pos < len(literal) - 1:
+        match = token.match(literal, pos)
+        assert match, "unexpected escape at %d in %r" % (pos, literal)
+        if match.group(1):
+            out.append(chr(int(match.group(1), 16)))
+        else:
+            out.append(match.group(2) or match.group(3))
+        pos = match.end()
+    return "".join(out)
+
+
+class TestMuString(unittest.TestCase):
+    STRINGS = [
+        "",
+        "/shots/a010/plate.%04d.exr",
+        'say "hi" \\ bye',
+        "café",
+        "é1f",
+        "中文 Abc",
+        "\U0001f600",
+        "\U0001f600a",
+        "note \U0001f3ac\U0001f600 00",
+        "tab\tnew\nline",
+    ]
+
+    def setUp(self):
+        self.modules = [load_module(path, "rvNetwork%d" % i) for i, path in enumerate(RVNETWORK_PATHS)]
+
+    def test_round_trip(self):
+        for module in self.modules:
+            for value in self.STRINGS:
+                literal = module.muString(value)
+                self.assertTrue(all(" " <= c <= "~" for c in literal), literal)
+                self.assertEqual(read_mu_string(literal), value, module.__file__)
+
+    def test_non_bmp(self):
+        for module in self.modules:
+            self.assertEqual(module.muString("\U0001f600"), '"\\u1f600"')
+            # hex digits right after an escape must not be read as part of it
+            self.assertEqual(module.muString("\U0001f600b2"), '"\\u1f600\\u0062\\u0032"')
+
+    def test_copies_agree(self):
+        for value in self.STRINGS:
+            self.assertEqual(len(set(module.muString(value) for module in self.modules)), 1, value)
+
+
+if __name__ == "__main__":
+    unittest.main()
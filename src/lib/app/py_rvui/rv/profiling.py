@@ -0,0 +1,192 @@
+#
+# Copyright (C) 2025  Autodesk, Inc. All Rights Reserved.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Opt-in timing of Python MinorMode event handlers.
+
+When enabled, MinorMode.init(), defineEventTable() and
+defineEventTableRegex() bind a wrapper around each handler that records,
+per (mode, table, event, handler), the call count, total and max time and
+a latency histogram with power-of-two microsecond buckets. Self time is
+also recorded per handler call stack (handlers that send events run the
+receiving handlers nested inside them), which dumpFoldedStacks() writes in
+the "frame;frame;frame value" format read by flamegraph.pl, speedscope and
+similar tools.
+
+Handlers are only wrapped when profiling is enabled at bind time, so set
+RV_PYTHON_HANDLER_PROFILE before starting RV (or call enable() before the
+modes of interest are initialized):
+
+    RV_PYTHON_HANDLER_PROFILE=1                       record only
+    RV_PYTHON_HANDLER_PROFILE=/tmp/handlers.json      also dump JSON at exit
+    RV_PYTHON_HANDLER_PROFILE=/tmp/handlers.folded    also dump stacks at exit
+
+From the Python console:
+
+    from rv import profiling
+    profiling.dumpJSON("/tmp/handlers.json")
+    profiling.dumpFoldedStacks("/tmp/handlers.folded")
+    profiling.reset()
+"""
+
+import json
+import os
+import threading
+import time
+
+_enabled = False
+_recording = True
+_lock = threading.Lock()
+_local = threading.local()
+
+_handlers = {}  # (mode, table, event, handler) -> _HandlerStats
+_stacks = {}  # tuple of frame names -> self time in microseconds
+
+
+class _HandlerStats(object):
+    __slots__ = ("count", "total", "max", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = {}  # bucket upper bound in microseconds -> count
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = 1 << int(seconds * 1e6).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+
+def enable(record=True):
+    """Wrap handlers bound from now on; record selects whether they record."""
+    global _enabled, _recording
+    _enabled = True
+    _recording = record
+
+
+def isEnabled():
+    return _enabled
+
+
+def setRecording(record):
+    """Pause or resume recording without unbinding the wrapped handlers."""
+    global _recording
+    _recording = record
+
+
+def reset():
+    with _lock:
+        _handlers.clear()
+        _stacks.clear()
+
+
+def _handlerName(func):
+    name = getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or repr(func)
+    module = getattr(func, "__module__", None)
+    return "%s.%s" % (module, name) if module else name
+
+
+def instrument(modeName, table, event, func):
+    """Return func wrapped for profiling, or func itself if profiling is off."""
+    if not _enabled or not callable(func):
+        return func
+
+    key = (modeName, table, event, _handlerName(func))
+    frame = "%s %s %s" % (modeName, event, key[3])
+
+    def profiled(*args, **kwargs):
+        if not _recording:
+            return func(*args, **kwargs)
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        # Each entry is [frame name, time spent in nested handlers].
+        stack.append([frame, 0.0])
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            names = tuple(entry[0] for entry in stack)
+            child = stack.pop()[1]
+            if stack:
+                stack[-1][1] += elapsed
+            with _lock:
+                stats = _handlers.get(key)
+                if stats is None:
+                    stats = _handlers[key] = _HandlerStats()
+                stats.add(elapsed)
+                _stacks[names] = _stacks.get(names, 0.0) + max(elapsed - child, 0.0) * 1e6
+
+    profiled.__wrapped__ = func
+    profiled.__name__ = getattr(func, "__name__", "profiled")
+    profiled.__doc__ = getattr(func, "__doc__", None)
+    return profiled
+
+
+def stats():
+    """Return the recorded handler timings as a list of dicts, slowest total first."""
+    with _lock:
+        items = [(key, s.count, s.total, s.max, dict(s.histogram)) for key, s in _handlers.items()]
+    result = []
+    for (modeName, table, event, handler), count, total, maxTime, histogram in items:
+        result.append(
+            {
+                "mode": modeName,
+                "table": table,
+                "event": event,
+                "handler": handler,
+                "count": count,
+                "totalMs": total * 1e3,
+                "meanMs": total * 1e3 / count if count else 0.0,
+                "maxMs": maxTime * 1e3,
+                "histogramUs": {str(bound): n for bound, n in sorted(histogram.items())},
+            }
+        )
+    result.sort(key=lambda r: r["totalMs"], reverse=True)
+    return result
+
+
+def _write(text, path):
+    if path:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
+
+
+def dumpJSON(path=None):
+    """Return the handler timings as JSON, also writing them to path if given."""
+    return _write(json.dumps({"handlers": stats()}, indent=2), path)
+
+
+def dumpFoldedStacks(path=None):
+    """Return self time per handler stack in folded flame graph format (microseconds)."""
+    with _lock:
+        items = sorted(_stacks.items())
+    # Folded stack readers split on ";" and on the last space only.
+    lines = ["%s %d" % (";".join(f.replace(";", ":") for f in names), us) for names, us in items]
+    return _write("\n".join(lines) + "\n" if lines else "", path)
+
+
+def _dumpAtExit(path):
+    try:
+        if path.endswith(".folded") or path.endswith(".txt"):
+            dumpFoldedStacks(path)
+        else:
+            dumpJSON(path)
+    except Exception as e:
+        print("ERROR: failed to write handler profile to %s: %s" % (path, e))
+
+
+_setting = os.environ.get("RV_PYTHON_HANDLER_PROFILE")
+if _setting:
+    enable()
+    if _setting not in ("1", "true", "yes", "on"):
+        import atexit
+
+        atexit.register(_dumpAtExit, _setting)
@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 import rv.commands
+import rv.profiling
 import os
 import sys
 import math
@@ -142,11 +143,13 @@ class MinorMode(Mode):
         if globalBindings is not None:
             for b in globalBindings:
                 (event, func, docs) = b
+                func = rv.profiling.instrument(self._modeName, "global", event, func)
                 rv.commands.bind(self._modeName, "global", event, func, docs)
 
         if overrideBindings is not None:
             for b in overrideBindings:
                 (event, func, docs) = b
+                func = rv.profiling.instrument(self._modeName, "global", event, func)
                 rv.commands.bind(self._modeName, "global", event, func, docs)
 
         self.setMenu(menu)
@@ -166,11 +169,13 @@ class MinorMode(Mode):
     def defineEventTable(self, tableName, bindings):
         for b in bindings:
             (event, func, docs) = b
+            func = rv.profiling.instrument(self._modeName, tableName, event, func)
             rv.commands.bind(self._modeName, tableName, event, func, docs)
 
     def defineEventTableRegex(self, tableName, bindings):
         for b in bindings:
             (event, func, docs) = b
+            func = rv.profiling.instrument(self._modeName, tableName, event, func)
             rv.commands.bindRegex(self._modeName, tableName, event, func, docs)
 
     def urlDropFunc(self, url):
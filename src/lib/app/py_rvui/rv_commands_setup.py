@@ -5,6 +5,8 @@
 #
 import os
 import sys
+import threading
+import time
 import rv.commands
 import rv.extra_commands
 import rv.runtime
@@ -456,13 +458,93 @@ commands_int_constants = [
 ]
 
 
+##
+##  Mu symbols are bound on first use: each module gets a module level
+##  __getattr__ (PEP 562) that creates the MuSymbol and caches it as a
+##  regular module attribute, so later lookups never get here again.
+##
+##  RV_PYTHON_PREWARM_SYMBOLS   comma separated names to bind at startup,
+##                              e.g. "commands.frame,extra_commands.*"
+##                              ("*" alone binds everything eagerly)
+##  RV_PYTHON_SYMBOL_TIMING     print how long symbol binding took
+##
+
+_binding_stats = {"bound": 0, "failed": 0, "seconds": 0.0, "setup_seconds": 0.0}
+_lazy_modules = {}  # module_name -> (mod, frozenset of symbol names)
+
+
+def _bind_symbol(module_name, mod, sym):
+    start = time.perf_counter()
+    try:
+        s = MuSymbol(module_name + "." + sym)
+    except Exception:
+        _binding_stats["failed"] += 1
+        print("Bind to python failed:", sym)
+        return None
+    finally:
+        _binding_stats["seconds"] += time.perf_counter() - start
+    setattr(mod, sym, s)
+    _binding_stats["bound"] += 1
+    return s
+
+
 def bind_symbols(symbol_list, module_name, mod):
     for sym in symbol_list:
-        try:
-            s = MuSymbol(module_name + "." + sym)
-            setattr(mod, sym, s)
-        except Exception:
-            print("Bind to python failed:", sym)
+        _bind_symbol(module_name, mod, sym)
+
+
+def bind_symbols_lazily(symbol_list, module_name, mod):
+    names = frozenset(symbol_list)
+    _lazy_modules[module_name] = (mod, names)
+
+    def __getattr__(sym):
+        if sym == "__all__":
+            # "from rv.commands import *" only sees what is in the module dict,
+            # so bind everything that is left before listing the public names.
+            bind_symbols([n for n in names if n not in mod.__dict__], module_name, mod)
+            return [n for n in mod.__dict__ if not n.startswith("_")]
+        if sym in names:
+            s = _bind_symbol(module_name, mod, sym)
+            if s is not None:
+                return s
+        raise AttributeError("module '%s' has no attribute '%s'" % (mod.__name__, sym))
+
+    def __dir__():
+        return sorted(set(mod.__dict__) | names)
+
+    mod.__getattr__ = __getattr__
+    mod.__dir__ = __dir__
+
+
+def prewarm_symbols(spec):
+    """Bind the symbols named by spec now instead of on first use.
+
+    spec is a comma separated list of "module.symbol" or "module.*" entries,
+    or "*" for every symbol of every module.
+    """
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        module_name, _, sym = entry.rpartition(".")
+        for name, (mod, names) in _lazy_modules.items():
+            if entry == "*" or module_name == name:
+                wanted = names if entry == "*" or sym == "*" else [sym] if sym in names else []
+                bind_symbols([n for n in wanted if n not in mod.__dict__], name, mod)
+
+
+def binding_stats():
+    """Return a copy of the symbol binding counters (count, failures, seconds)."""
+    return dict(_binding_stats)
+
+
+def _report_binding_stats(when):
+    # Written to the original stderr: at exit the console redirect may be gone.
+    stats = _binding_stats
+    sys.__stderr__.write(
+        "INFO: Mu symbol binding (%s): %d bound, %d failed, %.2f ms binding, %.2f ms setup\n"
+        % (when, stats["bound"], stats["failed"], stats["seconds"] * 1000.0, stats["setup_seconds"] * 1000.0)
+    )
 
 
 def bind_constants(constant_list, mod):
@@ -473,10 +555,19 @@ def bind_constants(constant_list, mod):
             print("Bind to python failed:", sym)
 
 
-bind_symbols(all_mu_commands, "commands", rv.commands)
-bind_symbols(all_extra_commands, "extra_commands", rv.extra_commands)
+_setup_start = time.perf_counter()
+bind_symbols_lazily(all_mu_commands, "commands", rv.commands)
+bind_symbols_lazily(all_extra_commands, "extra_commands", rv.extra_commands)
 bind_symbols(["eval"], "runtime", rv.runtime)
 bind_constants(commands_int_constants, rv.commands)
+prewarm_symbols(os.environ.get("RV_PYTHON_PREWARM_SYMBOLS", ""))
+_binding_stats["setup_seconds"] = time.perf_counter() - _setup_start
+
+if "RV_PYTHON_SYMBOL_TIMING" in os.environ:
+    import atexit
+
+    _report_binding_stats("startup")
+    atexit.register(_report_binding_stats, "exit")
 
 
 # Python wrapper for displayFeedback to handle optional textSizes parameter
@@ -504,14 +595,100 @@ def _displayFeedbackQueue_wrapper(text, duration, textSizes=None):
 
 rv.extra_commands.displayFeedbackQueue = _displayFeedbackQueue_wrapper
 
-if "RV_NO_CONSOLE_REDIRECT" not in os.environ:
 
-    class RVStdOut:
-        def write(self, s):
-            rv.commands.consoleWrite(s)
+class RVStdOut:
+    """sys.stdout/sys.stderr replacement that forwards to the RV console.
+
+    Writes from any thread are appended to a buffer; a background thread
+    hands the buffered text to consoleWrite (which queues the console
+    update onto the GUI thread) once a newline arrives, at most once every
+    flush_interval seconds. The buffer is bounded: writes that would grow it
+    past max_buffered characters are dropped and reported with the next
+    batch. flush() and interpreter exit write out whatever is pending.
+    """
+
+    flush_interval = 0.05
+    idle_interval = 1.0  # partial lines are written after this long
+    max_buffered = 1 << 20
 
-        def flush(self):
-            pass
+    def __init__(self, write=None):
+        self._write = write or rv.commands.consoleWrite
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # keeps batches in order
+        self._pending = threading.Condition(self._lock)
+        self._chunks = []
+        self._size = 0
+        self._newline = False
+        self._dropped = 0
+        self._dropped_chars = 0
+        self._thread = None
+        self._last_write = 0.0
+
+    def write(self, s):
+        if not s:
+            return 0
+        with self._lock:
+            if self._size + len(s) > self.max_buffered:
+                self._dropped += 1
+                self._dropped_chars += len(s)
+                return len(s)
+            self._chunks.append(s)
+            self._size += len(s)
+            if "\n" in s:
+                self._newline = True
+                self._pending.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="RVStdOut", daemon=True)
+                self._thread.start()
+        return len(s)
+
+    def flush(self):
+        self._drain()
+
+    def isatty(self):
+        return False
+
+    def _take(self):
+        with self._lock:
+            text = "".join(self._chunks)
+            if self._dropped:
+                if text and not text.endswith("\n"):
+                    text += "\n"
+                text += "WARNING: console output dropped %d writes (%d characters)\n" % (
+                    self._dropped,
+                    self._dropped_chars,
+                )
+                self._dropped = 0
+                self._dropped_chars = 0
+            self._chunks = []
+            self._size = 0
+            self._newline = False
+            return text
+
+    def _drain(self):
+        with self._write_lock:
+            text = self._take()
+            if text:
+                try:
+                    self._write(text)
+                except Exception:
+                    pass
+                self._last_write = time.monotonic()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._newline:
+                    self._pending.wait(self.idle_interval)
+            delay = self._last_write + self.flush_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._drain()
+
+
+if "RV_NO_CONSOLE_REDIRECT" not in os.environ:
+    import atexit
 
     sys.stdout = RVStdOut()
     sys.stderr = sys.stdout
+    atexit.register(sys.stdout.flush)
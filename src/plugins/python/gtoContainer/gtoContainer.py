@@ -106,12 +106,209 @@ the .copy() method:
 """
 
 from types import *
+import array
+import mmap
 import re
+import struct
+import sys
 import gto
 import operator
 from functools import reduce
 import six
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# array.array type codes used by Property.buffer() to pack numeric
+# property data.  They match the types stored in binary files (see
+# _fileTypeFormats), so buffer() has the same format whether the data
+# was set in memory or is viewed in a mapped file.
+_arrayTypeCodes = {
+    gto.INT: "i",
+    gto.FLOAT: "f",
+    gto.DOUBLE: "d",
+    gto.SHORT: "H",
+    gto.BYTE: "B",
+}
+
+
+def _packData(pType, data):
+    """
+    For internal use only.  Return numeric property data flattened into
+    an array.array, or None if it can't be packed (strings, cgtypes,
+    mixed data...).
+    """
+    typeCode = _arrayTypeCodes.get(pType)
+    if typeCode is None or not isinstance(data, (tuple, list)) or len(data) == 0:
+        return None
+
+    try:
+        if isinstance(data[0], (tuple, list)):
+            packed = array.array(typeCode)
+            for element in data:
+                packed.extend(element)
+        else:
+            packed = array.array(typeCode, data)
+    except (TypeError, OverflowError, ValueError):
+        return None
+
+    return packed
+
+
+def _indexByName(items):
+    """
+    For internal use only.  Map names to the first item of that name.
+    """
+    index = {}
+    for item in reversed(items):
+        index[item.name()] = item
+    return index
+
+
+# struct format character and size in bytes of each GTO data type, as
+# stored in binary files.  STRING data holds string table indices.
+_fileTypeFormats = {
+    gto.INT: ("i", 4),
+    gto.FLOAT: ("f", 4),
+    gto.DOUBLE: ("d", 8),
+    gto.HALF: ("e", 2),
+    gto.STRING: ("I", 4),
+    gto.BOOLEAN: ("B", 1),
+    gto.SHORT: ("H", 2),
+    gto.BYTE: ("B", 1),
+}
+
+
+class _MappedGto:
+    """
+    For internal use only.  Parses the header of an uncompressed binary
+    GTO file through a read-only memory map and records where the data
+    of every property lives, so single properties can be read or viewed
+    without touching the rest of the file.
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        head = self.map[:4]
+        if head[:2] == b"\x1f\x8b":
+            raise Exception("mapped access is not supported for compressed files")
+        if head == b"GTOa":
+            raise Exception("mapped access is not supported for text files")
+
+        if struct.unpack_from("<I", head)[0] == 0x29F:
+            self.byteOrder = "<"
+        elif struct.unpack_from(">I", head)[0] == 0x29F:
+            self.byteOrder = ">"
+        else:
+            raise Exception("%s is not a binary GTO file" % filename)
+        self.native = self.byteOrder == ("<" if sys.byteorder == "little" else ">")
+
+        (numStrings, numObjects, version) = self.__words(4, 3)
+        if version not in (2, 3, 4):
+            raise Exception("unsupported GTO file version %d" % version)
+
+        self.strings = []
+        pos = 20
+        for i in range(numStrings):
+            end = self.map.find(b"\0", pos)
+            self.strings.append(six.ensure_str(self.map[pos:end]))
+            pos = end + 1
+
+        # Each record below is a tuple of header words, decoded in order.
+        objectWords = 4 if version == 2 else 5
+        componentWords = 3 if version == 2 else 5
+        propertyWords = {2: 4, 3: 6, 4: 8}[version]
+
+        self.objects = []
+        for i in range(numObjects):
+            o = self.__words(pos, objectWords)
+            pos += 4 * objectWords
+            # (name, protocol, protocolVersion, numComponents)
+            self.objects.append((self.strings[o[0]], self.strings[o[1]], o[2], o[3]))
+
+        self.components = []
+        for objName, protocol, protocolVersion, numComponents in self.objects:
+            for i in range(numComponents):
+                c = self.__words(pos, componentWords)
+                pos += 4 * componentWords
+                if c[2] & 1:
+                    raise Exception("transposed component data is not supported")
+                interp = self.strings[c[3]] if version != 2 else ""
+                # (objectName, name, interp, flags, numProperties)
+                self.components.append((objName, self.strings[c[0]], interp, c[2], c[1]))
+
+        headers = []
+        for objName, compName, compInterp, flags, numProperties in self.components:
+            for i in range(numProperties):
+                headers.append((objName, compName, self.__words(pos, propertyWords)))
+                pos += 4 * propertyWords
+
+        # (objectName, componentName, name, type, size, width, interp, offset)
+        self.properties = []
+        for objName, compName, p in headers:
+            if version == 4:
+                width = max(p[3], 1) * max(p[4], 1) * max(p[5], 1) * max(p[6], 1)
+                interp = self.strings[p[7]]
+            else:
+                width = p[3]
+                interp = self.strings[p[4]] if version == 3 else ""
+            self.properties.append((objName, compName, self.strings[p[0]], p[2], p[1], width, interp, pos))
+            pos += p[1] * width * _fileTypeFormats[p[2]][1]
+
+    def __words(self, pos, count):
+        return struct.unpack_from("%s%dI" % (self.byteOrder, count), self.map, pos)
+
+    def read(self, record):
+        """
+        Return the data of one property as a tuple, with one nested
+        tuple per element if its width is greater than one.
+        """
+        (objName, compName, name, pType, size, width, interp, offset) = record
+        (fmt, nbytes) = _fileTypeFormats[pType]
+        values = struct.unpack_from("%s%d%s" % (self.byteOrder, size * width, fmt), self.map, offset)
+        if pType == gto.STRING:
+            values = tuple(self.strings[i] for i in values)
+        if width == 1:
+            return values
+        return tuple(values[i : i + width] for i in range(0, len(values), width))
+
+    def buffer(self, record):
+        """
+        Return a memoryview on the property data inside the map, or None
+        if the data needs converting (strings, foreign byte order).
+        """
+        (objName, compName, name, pType, size, width, interp, offset) = record
+        (fmt, nbytes) = _fileTypeFormats[pType]
+        if pType == gto.STRING or not self.native:
+            return None
+        return memoryview(self.map)[offset : offset + size * width * nbytes].cast(fmt)
+
+    def view(self, record):
+        """
+        Return a read-only NumPy array of shape (size,) or (size, width)
+        that shares memory with the map.
+        """
+        (objName, compName, name, pType, size, width, interp, offset) = record
+        (fmt, nbytes) = _fileTypeFormats[pType]
+        if pType == gto.STRING:
+            return None
+        values = numpy.frombuffer(self.map, numpy.dtype(self.byteOrder + fmt), size * width, offset)
+        if width == 1:
+            return values
+        return values.reshape(size, width)
+
+    def close(self):
+        try:
+            self.map.close()
+        except BufferError:
+            # Views handed out by buffer()/view() keep the map alive.
+            pass
+
 
 #############################################
 class Property:
@@ -127,14 +324,34 @@ class Property:
     Information about the Property itself can be had via method calls (name(),
     size(), width(), etc.)
 
+    buffer() returns numeric data (INT, FLOAT, DOUBLE, SHORT, BYTE)
+    packed flat in an array kept with the property, e.g. for NumPy:
+
+        view = propertyInstance.buffer()
+        points = numpy.frombuffer(view, dtype=view.format)
+
     """
 
+    __slots__ = (
+        "__name",
+        "__pType",
+        "__size",
+        "__width",
+        "__data",
+        "__packed",
+        "__interp",
+        "__component",
+        "__deferRead",
+        "__dict__",
+    )
+
     def __init__(self, name, pType, size=None, width=None, data=None, interp=None):
         self.__name = name
         self.__pType = pType
         self.__size = size
         self.__width = width
         self.__data = data
+        self.__packed = None
         self.__interp = interp
         self.__component = None
 
@@ -183,6 +400,30 @@ class Property:
             self.__deferredRead()
         return self.__data
 
+    def buffer(self):
+        """
+        Returns a read-only memoryview on the numeric data, flattened to
+        size() * width() values.  Returns None if the data is not numeric
+        (see the class documentation).
+
+        The data is packed into an array.array the first time, and later
+        calls view that same array until setData() is called again.  Call
+        setData() after changing the data in place.  For a gtoContainer
+        opened with mapped=True, a property whose data has not been read
+        yet is viewed directly in the mapped file without copying it.
+        """
+        if not self.__data and self.__deferRead:
+            if isinstance(self.__deferRead[0], _MappedGto):
+                view = self.__deferRead[0].buffer(self.__deferRead[1])
+                if view is not None:
+                    return view
+            self.__deferredRead()
+        if self.__packed is None:
+            self.__packed = _packData(self.__pType, self.__data)
+            if self.__packed is None:
+                return None
+        return memoryview(self.__packed).toreadonly()
+
     def setData(self, value, size=None, width=None):
         """
         WARNING: Make sure the data layout matches the size and width
@@ -194,6 +435,8 @@ class Property:
         if not self.__data and self.__deferRead:
             self.__deferredRead()
         self.__data = value
+        self.__packed = None
+        self.__deferRead = None
         if size is not None:
             self.__size = size
         if width is not None:
@@ -215,6 +458,9 @@ class Property:
 
     def __deferredRead(self):
         """For internal use only"""
+        if isinstance(self.__deferRead[0], _MappedGto):
+            self.__data = self.__deferRead[0].read(self.__deferRead[1])
+            return
         self.__data = True  # Prevents infinite recursion in setData()
         self.__deferRead[0].accessObject(self.__deferRead[1].component.object)
 
@@ -227,14 +473,7 @@ class Property:
         """
         if not self.__data and self.__deferRead:
             self.__deferredRead()
-        prop = Property(
-            self.__name,
-            self.__pType,
-            self.__size,
-            self.__width,
-            self.__data,
-            self.__interp,
-        )
+        prop = Property(self.__name, self.__pType, self.__size, self.__width, self.__data, self.__interp)
         return prop
 
     def __call__(self):
@@ -274,7 +513,7 @@ class Property:
             and (self.__pType == other.type())
             and (self.__size == other.size())
             and (self.__width == other.width())
-            and (self.__data == other.data())
+            and (self.data() == other.data())
             and (self.__interp == other.interp())
         ):
             return True
@@ -320,7 +559,10 @@ class Component:
 
     """
 
+    __slots__ = ("__name", "__interp", "__flags", "__object", "__properties", "__index", "__dict__")
+
     def __init__(self, name, interp=None, flags=0, object=None):
+        self.__index = None
         self.__name = name
         self.__interp = interp
         self.__flags = flags
@@ -384,50 +626,64 @@ class Component:
         """
         return len(self.__properties)
 
-    def __getattr__(self, name):
-        if name in self.__dict__:
-            return self.__dict__[name]
-        for prop in self.__properties:
-            if prop.name() == name:
+    def __find(self, name):
+        """
+        For internal use only.  Return the first Property named name, or
+        None.  The name index is rebuilt whenever it misses or is stale
+        (a property was renamed or the properties() list was edited).
+        """
+        if self.__index is not None:
+            prop = self.__index.get(name)
+            if prop is not None and prop.name() == name:
                 return prop
+        self.__index = _indexByName(self.__properties)
+        return self.__index.get(name)
+
+    def __getattr__(self, name):
+        if name.startswith("_Component__"):
+            raise AttributeError(name)
+        prop = self.__find(name)
+        if prop is not None:
+            return prop
         raise AttributeError("Container instance has no attribute '%s'" % name)
 
     def __setattr__(self, name, value):
         if isinstance(value, Property):
             if not name == value.name():
                 raise ValueError("name mismatch: %s and %s" % (name, value.name()))
-            for p in self.__properties:
-                if p.name() == name:
-                    value._Property__setComponent(self)
-                    self.__properties[self.__properties.index(p)] = value
-                    return
-            self.__properties.append(value)
-        self.__dict__[name] = value
+            value._Property__setComponent(self)
+            p = self.__find(name)
+            if p is not None:
+                self.__properties[self.__properties.index(p)] = value
+            else:
+                self.__properties.append(value)
+            self.__index = None
+            return
+        object.__setattr__(self, name, value)
 
     def __delattr__(self, name):
-        if name in self.__dict__:
-            del self.__dict__[name]
-        for p in range(0, len(self.__properties)):
-            if self.__properties[p].name() == name:
-                del self.__properties[p]
-                return
-        raise AttributeError("Component instance has no property '%s'" % name)
+        p = self.__find(name)
+        if p is None:
+            object.__delattr__(self, name)
+            return
+        self.__properties.remove(p)
+        self.__index = None
 
     def __getitem__(self, key):
         if isinstance(key, six.string_types):
-            for prop in self.__properties:
-                if prop.name() == key:
-                    return prop
-            raise KeyError(key)
+            prop = self.__find(key)
+            if prop is None:
+                raise KeyError(key)
+            return prop
         if isinstance(key, six.integer_types):
             return self.__properties[key]
         if isinstance(key, slice):
             return self.__properties[key.start : key.stop]
         if isinstance(key, Property):
-            for prop in self.__properties:
-                if prop.name() == key.name():
-                    return prop
-            raise KeyError(key)
+            prop = self.__find(key.name())
+            if prop is None:
+                raise KeyError(key)
+            return prop
         raise TypeError("Properties cannot be indexed by keys of this type")
 
     def __setitem__(self, key, value):
@@ -436,33 +692,40 @@ class Component:
         if isinstance(key, six.string_types):
             if not key == value.name():
                 raise ValueError("name mismatch: %s and %s" % (key, value.name()))
-            for p in self.__properties:
-                if p.name() == key:
-                    self.__properties[self.__properties.index(p)] = value
-                    return
-            self.__properties.append(value)
+            p = self.__find(key)
+            if p is not None:
+                self.__properties[self.__properties.index(p)] = value
+            else:
+                self.__properties.append(value)
             value._Property__setComponent(self)
+            self.__index = None
+            return
         if isinstance(key, six.integer_types):
             self.__properties[key] = value
             value._Property__setComponent(self)
+            self.__index = None
             return
         if isinstance(key, Property):
             self.__properties[self.__properties.index(key)] = value
             value._Property__setComponent(self)
+            self.__index = None
             return
         raise KeyError
 
     def __delitem__(self, key):
         if isinstance(key, six.string_types):
-            for p in self.__properties:
-                if p.name() == key:
-                    self.__properties.remove(p)
-                    return
+            p = self.__find(key)
+            if p is not None:
+                self.__properties.remove(p)
+                self.__index = None
+                return
         elif isinstance(key, six.integer_types):
             del self.__properties[key]
+            self.__index = None
             return
         if isinstance(key, slice):
             del self.__properties[key.start : key.stop]
+            self.__index = None
             return
         raise KeyError
 
@@ -472,6 +735,8 @@ class Component:
             raise TypeError("Must be a Property instance")
         what._Property__setComponent(self)
         self.__properties.append(what)
+        if self.__index is not None:
+            self.__index.setdefault(what.name(), what)
 
     def copy(self):
         """
@@ -485,14 +750,10 @@ class Component:
         return comp
 
     def __contains__(self, item):
-        if isinstance(key, six.string_types):
-            for prop in self.__properties:
-                if prop.name() == item:
-                    return True
+        if isinstance(item, six.string_types):
+            return self.__find(item) is not None
         if isinstance(item, Property):
-            for prop in self.__properties:
-                if prop.name() == item.name():
-                    return True
+            return self.__find(item.name()) is not None
         return False
 
 
@@ -539,7 +800,10 @@ class Object:
 
     """
 
+    __slots__ = ("__name", "__protocol", "__protocolVersion", "__gtoContainer", "__components", "__index", "__dict__")
+
     def __init__(self, name, protocol, version):
+        self.__index = None
         self.__name = name
         self.__protocol = protocol
         self.__protocolVersion = version
@@ -608,50 +872,63 @@ class Object:
         """Returns the number of Component objects in this Object instance."""
         return len(self.__components)
 
-    def __getattr__(self, name):
-        if name in self.__dict__:
-            return self.__dict__[name]
-        for comp in self.__components:
-            if comp.name() == name:
+    def __find(self, name):
+        """
+        For internal use only.  Return the first Component named name, or
+        None.  The name index is rebuilt whenever it misses or is stale.
+        """
+        if self.__index is not None:
+            comp = self.__index.get(name)
+            if comp is not None and comp.name() == name:
                 return comp
+        self.__index = _indexByName(self.__components)
+        return self.__index.get(name)
+
+    def __getattr__(self, name):
+        if name.startswith("_Object__"):
+            raise AttributeError(name)
+        comp = self.__find(name)
+        if comp is not None:
+            return comp
         raise AttributeError("Object instance has no attribute '%s'" % name)
 
     def __setattr__(self, name, value):
         if isinstance(value, Component):
             if not name == value.name():
                 raise ValueError("name mismatch: %s and %s" % (name, value.name()))
-            for c in self.__components:
-                if c.name == name:
-                    value._Component__setObject(self)
-                    self.__components[self.__components.index(c)] = value
-                    return
-            self.__components.append(value)
-        self.__dict__[name] = value
+            value._Component__setObject(self)
+            c = self.__find(name)
+            if c is not None:
+                self.__components[self.__components.index(c)] = value
+            else:
+                self.__components.append(value)
+            self.__index = None
+            return
+        object.__setattr__(self, name, value)
 
     def __delattr__(self, name):
-        if name in self.__dict__:
-            del self.__dict__[name]
-        for c in range(0, len(self.__components)):
-            if self.__components[c].name() == name:
-                del self.__components[c]
-                return
-        raise AttributeError("Object instance has no component '%s'" % name)
+        c = self.__find(name)
+        if c is None:
+            object.__delattr__(self, name)
+            return
+        self.__components.remove(c)
+        self.__index = None
 
     def __getitem__(self, key):
         if isinstance(key, six.string_types):
-            for comp in self.__components:
-                if comp.name() == key:
-                    return comp
-            raise KeyError(key)
+            comp = self.__find(key)
+            if comp is None:
+                raise KeyError(key)
+            return comp
         if isinstance(key, six.integer_types):
             return self.__components[key]
         if isinstance(key, slice):
             return self.__components[key.start : key.stop]
         if isinstance(key, Component):
-            for comp in self.__components:
-                if comp.name() == key.name():
-                    return comp
-            raise KeyError(key)
+            comp = self.__find(key.name())
+            if comp is None:
+                raise KeyError(key)
+            return comp
         raise TypeError("Components cannot be indexed by keys of this type")
 
     def __setitem__(self, key, value):
@@ -660,34 +937,40 @@ class Object:
         if isinstance(key, six.string_types):
             if not key == value.name():
                 raise ValueError("name mismatch: %s and %s" % (key, value.name()))
-            for c in self.__components:
-                if c.name() == key:
-                    value._Component__setObject(self)
-                    self.__components[self.__components.index(c)] = value
-                    return
-            self.__components.append(value)
+            c = self.__find(key)
+            if c is not None:
+                self.__components[self.__components.index(c)] = value
+            else:
+                self.__components.append(value)
             value._Component__setObject(self)
+            self.__index = None
+            return
         if isinstance(key, six.integer_types):
             self.__components[key] = value
             value._Component__setObject(self)
+            self.__index = None
             return
         if isinstance(key, Component):
             self.__components[self.__components.index(key)] = value
             value._Component__setObject(self)
+            self.__index = None
             return
         raise KeyError
 
     def __delitem__(self, key):
         if isinstance(key, six.string_types):
-            for c in self.__components:
-                if c.name() == key:
-                    self.__components.remove(c)
-                    return
+            c = self.__find(key)
+            if c is not None:
+                self.__components.remove(c)
+                self.__index = None
+                return
         elif isinstance(key, six.integer_types):
             del self.__components[key]
+            self.__index = None
             return
         elif isinstance(key, slice):
             del self.__components[key.start : key.stop]
+            self.__index = None
             return
         raise KeyError
 
@@ -707,24 +990,21 @@ class Object:
             raise TypeError("Must be a Component instance")
         what._Component__setObject(self)
         self.__components.append(what)
+        if self.__index is not None:
+            self.__index.setdefault(what.name(), what)
 
     def __contains__(self, item):
-        if isinstance(key, six.string_types):
-            for comp in self.__components:
-                if comp.name() == item:
-                    return True
+        if isinstance(item, six.string_types):
+            if self.__find(item) is not None:
+                return True
             parts = item.split(".")
-            if len(parts) == 1 or len(parts) == 2:
-                for comp in self.__components:
-                    if comp.name() == parts[0]:
-                        if len(parts) == 2:
-                            return parts[1] in comp
-                        return True
+            if len(parts) == 2:
+                comp = self.__find(parts[0])
+                if comp is not None:
+                    return parts[1] in comp
 
         if isinstance(item, Component):
-            for comp in self.__components:
-                if comp.name() == item.name():
-                    return True
+            return self.__find(item.name()) is not None
         return False
 
 
@@ -774,7 +1054,7 @@ class gtoContainer(gto.Reader):
 
     """
 
-    def __init__(self, filename=None, deferredRead=True):
+    def __init__(self, filename=None, deferredRead=True, mapped=False):
         """
         Create a new gtoContainer instance.
 
@@ -795,15 +1075,40 @@ class gtoContainer(gto.Reader):
         during the writing process.  Trying to access property data that has not
         yet been read after the file has been closed will result in an
         exception.
+
+        If mapped is True, 'filename' (an uncompressed binary GTO file) is
+        memory-mapped instead and only its header is parsed.  Property data
+        is then read one property at a time, when it is first accessed,
+        rather than one object at a time; view() returns NumPy arrays that
+        share memory with the file.  This is the cheapest way to pull a few
+        properties such as "session.frame" out of a huge .rv file.
         """
         self.__objects = []
+        self.__index = None
+        self.__map = None
         self.__filename = filename
-        self.__deferredRead = deferredRead and filename is not None
+        self.__deferredRead = deferredRead and filename is not None and not mapped
 
         if filename is None:
             return
 
-        if self.__deferredRead:
+        if mapped:
+            gto.Reader.__init__(self)
+            self.__map = _MappedGto(self.__filename)
+
+            for name, protocol, protocolVersion, numComponents in self.__map.objects:
+                self.append(Object(name, protocol, protocolVersion))
+
+            for objName, name, interp, flags, numProperties in self.__map.components:
+                self[objName].append(Component(name, interp, flags))
+
+            for record in self.__map.properties:
+                (objName, compName, name, pType, size, width, interp, offset) = record
+                newProp = Property(name, pType, size, width, interp=interp)
+                newProp._Property__deferRead = (self.__map, record)
+                self[objName][compName].append(newProp)
+
+        elif self.__deferredRead:
             if open(self.__filename).readline().startswith("GTO"):
                 raise Exception("deferredRead is not supported for text files")
 
@@ -838,7 +1143,22 @@ class gtoContainer(gto.Reader):
             # Read it all right now
             gto.Reader.__init__(self)
             self.open(self.__filename)
-            self.close()
+            gto.Reader.close(self)
+
+    def close(self):
+        """
+        Release the file held open by a gtoContainer created with
+        deferredRead=True or mapped=True.  Property data that has not been
+        read yet can no longer be accessed afterwards; arrays returned by
+        buffer() or view() keep the mapped file alive until they are
+        released.  Does nothing if no file is held open.
+        """
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        if self.__deferredRead:
+            self.__deferredRead = False
+            gto.Reader.close(self)
 
     def objects(self):
         """
@@ -871,10 +1191,43 @@ class gtoContainer(gto.Reader):
     def filename(self):
         return self.__filename
 
+    def view(self, objName, compName, propName):
+        """
+        Return the data of one property of a gtoContainer opened with
+        mapped=True as a read-only NumPy array sharing memory with the
+        file: shape (size,) if the property width is 1, (size, width)
+        otherwise.  Returns None for string properties.  Requires NumPy;
+        Property.buffer() gives the same zero-copy access without it.
+        """
+        if self.__map is None:
+            raise ValueError("view() requires a gtoContainer opened with mapped=True")
+        if numpy is None:
+            raise ImportError("view() requires numpy")
+
+        prop = self[objName][compName][propName]
+        deferRead = prop._Property__deferRead
+        if deferRead is None or deferRead[0] is not self.__map:
+            raise ValueError("%s.%s.%s is not backed by the mapped file" % (objName, compName, propName))
+        return self.__map.view(deferRead[1])
+
     def append(self, what):
         """Adds an Object instance to this gtoContainer instance"""
         what._Object__setGtoContainer(self)
         self.__objects.append(what)
+        if self.__index is not None:
+            self.__index.setdefault(what.name(), what)
+
+    def __find(self, name):
+        """
+        For internal use only.  Return the first Object named name, or
+        None.  The name index is rebuilt whenever it misses or is stale.
+        """
+        if self.__index is not None:
+            obj = self.__index.get(name)
+            if obj is not None and obj.name() == name:
+                return obj
+        self.__index = _indexByName(self.__objects)
+        return self.__index.get(name)
 
     def __repr__(self):
         return "<gtoContainer file: %s>" % self.__filename
@@ -891,9 +1244,11 @@ class gtoContainer(gto.Reader):
     def __getattr__(self, name):
         if name in self.__dict__:
             return self.__dict__[name]
-        for obj in self.__objects:
-            if obj.name() == name:
-                return obj
+        if name.startswith("_gtoContainer__"):
+            raise AttributeError(name)
+        obj = self.__find(name)
+        if obj is not None:
+            return obj
         raise AttributeError("gtoContainer instance has no attribute '%s'" % name)
 
     def __setattr__(self, name, value):
@@ -904,8 +1259,10 @@ class gtoContainer(gto.Reader):
                 if o.name() == name:
                     value._Object__setGtoContainer(self)
                     self.__objects[self.__objects.index(o)] = value
+                    self.__index = None
                     return
             self.__objects.append(value)
+            self.__index = None
         self.__dict__[name] = value
 
     def __delattr__(self, name):
@@ -914,24 +1271,25 @@ class gtoContainer(gto.Reader):
         for o in range(0, len(self.__objects)):
             if self.__objects[o].name() == name:
                 del self.__objects[o]
+                self.__index = None
                 return
         raise AttributeError("gtoContainer instance has no object '%s'" % name)
 
     def __getitem__(self, key):
         if isinstance(key, six.string_types):
-            for obj in self.__objects:
-                if obj.name() == key:
-                    return obj
-            raise KeyError(key)
+            obj = self.__find(key)
+            if obj is None:
+                raise KeyError(key)
+            return obj
         if isinstance(key, six.integer_types):
             return self.__objects[key]
         if isinstance(key, slice):
             return self.__objects[key.start : key.stop]
         if isinstance(key, Object):
-            for obj in self.__objects:
-                if obj.name() == key.name():
-                    return obj
-            raise KeyError(key)
+            obj = self.__find(key.name())
+            if obj is None:
+                raise KeyError(key)
+            return obj
         raise TypeError("Objects cannot be indexed by keys of this type")
 
     def __setitem__(self, key, value):
@@ -946,43 +1304,36 @@ class gtoContainer(gto.Reader):
         self.__objects.append(value)
         value._Object__setGtoContainer(self)
         self.__objects[-1].setName(key)
+        self.__index = None
 
     def __delitem__(self, key):
         if isinstance(key, six.string_types):
-            for o in self.__objects:
-                if o.name() == key:
-                    self.__objects.remove(o)
-                    return
+            o = self.__find(key)
+            if o is not None:
+                self.__objects.remove(o)
+                self.__index = None
+                return
         elif isinstance(key, six.integer_types):
             del self.__objects[key]
+            self.__index = None
             return
         elif isinstance(key, slice):
             del self.__objects[key.start : key.stop]
+            self.__index = None
             return
         raise KeyError(key)
 
     def __contains__(self, item):
-        if isinstance(key, six.string_types):
-            for obj in self.__objects:
-                if obj.name() == item:
-                    return True
+        if isinstance(item, six.string_types):
+            if self.__find(item) is not None:
+                return True
             parts = item.split(".")
-            if len(parts) == 1:
-                for obj in self.__objects:
-                    if obj.name() == parts[0]:
-                        return True
-            elif len(parts) == 2:
-                for obj in self.__objects:
-                    if obj.name() == parts[0]:
-                        return parts[1] in obj
-            elif len(parts) == 3:
-                for obj in self.__objects:
-                    if obj.name() == parts[0]:
-                        return ".".join(parts[1:]) in obj
+            if len(parts) == 2 or len(parts) == 3:
+                obj = self.__find(parts[0])
+                if obj is not None:
+                    return ".".join(parts[1:]) in obj
         if isinstance(item, Object):
-            for obj in self.__objects:
-                if obj.name() == item.name():
-                    return True
+            return self.__find(item.name()) is not None
         return False
 
     #
@@ -1064,7 +1415,16 @@ class gtoContainer(gto.Reader):
                     # Must have an object with no components or a
                     # component with no properties.
                     pass
-            self.close()
+
+        if self.__map is not None:
+            # Same as above: pull in everything still in the map before
+            # the file can be overwritten.
+            for o in self.objects():
+                for c in o.components():
+                    for prop in c.properties():
+                        prop.data()
+
+        self.close()
 
         writer = gto.Writer()
         writer.open(filename, compress)
@@ -0,0 +1,140 @@
+#
+# Copyright (C) 2025  Autodesk, Inc. All Rights Reserved.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""
+Memory and lookup benchmark for gtoContainer.  Builds an RVPaint-like
+object holding one component per pen stroke, the way RV sessions with a lot
+of annotations look, then measures the memory it takes and the time spent
+looking up components and properties and reading their data.
+
+Pass the path of another gtoContainer.py, e.g. one checked out from an
+earlier revision, to compare both side by side:
+
+    git show <revision>:src/plugins/python/gtoContainer/gtoContainer.py > /tmp/gtoContainerOld.py
+    python gtoContainerBenchmark.py --baseline /tmp/gtoContainerOld.py
+
+Run it with the Python that ships with RV (py-interp), which provides the
+gto module.
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import timeit
+import tracemalloc
+
+import gto
+
+
+def loadModule(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def buildSession(module, strokes, points):
+    """
+    Return a gtoContainer with one RVPaint object holding strokes pen
+    components of points points each.
+    """
+    container = module.gtoContainer()
+    paint = module.Object("annotation", "RVPaint", 3)
+    container.append(paint)
+
+    for i in range(strokes):
+        comp = module.Component("pen:%d:1:annotation" % i)
+        paint.append(comp)
+        comp.append(module.Property("color", gto.FLOAT, 1, 4, [(1.0, 0.5, 0.25, 1.0)]))
+        comp.append(module.Property("width", gto.FLOAT, points, 1, [0.01] * points))
+        comp.append(module.Property("brush", gto.STRING, 1, 1, ["circle"]))
+        comp.append(module.Property("points", gto.FLOAT, points, 2, [(j * 0.001, i * 0.001) for j in range(points)]))
+        comp.append(module.Property("debug", gto.INT, 1, 1, [0]))
+        comp.append(module.Property("join", gto.INT, 1, 1, [3]))
+        comp.append(module.Property("cap", gto.INT, 1, 1, [1]))
+        comp.append(module.Property("splat", gto.INT, 1, 1, [0]))
+        comp.append(module.Property("mode", gto.INT, 1, 1, [0]))
+
+    return container
+
+
+def measureMemory(module, strokes, points):
+    tracemalloc.start()
+    try:
+        container = buildSession(module, strokes, points)
+        (current, peak) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current, container
+
+
+def measureLookups(container, repeat):
+    """
+    Return the best time, in seconds, of one pass over every stroke for
+    each kind of lookup.
+    """
+    paint = container.annotation
+    names = [c.name() for c in paint.components()]
+    random.Random(0).shuffle(names)
+
+    def byItem():
+        for name in names:
+            paint[name]["points"]
+
+    def byAttribute():
+        for name in names:
+            getattr(paint, name).width
+
+    def indexData():
+        for name in names:
+            prop = paint[name].points
+            for i in range(len(prop)):
+                prop.data()[i]
+
+    def buffers():
+        for name in names:
+            paint[name].points.buffer()
+
+    results = [
+        ("component[name][property]", byItem),
+        ("getattr(object, name).property", byAttribute),
+        ("property.data()[i] over all points", indexData),
+    ]
+    if hasattr(paint[names[0]].points, "buffer"):
+        results.append(("property.buffer()", buffers))
+    return [(label, min(timeit.repeat(f, number=1, repeat=repeat))) for label, f in results]
+
+
+def run(label, module, strokes, points, repeat):
+    (memory, container) = measureMemory(module, strokes, points)
+    print("%s: %s" % (label, module.__file__))
+    print("    %-40s %10.1f MB" % ("memory", memory / (1024.0 * 1024.0)))
+    for name, seconds in measureLookups(container, repeat):
+        print("    %-40s %10.2f ms" % (name, seconds * 1000.0))
+    return memory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark gtoContainer memory use and lookups.")
+    parser.add_argument("--baseline", help="path of another gtoContainer.py to compare against")
+    parser.add_argument("--strokes", type=int, default=5000, help="number of pen strokes (default: 5000)")
+    parser.add_argument("--points", type=int, default=50, help="points per stroke (default: 50)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats, the best is kept (default: 5)")
+    args = parser.parse_args(argv)
+
+    here = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gtoContainer.py")
+    current = run("current", loadModule(here, "gtoContainer"), args.strokes, args.points, args.repeat)
+
+    if args.baseline:
+        baseline = run(
+            "baseline", loadModule(args.baseline, "gtoContainerBaseline"), args.strokes, args.points, args.repeat
+        )
+        print("memory: current is %.0f%% of baseline" % (100.0 * current / baseline))
+
+
+if __name__ == "__main__":
+    main()
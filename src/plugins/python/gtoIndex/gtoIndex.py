@@ -0,0 +1,397 @@
+#
+# Copyright (C) 2025  Autodesk, Inc. All Rights Reserved.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""
+Batch indexer for directories full of .rv/.gto files.  Every file is scanned
+for its object headers and a small selection of properties, in a pool of
+worker processes, and the results are kept in a SQLite database so questions
+like "which sessions reference this movie?" or "which sessions use OCIO?"
+can be answered without opening a single file again:
+
+    python gtoIndex.py index shows.db /shows/abc/sessions /shows/xyz
+    python gtoIndex.py query shows.db --value /shows/abc/plates/a010.exr
+    python gtoIndex.py query shows.db --protocol "OCIO*"
+
+Re-running "index" only rescans files whose size or modification time
+changed since the last run and forgets files that have disappeared.
+
+Properties are selected with "protocol:component.property" patterns, where
+each part is an fnmatch pattern, e.g. "RVFileSource:media.movie" (the
+default) or "*:session.fps".  The same API is available from Python:
+
+    index = GtoIndex("shows.db")
+    index.update(["/shows/abc/sessions"], workers=8)
+    for path in index.filesWithValue("/shows/abc/plates/a010.exr"):
+        print(path)
+"""
+
+import argparse
+import concurrent.futures
+import fnmatch
+import os
+import sqlite3
+import sys
+
+import gto
+import six
+from gtoContainer import gtoContainer
+
+
+DEFAULT_PROPERTIES = ("RVFileSource:media.movie",)
+DEFAULT_EXTENSIONS = (".rv", ".gto")
+
+_schema = """
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS objects (
+    file INTEGER NOT NULL,
+    name TEXT,
+    protocol TEXT,
+    version INTEGER
+);
+CREATE TABLE IF NOT EXISTS properties (
+    file INTEGER NOT NULL,
+    object TEXT,
+    component TEXT,
+    property TEXT,
+    position INTEGER,
+    value
+);
+CREATE INDEX IF NOT EXISTS objectsFile ON objects (file);
+CREATE INDEX IF NOT EXISTS objectsProtocol ON objects (protocol);
+CREATE INDEX IF NOT EXISTS propertiesFile ON properties (file);
+CREATE INDEX IF NOT EXISTS propertiesValue ON properties (value);
+"""
+
+
+def parseSelection(patterns):
+    """
+    Turn "protocol:component.property" patterns into (protocol, component,
+    property) tuples.  A pattern without a protocol matches any protocol.
+    """
+    selection = []
+    for pattern in patterns:
+        (protocol, sep, rest) = pattern.rpartition(":")
+        (component, sep, prop) = rest.rpartition(".")
+        if not sep:
+            raise ValueError("property pattern '%s' is not of the form protocol:component.property" % pattern)
+        selection.append((protocol or "*", component, prop))
+    return tuple(selection)
+
+
+def _selected(selection, protocol, compName, propName):
+    for p, c, n in selection:
+        if fnmatch.fnmatchcase(protocol, p) and fnmatch.fnmatchcase(compName, c) and fnmatch.fnmatchcase(propName, n):
+            return True
+    return False
+
+
+def _rows(objName, compName, propName, data):
+    rows = []
+    for i, value in enumerate(data):
+        if isinstance(value, (tuple, list)):
+            value = " ".join(str(v) for v in value)
+        rows.append((objName, compName, propName, i, value))
+    return rows
+
+
+class _SelectiveReader(gto.Reader):
+    """
+    For internal use only.  A gto.Reader that keeps every object header but
+    only asks for the data of selected properties.  Used for text and
+    compressed files, which cannot be memory-mapped.
+    """
+
+    def __init__(self, selection):
+        gto.Reader.__init__(self)
+        self.selection = selection
+        self.objectHeaders = []
+        self.propertyRows = []
+
+    def object(self, objName, protocol, protocolVersion, oinfo):
+        self.objectHeaders.append((six.ensure_str(objName), six.ensure_str(protocol), protocolVersion))
+        return True
+
+    def component(self, compName, interp, cinfo):
+        protocol = six.ensure_str(cinfo.object.protocolName)
+        return any(fnmatch.fnmatchcase(protocol, p) and fnmatch.fnmatchcase(compName, c) for p, c, n in self.selection)
+
+    def property(self, propName, interp, pinfo):
+        compName = six.ensure_str(pinfo.component.name)
+        protocol = six.ensure_str(pinfo.component.object.protocolName)
+        return _selected(self.selection, protocol, compName, propName)
+
+    def dataRead(self, propName, dataTuple, pinfo):
+        objName = six.ensure_str(pinfo.component.object.name)
+        compName = six.ensure_str(pinfo.component.name)
+        self.propertyRows.extend(_rows(objName, compName, propName, dataTuple))
+
+
+def scanFile(path, selection):
+    """
+    Read the object headers and selected property values of one file.
+    Returns (path, size, mtime, objects, properties, error); this is what
+    the worker processes send back, so it only holds plain values.
+    """
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        return (path, None, None, [], [], str(e))
+
+    try:
+        try:
+            # Uncompressed binary files: parse the header through a memory
+            # map and read nothing but the selected properties.
+            container = gtoContainer(path, mapped=True)
+        except Exception:
+            container = None
+
+        if container is not None:
+            objects = []
+            properties = []
+            try:
+                for obj in container.objects():
+                    objects.append((obj.name(), obj.protocol(), obj.protocolVersion()))
+                    for comp in obj.components():
+                        for prop in comp.properties():
+                            if _selected(selection, obj.protocol(), comp.name(), prop.name()):
+                                properties.extend(_rows(obj.name(), comp.name(), prop.name(), prop.data()))
+            finally:
+                container.close()
+            return (path, st.st_size, st.st_mtime, objects, properties, None)
+
+        reader = _SelectiveReader(selection)
+        reader.open(path)
+        reader.close()
+        return (path, st.st_size, st.st_mtime, reader.objectHeaders, reader.propertyRows, None)
+
+    except Exception as e:
+        return (path, st.st_size, st.st_mtime, [], [], str(e))
+
+
+class GtoIndex:
+    """
+    A SQLite index of the object headers and selected properties of a
+    collection of GTO files.  Only the calling process writes to the
+    database; scanning is fanned out to worker processes.
+    """
+
+    def __init__(self, dbPath):
+        self.__db = sqlite3.connect(dbPath)
+        self.__db.executescript(_schema)
+
+    def close(self):
+        self.__db.close()
+
+    def selection(self):
+        """
+        Return the property patterns the index was last built with.
+        """
+        row = self.__db.execute("SELECT value FROM settings WHERE name = 'properties'").fetchone()
+        return tuple(row[0].split("\n")) if row else ()
+
+    def update(self, roots, properties=DEFAULT_PROPERTIES, extensions=DEFAULT_EXTENSIONS, workers=None, verbose=False):
+        """
+        Bring the index up to date with the files under 'roots' (files or
+        directories).  Files are rescanned only if their size or mtime
+        changed, or if 'properties' differs from the last run; files that
+        no longer exist under 'roots' are removed.  Returns the tuple
+        (scanned, unchanged, removed).
+        """
+        properties = tuple(properties)
+        selection = parseSelection(properties)
+        db = self.__db
+
+        if self.selection() != properties:
+            # A different property selection invalidates everything.
+            with db:
+                db.execute("DELETE FROM properties")
+                db.execute("DELETE FROM objects")
+                db.execute("DELETE FROM files")
+                db.execute("INSERT OR REPLACE INTO settings VALUES ('properties', ?)", ("\n".join(properties),))
+
+        known = {}
+        for path, size, mtime in db.execute("SELECT path, size, mtime FROM files"):
+            known[path] = (size, mtime)
+
+        found = set()
+        stale = []
+        for path in _findFiles(roots, extensions):
+            found.add(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if known.get(path) != (st.st_size, st.st_mtime):
+                stale.append(path)
+
+        roots = [os.path.abspath(r) for r in roots]
+        removed = [
+            p for p in known if p not in found and any(p == r or p.startswith(os.path.join(r, "")) for r in roots)
+        ]
+        with db:
+            for path in removed:
+                self.__forget(path)
+
+        scanned = 0
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(scanFile, stale, [selection] * len(stale), chunksize=_chunkSize(len(stale), workers))
+            # Commit in batches so an interrupted run keeps what it did.
+            batch = []
+            for result in results:
+                batch.append(result)
+                if len(batch) >= 256:
+                    scanned += self.__store(batch, verbose)
+                    batch = []
+            scanned += self.__store(batch, verbose)
+
+        return (scanned, len(found) - len(stale), len(removed))
+
+    def __forget(self, path):
+        row = self.__db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row:
+            self.__db.execute("DELETE FROM objects WHERE file = ?", row)
+            self.__db.execute("DELETE FROM properties WHERE file = ?", row)
+            self.__db.execute("DELETE FROM files WHERE id = ?", row)
+
+    def __store(self, results, verbose):
+        db = self.__db
+        with db:
+            for path, size, mtime, objects, properties, error in results:
+                self.__forget(path)
+                if size is None:
+                    continue
+                if error and verbose:
+                    print("WARNING: %s: %s" % (path, error), file=sys.stderr)
+                fileId = db.execute(
+                    "INSERT INTO files (path, size, mtime, error) VALUES (?, ?, ?, ?)", (path, size, mtime, error)
+                ).lastrowid
+                db.executemany("INSERT INTO objects VALUES (?, ?, ?, ?)", [(fileId,) + o for o in objects])
+                db.executemany("INSERT INTO properties VALUES (?, ?, ?, ?, ?, ?)", [(fileId,) + p for p in properties])
+        return len(results)
+
+    def filesWithValue(self, value, prop=None):
+        """
+        Return the paths of files in which any indexed property (or only
+        'prop', given as "component.property") holds 'value'.
+        """
+        query = "SELECT DISTINCT f.path FROM properties p JOIN files f ON f.id = p.file WHERE p.value = ?"
+        args = [value]
+        if prop is not None:
+            (compName, sep, propName) = prop.rpartition(".")
+            query += " AND p.component = ? AND p.property = ?"
+            args += [compName, propName]
+        return [row[0] for row in self.__db.execute(query + " ORDER BY f.path", args)]
+
+    def filesWithProtocol(self, protocol):
+        """
+        Return the paths of files containing an object whose protocol
+        matches 'protocol' (a glob pattern, e.g. "OCIO*").
+        """
+        query = (
+            "SELECT DISTINCT f.path FROM objects o JOIN files f ON f.id = o.file "
+            "WHERE o.protocol GLOB ? ORDER BY f.path"
+        )
+        return [row[0] for row in self.__db.execute(query, (protocol,))]
+
+    def values(self, path):
+        """
+        Return the indexed (object, component, property, position, value)
+        rows of one file.
+        """
+        query = (
+            "SELECT p.object, p.component, p.property, p.position, p.value FROM properties p "
+            "JOIN files f ON f.id = p.file WHERE f.path = ? ORDER BY p.rowid"
+        )
+        return self.__db.execute(query, (os.path.abspath(path),)).fetchall()
+
+    def errors(self):
+        """
+        Return (path, error) for every file that could not be read.
+        """
+        return self.__db.execute("SELECT path, error FROM files WHERE error IS NOT NULL ORDER BY path").fetchall()
+
+
+def _findFiles(roots, extensions):
+    for root in roots:
+        root = os.path.abspath(root)
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirPath, dirNames, fileNames in os.walk(root):
+            dirNames.sort()
+            for name in sorted(fileNames):
+                if name.lower().endswith(extensions):
+                    yield os.path.join(dirPath, name)
+
+
+def _chunkSize(count, workers):
+    # Large chunks amortise the inter-process traffic; keep several per
+    # worker so a few slow files don't leave the rest of the pool idle.
+    return max(1, min(64, count // (4 * (workers or os.cpu_count() or 1))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index the headers and selected properties of GTO/RV files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    index = sub.add_parser("index", help="scan files and update the index")
+    index.add_argument("db", help="SQLite index file")
+    index.add_argument("paths", nargs="+", help="files or directories to scan")
+    index.add_argument(
+        "-p",
+        "--property",
+        action="append",
+        dest="properties",
+        help='"protocol:component.property" pattern to index (default: %s)' % ", ".join(DEFAULT_PROPERTIES),
+    )
+    index.add_argument(
+        "-e", "--extension", action="append", dest="extensions", help="file extension to scan (default: .rv, .gto)"
+    )
+    index.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes")
+    index.add_argument("-v", "--verbose", action="store_true", help="report files that could not be read")
+
+    query = sub.add_parser("query", help="query an existing index")
+    query.add_argument("db", help="SQLite index file")
+    query.add_argument("--value", help="list files in which an indexed property holds this value")
+    query.add_argument("--property", dest="prop", help='restrict --value to one "component.property"')
+    query.add_argument("--protocol", help="list files containing an object of this protocol (glob pattern)")
+    query.add_argument("--errors", action="store_true", help="list files that could not be read")
+
+    args = parser.parse_args(argv)
+    db = GtoIndex(args.db)
+
+    try:
+        if args.command == "index":
+            extensions = tuple(e.lower() for e in args.extensions) if args.extensions else DEFAULT_EXTENSIONS
+            (scanned, unchanged, removed) = db.update(
+                args.paths, args.properties or DEFAULT_PROPERTIES, extensions, args.workers, args.verbose
+            )
+            print("%d scanned, %d unchanged, %d removed" % (scanned, unchanged, removed))
+        else:
+            paths = []
+            if args.value is not None:
+                paths = db.filesWithValue(args.value, args.prop)
+            elif args.protocol is not None:
+                paths = db.filesWithProtocol(args.protocol)
+            elif args.errors:
+                paths = ["%s: %s" % e for e in db.errors()]
+            else:
+                parser.error("query needs one of --value, --protocol or --errors")
+            for path in paths:
+                print(path)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,5 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 from .rvNetwork import RvCommunicator as RvCommunicator
+from .rvAsyncNetwork import AsyncRvCommunicator as AsyncRvCommunicator
+from .rvAsyncNetwork import AsyncRvPool as AsyncRvPool
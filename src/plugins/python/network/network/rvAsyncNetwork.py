@@ -0,0 +1,451 @@
+#
+# Copyright (C) 2025  Autodesk, Inc. All Rights Reserved.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+import asyncio
+import collections
+import itertools
+import sys
+
+from .rvNetwork import remoteHandlerCode
+
+
+class AsyncRvCommunicator:
+    """
+    asyncio flavour of RvCommunicator.  A single reader task owns the
+    socket and decodes complete messages with framed reads, so any
+    number of coroutines can have remote calls in flight on the same
+    connection at once.
+
+    RV answers RETURNEVENT messages in the order it receives them, so
+    every outgoing call gets a future that is queued in send order;
+    each incoming RETURN resolves the oldest pending request.  A request
+    whose caller gave up (timeout or cancellation) stays queued,
+    cancelled, until its RETURN arrives so later replies still line up
+    with the right callers, and it keeps its maxInFlight slot until
+    then.
+
+        rvc = AsyncRvCommunicator("farmController")
+        await rvc.connect("127.0.0.1", 45124)
+        frames = await asyncio.gather(*[rvc.remoteEvalAndReturn("frame();") for _ in range(100)])
+        await rvc.disconnect()
+    """
+
+    def __init__(self, name="rvCommunicator-1", noPP=True, maxInFlight=0):
+        """
+        "name" should be unique among all clients of the network
+        protocol.
+        noPP will disable ping-pong "heartbeat" messages.
+        maxInFlight bounds the number of unanswered calls on the
+        connection (0 means unbounded).
+        """
+        self.defaultPort = 45124
+        self.port = self.defaultPort
+        self.connected = False
+        self.name = name
+        self.handlers = {}
+        self.noPingPong = noPP
+        self._reader = None
+        self._writer = None
+        self._readerTask = None
+        self._pending = collections.deque()
+        self._inFlight = asyncio.Semaphore(maxInFlight) if maxInFlight > 0 else None
+
+    async def connect(self, host, port=-1):
+        """
+        Connect to the specified host/port, exchange greetings with
+        RV, turn off heartbeat if so desired, and start the reader
+        task.  Raises OSError if the connection cannot be made.
+        """
+        if self.connected:
+            await self.disconnect()
+
+        if port != -1:
+            self.port = port
+
+        self._reader, self._writer = await asyncio.open_connection(host, self.port)
+
+        greeting = ("%s rvController" % self.name).encode("utf-8")
+        self._writer.write(b"NEWGREETING %d %s" % (len(greeting), greeting))
+        if self.noPingPong:
+            self._writer.write(b"PINGPONGCONTROL 1 0")
+        await self._writer.drain()
+
+        self.connected = True
+        self._readerTask = asyncio.ensure_future(self._readLoop())
+
+    async def disconnect(self, send_msg=True):
+        """
+        Disconnect from remote RV.  Calls still waiting for a RETURN
+        fail with ConnectionError.
+        """
+        if self._writer is None:
+            return
+
+        try:
+            if send_msg and self.connected:
+                self._sendMessage("DISCONNECT")
+                await self._writer.drain()
+            self._writer.close()
+            await self._writer.wait_closed()
+        except Exception:
+            pass
+
+        if self._readerTask is not None:
+            self._readerTask.cancel()
+            try:
+                await self._readerTask
+            except (asyncio.CancelledError, Exception):
+                pass
+
+        self._connectionLost(ConnectionError("disconnected from RV"))
+
+    def pendingCount(self):
+        """
+        Number of calls sent to RV and not yet answered.
+        """
+        return len(self._pending)
+
+    def _sendMessage(self, message):
+        """
+        For internal use.  Queue an arbitrary message on the socket.
+        """
+        data = message.encode("utf-8")
+        self._writer.write(b"MESSAGE %d %s" % (len(data), data))
+
+    async def sendEvent(self, eventName, eventContents="Default"):
+        """
+        Send a remote event.  eventName must be one of the events
+        listed in the RV Reference Manual.
+        """
+        if not self.connected:
+            raise ConnectionError("not connected to RV")
+
+        self._sendMessage("EVENT %s * %s" % (eventName, eventContents))
+        await self._writer.drain()
+
+    async def sendEventAndReturn(self, eventName, eventContents="Default", timeout=None):
+        """
+        Send a remote event, then wait for its return value (string).
+        Many calls may be awaited concurrently; each resolves with its
+        own RETURN.  Raises asyncio.TimeoutError if timeout (seconds)
+        expires first.
+        """
+        if self._inFlight is not None:
+            await self._inFlight.acquire()
+
+        if not self.connected:
+            self._releaseSlot()
+            raise ConnectionError("not connected to RV")
+
+        future = asyncio.get_running_loop().create_future()
+
+        # Queue the future and write the message without yielding in
+        # between, so the pending order is exactly the send order.  The
+        # in-flight slot is released when the reply (or the end of the
+        # connection) takes the future off the queue.
+        self._pending.append(future)
+        try:
+            self._sendMessage("RETURNEVENT %s * %s" % (eventName, eventContents))
+        except Exception:
+            self._pending.remove(future)
+            self._releaseSlot()
+            raise
+        await self._writer.drain()
+
+        if timeout is None:
+            return await future
+        return await asyncio.wait_for(future, timeout)
+
+    def _releaseSlot(self):
+        if self._inFlight is not None:
+            self._inFlight.release()
+
+    async def remoteEval(self, code):
+        """
+        Special case of sendEvent, remote-eval is the most common remote event.
+        """
+        await self.sendEvent("remote-eval", code)
+
+    async def remoteEvalAndReturn(self, code, timeout=None):
+        """
+        Special case of sendEventAndReturn, remote-eval is the most common remote event.
+        """
+        return await self.sendEventAndReturn("remote-eval", code, timeout)
+
+    async def remotePyEval(self, code, timeout=None):
+        """
+        Evaluate python expression returning result.
+        """
+        return await self.sendEventAndReturn("remote-pyeval", code, timeout)
+
+    async def remotePyExec(self, code):
+        """
+        Execute python command (no return value).
+        """
+        await self.sendEvent("remote-pyexec", code)
+
+    async def bindToEvent(self, eventName, eventHandler):
+        """
+        Bind to a remote event.  eventHandler is called with the event
+        contents (a string) whenever the remote event occurs; it may be
+        a plain function or a coroutine function.
+        """
+        remoteCode = remoteHandlerCode(self.name, eventName, eventHandler)
+
+        if await self.remoteEvalAndReturn(remoteCode) == "true":
+            self.handlers[eventName] = eventHandler
+
+    async def _readLoop(self):
+        reason = ConnectionError("remote host closed connection")
+        try:
+            while True:
+                messType = (await self._reader.readuntil(b" "))[:-1]
+                messSize = int((await self._reader.readuntil(b" "))[:-1])
+                messContents = await self._reader.readexactly(messSize)
+                self._processMessage(messType, messContents)
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            if not isinstance(exc, asyncio.IncompleteReadError):
+                reason = exc
+        except Exception as exc:
+            print("ERROR: can't process message: %s\n" % exc, file=sys.stderr)
+            reason = ConnectionError("protocol error: %s" % exc)
+        finally:
+            self._connectionLost(reason)
+
+    def _processMessage(self, messType, messContents):
+        if messType == b"MESSAGE":
+            parts = messContents.split(b" ", 1)
+            subType = parts[0]
+
+            if subType == b"RETURN":
+                contents = parts[1] if len(parts) > 1 else b""
+                self._resolveNext(contents.decode("utf-8", "replace"))
+
+            elif subType == b"EVENT":
+                # EVENT <name> <sender> <contents>
+                eventParts = messContents.split(b" ", 3)
+                eventName = eventParts[1].decode("utf-8") if len(eventParts) > 1 else ""
+                contents = eventParts[3] if len(eventParts) > 3 else b""
+                self._dispatchEvent(eventName, contents.decode("utf-8", "replace"))
+
+            elif subType == b"DISCONNECT":
+                self._writer.close()
+                raise ConnectionError("remote host sent DISCONNECT")
+
+        elif messType == b"PING":
+            self._writer.write(b"PONG 1 p")
+
+        elif messType in (b"GREETING", b"NEWGREETING", b"PONG"):
+            #   ignore
+            pass
+        else:
+            print("ERROR: unknown message type: %s\n" % messType, file=sys.stderr)
+
+    def _resolveNext(self, contents):
+        if not self._pending:
+            print("ERROR: out of order return: %s\n" % contents, file=sys.stderr)
+            return
+
+        future = self._pending.popleft()
+        self._releaseSlot()
+        if not future.done():
+            future.set_result(contents)
+
+    def _dispatchEvent(self, eventName, contents):
+        handler = self.handlers.get(eventName)
+        if handler is None:
+            return
+
+        try:
+            result = handler(contents)
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result)
+        except Exception as exc:
+            print("ERROR: handler for %s failed: %s\n" % (eventName, exc), file=sys.stderr)
+
+    def _connectionLost(self, reason):
+        self.connected = False
+        while self._pending:
+            future = self._pending.popleft()
+            self._releaseSlot()
+            if not future.done():
+                future.set_exception(reason)
+
+
+class AsyncRvPool:
+    """
+    Keeps persistent AsyncRvCommunicator connections to a set of RV
+    instances and fans remote calls out to all of them in parallel,
+    e.g. to drive synced dailies across a room of RVs from one event
+    loop.  Targets are "host:port" strings.
+
+    A background task checks the health of every connection each
+    healthInterval seconds with a cheap remote-eval and reconnects
+    targets that dropped.  Broadcast calls that expect a return value
+    give each target its own timeout and report per-target results:
+
+        pool = AsyncRvPool("dailies", ["10.0.0.11:45124", "10.0.0.12:45124"])
+        await pool.start()
+        frames = await pool.broadcastEvalAndReturn("frame();", timeout=0.5)
+        # {"10.0.0.11:45124": "1001", "10.0.0.12:45124": TimeoutError()}
+        await pool.close()
+    """
+
+    def __init__(self, name="rvPool", targets=(), noPP=True, healthInterval=5.0, timeout=2.0):
+        """
+        "name" is the prefix of the client name used for every
+        connection.  timeout is the default per-target timeout (seconds)
+        for connecting, health checks and calls that return a value.
+        """
+        self.name = name
+        self.noPingPong = noPP
+        self.healthInterval = healthInterval
+        self.timeout = timeout
+        self.connections = {}
+        self._clientIds = itertools.count(1)
+        self._healthTask = None
+        for target in targets:
+            self.addTarget(target)
+
+    def addTarget(self, target):
+        """
+        Register a "host:port" target.  It is connected by start() or
+        by the next health check.
+        """
+        if target not in self.connections:
+            self.connections[target] = AsyncRvCommunicator(
+                "%s-%d" % (self.name, next(self._clientIds)), self.noPingPong
+            )
+
+    async def removeTarget(self, target):
+        """
+        Disconnect and forget a target.
+        """
+        rvc = self.connections.pop(target, None)
+        if rvc is not None:
+            await rvc.disconnect()
+
+    def connectedTargets(self):
+        """
+        Targets with a live connection.
+        """
+        return [target for target, rvc in self.connections.items() if rvc.connected]
+
+    async def start(self):
+        """
+        Connect every target and start the health check task.  Returns
+        the {target: exception} of targets that could not be reached.
+        """
+        failures = await self.connectAll()
+        if self._healthTask is None and self.healthInterval > 0:
+            self._healthTask = asyncio.ensure_future(self._healthLoop())
+        return failures
+
+    async def close(self):
+        """
+        Stop health checks and disconnect from every target.
+        """
+        if self._healthTask is not None:
+            self._healthTask.cancel()
+            try:
+                await self._healthTask
+            except asyncio.CancelledError:
+                pass
+            self._healthTask = None
+
+        await asyncio.gather(*[rvc.disconnect() for rvc in self.connections.values()])
+
+    async def connectAll(self):
+        """
+        (Re)connect every target that is not connected, in parallel.
+        Returns the {target: exception} of targets that failed.
+        """
+        targets = [target for target, rvc in self.connections.items() if not rvc.connected]
+        results = await asyncio.gather(*[self._connect(target) for target in targets], return_exceptions=True)
+        return dict((target, result) for target, result in zip(targets, results) if isinstance(result, Exception))
+
+    async def _connect(self, target):
+        host, port = target.rsplit(":", 1)
+        rvc = self.connections[target]
+        await rvc.disconnect(False)
+        await asyncio.wait_for(rvc.connect(host, int(port)), self.timeout)
+
+    async def checkHealth(self):
+        """
+        Probe every connected target and reconnect the ones that are
+        down or do not answer within the pool timeout.  Returns the
+        list of targets that are healthy afterwards.
+        """
+        probes = dict(
+            (target, rvc.remoteEvalAndReturn("true;", self.timeout))
+            for target, rvc in self.connections.items()
+            if rvc.connected
+        )
+        results = await asyncio.gather(*probes.values(), return_exceptions=True)
+        for target, result in zip(probes, results):
+            if isinstance(result, Exception):
+                await self.connections[target].disconnect(False)
+
+        await self.connectAll()
+        return self.connectedTargets()
+
+    async def _healthLoop(self):
+        while True:
+            await asyncio.sleep(self.healthInterval)
+            try:
+                await self.checkHealth()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print("ERROR: pool health check failed: %s\n" % exc, file=sys.stderr)
+
+    async def _broadcast(self, call):
+        targets = self.connectedTargets()
+        results = await asyncio.gather(*[call(self.connections[target]) for target in targets], return_exceptions=True)
+        return dict(zip(targets, results))
+
+    async def broadcastEvent(self, eventName, eventContents="Default"):
+        """
+        Send a remote event to every connected target.  Returns
+        {target: None or exception}.
+        """
+        return await self._broadcast(lambda rvc: rvc.sendEvent(eventName, eventContents))
+
+    async def broadcastEventAndReturn(self, eventName, eventContents="Default", timeout=None):
+        """
+        Send a remote event to every connected target and gather the
+        return values.  Each target gets its own timeout (the pool
+        default if None), so one slow RV does not hold up the others.
+        Returns {target: string or exception}.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        return await self._broadcast(lambda rvc: rvc.sendEventAndReturn(eventName, eventContents, timeout))
+
+    async def broadcastEval(self, code):
+        """
+        Special case of broadcastEvent for remote-eval.
+        """
+        return await self.broadcastEvent("remote-eval", code)
+
+    async def broadcastEvalAndReturn(self, code, timeout=None):
+        """
+        Special case of broadcastEventAndReturn for remote-eval.
+        """
+        return await self.broadcastEventAndReturn("remote-eval", code, timeout)
+
+    async def broadcastPyEval(self, code, timeout=None):
+        """
+        Evaluate a python expression on every target, gathering results.
+        """
+        return await self.broadcastEventAndReturn("remote-pyeval", code, timeout)
+
+    async def broadcastPyExec(self, code):
+        """
+        Execute a python command on every target (no return value).
+        """
+        return await self.broadcastEvent("remote-pyexec", code)
@@ -6,12 +6,201 @@
 #
 from __future__ import print_function
 
+import collections
+import select
 import socket
+import string
 import sys
 import time
 import six
 
 
+def muString(s):
+    """
+    Quote s as a Mu string literal.  Anything but printable ASCII is
+    written as a \\u escape, with as many hex digits as the code point
+    needs.  Mu reads every hex digit that follows \\u, so a hex digit
+    right after an escape is escaped as well.
+    """
+    out = []
+    escaped = False
+    for c in s:
+        if c == '"' or c == "\\":
+            out.append("\\" + c)
+            escaped = False
+        elif " " <= c <= "~" and not (escaped and c in string.hexdigits):
+            out.append(c)
+            escaped = False
+        else:
+            out.append("\\u%04x" % ord(c))
+            escaped = True
+    return '"' + "".join(out) + '"'
+
+
+def remoteHandlerCode(clientName, eventName, eventHandler):
+    """
+    Build the Mu code that binds a remote handler for eventName in RV,
+    forwarding the event contents back to the client named clientName.
+    """
+    eventHandlerString = str(eventHandler).split()[1]
+    remoteHandlerName = "remoteHandler%s_%s" % (
+        eventHandlerString,
+        "_".join(eventName.split("-")),
+    )
+    return """
+    require commands;
+
+    function: %s (void; Event event)
+    {
+        string contact = nil;
+        for_each (c; commands.remoteConnections())
+        {
+            if (regex("%s@").match(c)) contact = c;
+        }
+
+        if (contact neq nil)
+        {
+            commands.remoteSendEvent ("%s", "*",
+                    event.contents(), string[] {contact});
+        }
+        event.reject();
+    }
+    commands.bind("default", "global", "%s", %s, "python event handler");
+    true;
+
+    """ % (
+        remoteHandlerName,
+        clientName,
+        eventName,
+        eventName,
+        remoteHandlerName,
+    )
+
+
+class MessageDecoder:
+    """
+    Incremental decoder for the RV network protocol, where every
+    message is framed as "<type> <size> <contents>".  Bytes are fed in
+    whatever chunks the socket returns; complete messages are pulled
+    out with nextMessage().  Partial headers or bodies simply stay
+    buffered until more data arrives, and one chunk may carry any
+    number of messages.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offset = 0
+        self._next = None
+
+    def feed(self, data):
+        """
+        Append received bytes (bytes, bytearray or memoryview).
+        """
+        if self._offset:
+            del self._buffer[: self._offset]
+            self._offset = 0
+        self._buffer += data
+
+    def bufferedSize(self):
+        """
+        Number of received bytes not yet returned as messages.
+        """
+        return len(self._buffer) - self._offset
+
+    def hasMessage(self):
+        """
+        Return true iff a complete message is buffered.  A malformed
+        message header also counts; nextMessage() then raises.
+        """
+        if self._next is None:
+            try:
+                self._next = self._decode()
+            except ValueError as exc:
+                self._next = exc
+        return self._next is not None
+
+    def nextMessage(self):
+        """
+        Return the next complete (type, contents) pair as bytes, or
+        None if the buffer does not hold a whole message yet.  Raises
+        ValueError if the next message header is malformed.
+        """
+        if not self.hasMessage():
+            return None
+        message = self._next
+        self._next = None
+        if isinstance(message, ValueError):
+            raise message
+        return message
+
+    def _decode(self):
+        buf = self._buffer
+        start = self._offset
+
+        typeEnd = buf.find(b" ", start)
+        if typeEnd < 0:
+            return None
+        sizeEnd = buf.find(b" ", typeEnd + 1)
+        if sizeEnd < 0:
+            return None
+
+        sizeField = bytes(buf[typeEnd + 1 : sizeEnd])
+        try:
+            size = int(sizeField)
+        except ValueError:
+            size = -1
+        if size < 0:
+            raise ValueError("malformed message size: %r" % sizeField)
+
+        end = sizeEnd + 1 + size
+        if len(buf) < end:
+            return None
+
+        view = memoryview(buf)
+        try:
+            message = (bytes(view[start:typeEnd]), bytes(view[sizeEnd + 1 : end]))
+        finally:
+            view.release()
+
+        self._offset = end
+        return message
+
+
+COALESCE_NONE = "none"
+COALESCE_LATEST = "latest"
+COALESCE_BATCH = "batch"
+
+OVERFLOW_DROP_OLDEST = "drop-oldest"
+OVERFLOW_DROP_NEWEST = "drop-newest"
+
+
+class EventPolicy:
+    """
+    Describes how queued occurrences of one remote event are handed to
+    its handler by RvCommunicator.processEvents().
+
+    coalesce:
+        COALESCE_NONE   every occurrence is delivered (consecutive
+                        duplicates are dropped).
+        COALESCE_LATEST only the most recent contents are delivered.
+        COALESCE_BATCH  the handler is called once with the list of
+                        all contents received since the last delivery.
+    maxRate:
+        deliver at most maxRate times per second (0 means no limit).
+        Occurrences arriving in between are held back and coalesced,
+        so a throttled COALESCE_NONE event behaves like COALESCE_LATEST.
+        Held occurrences are delivered by a later processEvents() call.
+    """
+
+    def __init__(self, coalesce=COALESCE_LATEST, maxRate=0):
+        if coalesce not in (COALESCE_NONE, COALESCE_LATEST, COALESCE_BATCH):
+            raise ValueError("unknown coalesce policy: %s" % coalesce)
+        if maxRate and coalesce == COALESCE_NONE:
+            coalesce = COALESCE_LATEST
+        self.coalesce = coalesce
+        self.maxRate = maxRate
+
+
 class RvCommunicator:
     """
     Wrap up connection and communciation with a running RV.  The
@@ -25,11 +214,15 @@ class RvCommunicator:
     Connections from the local machine are assumed to be safe.
     """
 
-    def __init__(self, name="rvCommunicator-1", noPP=True):
+    def __init__(self, name="rvCommunicator-1", noPP=True, maxQueuedEvents=0, overflow=OVERFLOW_DROP_OLDEST):
         """
         "name" should be unique among all clients of the network
         protocol.
         noPP will disable ping-pong "heartbeat" messages.
+        maxQueuedEvents bounds the number of events waiting for
+        dispatch (0 means unbounded); when the queue is full the
+        overflow policy decides whether the oldest queued or the
+        incoming event is dropped.  Drops are counted in droppedEvents.
         """
         self.defaultPort = 45124
         self.port = self.defaultPort
@@ -37,8 +230,16 @@ class RvCommunicator:
         self.sock = 0
         self.name = name
         self.handlers = {}
-        self.eventQueue = []
+        self.eventQueue = collections.deque()
+        self.eventPolicies = {}
+        self.maxQueuedEvents = maxQueuedEvents
+        self.overflow = overflow
+        self.droppedEvents = 0
         self.noPingPong = noPP
+        self._coalescedEvents = {}
+        self._lastDelivery = {}
+        self.recvSize = 65536
+        self._decoder = MessageDecoder()
 
     def __del__(self):
         if self.connected:
@@ -55,6 +256,8 @@ class RvCommunicator:
         if port != -1:
             self.port = port
 
+        self._decoder = MessageDecoder()
+
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         except socket.error as msg:
@@ -149,16 +352,19 @@ class RvCommunicator:
         """
         Return true iff there is an incomming message waiting.
         """
-        available = False
-        try:
-            data = self.sock.recv(1, socket.MSG_PEEK)
-            if len(data) != 0:
-                available = True
-            else:
-                print("ERROR: remote host closed connection\n", file=sys.stderr)
-                self.sock.close()
-                self.connected = False
+        if self._decoder.hasMessage():
+            return True
+
+        self._receiveAvailable()
+        return self._decoder.hasMessage()
 
+    def _receiveAvailable(self):
+        """
+        For internal use.  Move whatever the socket has ready into the
+        message decoder.  Returns false if nothing could be read.
+        """
+        try:
+            data = self.sock.recv(self.recvSize)
         except socket.error as msg:
             sanitized_msg = msg
             if hasattr(msg, "errno"):
@@ -168,35 +374,30 @@ class RvCommunicator:
                 and sanitized_msg[1] != "A non-blocking socket operation could not be completed immediately"
                 and sanitized_msg[0] != 10035
             ):
-                print("ERROR: peek for messages failed: %s\n" % msg, file=sys.stderr)
-
-        return available
+                print("ERROR: receive failed: %s\n" % msg, file=sys.stderr)
+            return False
 
-    def _receiveMessageField(self):
-        field = six.ensure_binary("")
-        while True:
-            c = self.sock.recv(1)
-            if c == six.ensure_binary(" "):
-                break
-            field += c
+        if len(data) == 0:
+            print("ERROR: remote host closed connection\n", file=sys.stderr)
+            self.sock.close()
+            self.connected = False
+            return False
 
-        return field
+        self._decoder.feed(data)
+        return True
 
     def _receiveSingleMessage(self):
         messType = 0
         messContents = 0
 
         try:
-            messType = self._receiveMessageField()
-            messSize = int(self._receiveMessageField())
+            message = self._decoder.nextMessage()
+            if message is not None:
+                (messType, messContents) = message
 
-            self.sock.setblocking(1)
-            messContents = self.sock.recv(messSize)
-            self.sock.setblocking(0)
-
-        except socket.error as msg:
-            print("ERROR: can't process message: %s\n" % msg[1], file=sys.stderr)
-            self.sock.setblocking(0)
+        except ValueError as msg:
+            print("ERROR: can't process message: %s\n" % msg, file=sys.stderr)
+            self.disconnect(False)
 
         return (messType, messContents)
 
@@ -210,43 +411,24 @@ class RvCommunicator:
         It's probably better if the eventHandler does not itself
         send events, but just sets state for later action.
         """
-        eventHandlerString = str(eventHandler).split()[1]
-        remoteHandlerName = "remoteHandler%s_%s" % (
-            eventHandlerString,
-            "_".join(eventName.split("-")),
-        )
-        remoteCode = """
-        require commands;
-
-        function: %s (void; Event event)
-        {
-            string contact = nil;
-            for_each (c; commands.remoteConnections())
-            {
-                if (regex("%s@").match(c)) contact = c;
-            }
-
-            if (contact neq nil)
-            {
-                commands.remoteSendEvent ("%s", "*",
-                        event.contents(), string[] {contact});
-            }
-            event.reject();
-        }
-        commands.bind("default", "global", "%s", %s, "python event handler");
-        true;
-
-        """ % (
-            remoteHandlerName,
-            self.name,
-            eventName,
-            eventName,
-            remoteHandlerName,
-        )
+        remoteCode = remoteHandlerCode(self.name, eventName, eventHandler)
 
         if self.remoteEvalAndReturn(remoteCode) == "true":
             self.handlers[eventName] = eventHandler
 
+    def setEventPolicy(self, eventName, coalesce=COALESCE_LATEST, maxRate=0):
+        """
+        Control how occurrences of eventName are delivered, see
+        EventPolicy.  For example, to see at most 30 frame changes a
+        second during playback:
+
+            rvc.setEventPolicy("frame-changed", COALESCE_LATEST, maxRate=30)
+
+        With COALESCE_BATCH the bound handler receives a list of
+        contents strings instead of a single string.
+        """
+        self.eventPolicies[eventName] = EventPolicy(coalesce, maxRate)
+
     def _processSingleMessage(self, contents):
         parts = contents.split()
         messType = parts[0]
@@ -258,7 +440,7 @@ class RvCommunicator:
             return (six.ensure_binary("RETURN"), contents)
 
         elif messType == six.ensure_binary("EVENT"):
-            eventName = parts[1]
+            eventName = six.ensure_str(parts[1])
             contents = six.ensure_binary("")
             if len(parts) > 3:
                 contents = six.ensure_binary(" ").join(parts[3:])
@@ -275,7 +457,8 @@ class RvCommunicator:
                     return six.ensure_binary("")
                 noMessage = not self.messageAvailable()
                 if noMessage and processReturnOnly:
-                    time.sleep(0.01)
+                    if self.connected:
+                        select.select([self.sock], [], [], 0.01)
                 else:
                     break
 
@@ -296,8 +479,8 @@ class RvCommunicator:
                             file=sys.stderr,
                         )
                         return six.ensure_binary("")
-                elif len(self.eventQueue) == 0 or (event, contents) != self.eventQueue[-1:]:
-                    self.eventQueue.append((event, contents))
+                else:
+                    self._queueEvent(event, contents)
 
             elif messType == six.ensure_binary("PING"):
                 self.sock.sendall(six.ensure_binary("PONG 1 p"))
@@ -312,10 +495,66 @@ class RvCommunicator:
             else:
                 print("ERROR: unknown message type: %s\n" % messType, file=sys.stderr)
 
-        for event, contents in self.eventQueue:
-            if event in self.handlers:
-                self.handlers[event](contents)
-
-        self.eventQueue = []
+        self._dispatchEvents()
 
         return six.ensure_binary("")
+
+    def _queueEvent(self, event, contents):
+        policy = self.eventPolicies.get(event)
+
+        if policy is None or policy.coalesce == COALESCE_NONE:
+            if len(self.eventQueue) != 0 and self.eventQueue[-1] == (event, contents):
+                return
+        else:
+            pending = self._coalescedEvents.get(event)
+            if pending is not None:
+                if policy.coalesce == COALESCE_LATEST:
+                    pending[0] = contents
+                else:
+                    pending.append(contents)
+                return
+            #   coalesced events keep a single queue slot at the position
+            #   of their first occurrence; contents live in _coalescedEvents
+            self._coalescedEvents[event] = [contents]
+            contents = None
+
+        if 0 < self.maxQueuedEvents <= len(self.eventQueue):
+            self.droppedEvents += 1
+            if self.overflow == OVERFLOW_DROP_NEWEST:
+                if contents is None:
+                    del self._coalescedEvents[event]
+                return
+            (droppedEvent, droppedContents) = self.eventQueue.popleft()
+            if droppedContents is None:
+                del self._coalescedEvents[droppedEvent]
+
+        self.eventQueue.append((event, contents))
+
+    def _dispatchEvents(self):
+        now = time.time()
+        held = []
+
+        #   Held slots go back on the queue even if a handler raises, or
+        #   their events would never get another slot.
+        try:
+            while len(self.eventQueue) != 0:
+                (event, contents) = self.eventQueue.popleft()
+                if contents is not None:
+                    if event in self.handlers:
+                        self.handlers[event](contents)
+                    continue
+
+                policy = self.eventPolicies[event]
+                if policy.maxRate and now - self._lastDelivery.get(event, 0.0) < 1.0 / policy.maxRate:
+                    held.append((event, None))
+                    continue
+
+                pending = self._coalescedEvents.pop(event)
+                self._lastDelivery[event] = now
+                if event in self.handlers:
+                    if policy.coalesce == COALESCE_BATCH:
+                        self.handlers[event](pending)
+                    else:
+                        self.handlers[event](pending[0])
+        finally:
+            self.eventQueue.extend(held)
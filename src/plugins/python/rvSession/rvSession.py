@@ -66,7 +66,9 @@ RELEASE NOTES:
 
 """
 
+import os
 import sys
+import tempfile
 import six
 import gto
 import gtoContainer as gc
@@ -91,6 +93,12 @@ class _Node:
         self.inputs = []
         self.maxInputs = -1  # unlimited
 
+        #   Dirty state consulted by Session.write(incremental=True):
+        #   the objNames touched since the last incremental write (None
+        #   means the whole node) and whether the inputs changed.
+        self.dirtyObjects = None
+        self.dirtyInputs = False
+
     def setUIName(self, name):
         """
         UI names are for convenience only.  They do not need to be unique.
@@ -143,6 +151,18 @@ class _Node:
         """
         return self.properties[(objType, objName, contName, propName)]
 
+    def markDirty(self, objName=None):
+        """
+        Make the next incremental Session.write() serialize the given
+        object of this node again, or the whole node if objName is None.
+        setProperty() does this for you; call it only after modifying
+        the properties dict (or a value in it) directly.
+        """
+        if objName is None:
+            self.dirtyObjects = None
+        elif self.dirtyObjects is not None:
+            self.dirtyObjects.add(objName)
+
     def setProperty(self, objType, objName, contName, propName, valueType, value):
         """
         If you know the path to a given property you can use
@@ -159,6 +179,7 @@ class _Node:
                 value = six.ensure_binary(value)
 
         self.properties[(objType, objName, contName, propName)] = (valueType, value)
+        self.markDirty(objName)
 
     def addInput(self, node):
         """
@@ -171,6 +192,7 @@ class _Node:
             raise Exception("ERROR: node '%s' (%s) only allowed %d inputs" % (self.name, self.typeName, self.maxInputs))
         else:
             self.inputs.append(node.name)
+            self.dirtyInputs = True
 
 
 class _GroupNode(_Node):
@@ -715,6 +737,10 @@ class Session:
         self.properties = {}
         self.nodes = {}
 
+        #   See _Node.markDirty() and write(incremental=True).
+        self.dirtyObjects = None
+        self._serialized = None
+
         self.outputGroup = self.Output()
         self.outputGroup.name = "defaultOutputGroup"
 
@@ -751,6 +777,18 @@ class Session:
                 value = six.ensure_binary(value)
 
         self.properties[(objType, objName, contName, propName)] = (valueType, value)
+        self.markDirty(objName)
+
+    def markDirty(self, objName=None):
+        """
+        Make the next incremental write() serialize the given object of
+        the RVSession node again, or all of it if objName is None.  Only
+        needed after modifying the properties dict directly.
+        """
+        if objName is None:
+            self.dirtyObjects = None
+        elif self.dirtyObjects is not None:
+            self.dirtyObjects.add(objName)
 
     def setOutputProperty(self, objType, objName, contName, propName, valueType, value):
         """
@@ -919,10 +957,10 @@ class Session:
             #   write properties of this node.
             self._writeProperties(top, top[node.name], node.name, node.properties)
 
-    def write(self, filename):
+    def toContainer(self):
         """
-        Write all nodes and connections to a file.  Filename must
-        end in ".rv"
+        Build and return an in-memory gtoContainer holding all nodes
+        and connections, as they would be written to the session file.
         """
 
         f = gc.gtoContainer()
@@ -932,7 +970,233 @@ class Session:
         self._writeDefaultOutput(f)
         self._writeNodes(f)
 
-        f.write(filename, 2)  # 0: Binary 1: Compressed 2: Text
+        return f
+
+    #
+    #   Streaming output: walk the session and hand objects, components
+    #   and properties straight to gto.Writer instead of building a
+    #   gtoContainer first.  The layout must stay identical to the one
+    #   produced through toContainer().
+    #
+
+    def _propertyRecord(self, prop, typeName, value):
+        """
+        Return (name, type, size, width, data) for one property value,
+        laid out as _writeProperties does.
+        """
+        w = 1
+        element = value
+        if type(element) is type([]):
+            element = element[0]
+        else:
+            value = [value]
+
+        if type(element) is type((0,)):
+            w = len(element)
+
+        return (prop, typeName, len(value), w, value)
+
+    def _iterPropertyObjects(self, objName, objType, properties):
+        """
+        Yield (name, protocol, version, components) for a node object
+        and the sub-objects its properties require, in file order.
+        components is a list of (name, [propertyRecord, ...]).  Only one
+        node's objects are ever held in memory at a time.
+        """
+        objects = [(objName, objType, {})]
+        subObjects = {"": objects[0]}
+
+        for path, info in sorted(properties.items()):
+            (subObjType, subObject, container, prop) = path
+            (typeName, value) = info
+
+            if subObject not in subObjects:
+                subObjects[subObject] = ("%s_%s" % (objName, subObject), subObjType, {})
+                objects.append(subObjects[subObject])
+
+            containers = subObjects[subObject][2]
+            containers.setdefault(container, []).append(self._propertyRecord(prop, typeName, value))
+
+        for name, protocol, containers in objects:
+            yield (name, protocol, nodeVersions.get(protocol, 1), list(containers.items()))
+
+    def _iterConnections(self):
+        cons = []
+        for node in self.nodes.values():
+            for input in node.inputs:
+                cons.append([six.ensure_binary(input), six.ensure_binary(node.name)])
+
+        if len(cons) != 0:
+            yield (
+                "connections",
+                "connection",
+                nodeVersions.get("connection", 1),
+                [("evaluation", [("connections", gto.STRING, len(cons), 2, cons)])],
+            )
+
+    def _iterOwners(self):
+        """
+        Yield (key, owner, objects) in file order: the RVSession node,
+        the connections (owner None), the output group and every node.
+        objects is a generator of the owner's objects, so owners that are
+        not walked cost nothing.
+        """
+        yield ("rv", self, self._iterPropertyObjects("rv", "RVSession", self.properties))
+        yield ("connections", None, self._iterConnections())
+        yield (
+            "defaultOutputGroup",
+            self.outputGroup,
+            self._iterPropertyObjects("defaultOutputGroup", "RVOutputGroup", self.outputGroup.properties),
+        )
+
+        for name in sorted(self.nodes.keys()):
+            node = self.nodes[name]
+            objType = Session.lookupNodeType(node.typeName)[0]
+            yield (node.name, node, self._iterPropertyObjects(node.name, objType, node.properties))
+
+    def _iterObjects(self):
+        """
+        Yield every object of the session file in the order
+        toContainer() creates them.
+        """
+        for key, owner, objects in self._iterOwners():
+            for obj in objects:
+                yield obj
+
+    def _writeObjects(self, filename, iterObjects):
+        """
+        Stream the objects produced by iterObjects() to a text GTO file.
+        GTO needs the complete header before any data, so the objects
+        are walked twice, once for the header and once for the data.
+        """
+        writer = gto.Writer()
+        writer.open(filename, 2)  # 0: Binary 1: Compressed 2: Text
+
+        for objName, protocol, version, components in iterObjects():
+            writer.beginObject(objName, protocol, version)
+            for compName, props in components:
+                writer.beginComponent(compName, "compinterp", 0)
+                for propName, propType, size, width, data in props:
+                    if propType == gto.STRING:
+                        writer.intern(data)
+                    writer.property(propName, propType, size, width)
+                writer.endComponent()
+            writer.endObject()
+
+        writer.beginData()
+        for objName, protocol, version, components in iterObjects():
+            for compName, props in components:
+                for propName, propType, size, width, data in props:
+                    writer.propertyData(data)
+        writer.endData()
+        writer.close()
+
+    def write(self, filename, incremental=False):
+        """
+        Write all nodes and connections to a file.  Filename must
+        end in ".rv"
+
+        The session is streamed to the file without building a
+        gtoContainer first.
+
+        If incremental is True, the text of every object is kept after
+        the write, and the next incremental write only serializes the
+        objects changed since (through setProperty(), addInput() or
+        markDirty()), splicing in the kept text for everything else.
+        The file is identical to a full write.
+        """
+        if not incremental:
+            self._writeObjects(filename, self._iterObjects)
+            return
+
+        (header, cache) = self._serialized or (None, {})
+
+        #
+        #   Work out what needs serializing: whole owners that are new
+        #   or were replaced, and the touched objects of the others.
+        #
+
+        nodeNames = list(self.nodes.keys())
+        entries = []
+        dirty = []
+        for key, owner, objects in self._iterOwners():
+            cached = cache.get(key)
+            if owner is None:
+                # The connections object depends on the inputs of every node.
+                dirtyInputs = any(node.dirtyInputs for node in self.nodes.values())
+                valid = cached is not None and cached[0] == nodeNames and not dirtyInputs
+                (owner, touched) = (nodeNames, set())
+            else:
+                valid = cached is not None and cached[0] is owner and owner.dirtyObjects is not None
+                touched = owner.dirtyObjects
+
+            if valid and not touched:
+                entries.append((key, cached))
+                continue
+
+            kept = cached[1] if valid else {}
+            names = set(key if o == "" else "%s_%s" % (key, o) for o in touched) if valid else None
+            texts = {}
+            for obj in objects:
+                if names is None or obj[0] in names or obj[0] not in kept:
+                    dirty.append(obj)
+                    texts[obj[0]] = None
+                else:
+                    texts[obj[0]] = kept[obj[0]]
+            entries.append((key, (owner, texts)))
+
+        #   The text writer skips objects without properties, so they
+        #   have no text of their own.
+        objects = [obj for obj in dirty if any(props for compName, props in obj[3])]
+        if objects:
+            (header, fresh) = self._serializeObjects(objects)
+            for key, (owner, texts) in entries:
+                for name in texts:
+                    if name in fresh:
+                        texts[name] = fresh[name]
+
+        chunks = []
+        for key, (owner, texts) in entries:
+            chunks.extend(text for text in texts.values() if text is not None)
+
+        with open(filename, "wb") as f:
+            f.write(header)
+            f.write(b"\n".join(chunks))
+
+        self._serialized = (header, dict(entries))
+        self.dirtyObjects = set()
+        self.outputGroup.dirtyObjects = set()
+        for node in self.nodes.values():
+            node.dirtyObjects = set()
+            node.dirtyInputs = False
+
+    def _serializeObjects(self, objects):
+        """
+        Write objects to a scratch text GTO file and return its header
+        and {objName: text} for each object, as it appears in the file.
+        Objects without properties must not be passed in; the text
+        writer does not emit them.
+        """
+        (fd, path) = tempfile.mkstemp(suffix=".rv")
+        os.close(fd)
+        try:
+            self._writeObjects(path, lambda: iter(objects))
+            with open(path, "rb") as f:
+                data = f.read()
+        finally:
+            os.remove(path)
+
+        #   The text writer opens with "GTOa (<version>)" and a blank
+        #   line, then ends each object with an unindented "}" line; the
+        #   objects are separated by one blank line.  Strings are always
+        #   escaped, so this pattern cannot occur inside a value.
+        end = data.index(b"\n\n") + 2
+        texts = data[end:].split(b"\n}\n\n")
+        texts = [text + b"\n}\n" for text in texts[:-1]] + texts[-1:]
+        if len(texts) != len(objects):
+            raise Exception("ERROR: can't split serialized session (%d objects, %d found)" % (len(objects), len(texts)))
+
+        return (data[:end], dict((obj[0], text) for obj, text in zip(objects, texts)))
 
     #
     #   Output Property Utility Functions
@@ -1,11 +1,19 @@
 # Copyright (c) 2025 Autodesk, Inc. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+import contextlib
 import math
 import os
+import time
 import uuid
 
-from rv import commands
+from network.rvNetwork import muString
+from rv import commands, runtime
+
+try:
+    from PySide2 import QtCore
+except ImportError:
+    from PySide6 import QtCore
 
 from annotate_beta_widget import (
     TOOL_PEN,
@@ -41,6 +49,16 @@ _PEN_SLIDER_MAX = 100
 
 _SIZE_MIN = 0.001
 
+# Pen drag input pipeline. Pointer-move events are decimated in device pixels
+# (a point is dropped when it is nearer than _PEN_MIN_DISTANCE to the last kept
+# point, or lies within _PEN_TOLERANCE of the line through its neighbours with
+# a width within _PEN_WIDTH_TOLERANCE of the interpolated one) and the kept
+# points are written to the stroke at most once per _PEN_FLUSH_INTERVAL.
+_PEN_MIN_DISTANCE = 1.0
+_PEN_TOLERANCE = 0.5
+_PEN_WIDTH_TOLERANCE = 0.02  # fraction of the stroke's base width
+_PEN_FLUSH_INTERVAL = 1.0 / 60.0
+
 # Base WCS fractions for each font size tier (desired px at zoom=1 / 1080).
 # Multiplied by _screen_scale() at draw time — identical to how stroke
 # border_width uses _SIZE_SCALE * _screen_scale(). This gives:
@@ -74,6 +92,36 @@ _SHIFT_MAP = {
 }
 
 
+_MU_ARRAY_TYPES = {
+    commands.FloatType: "float",
+    commands.IntType: "int",
+    commands.StringType: "string",
+}
+
+
+def _mu_array(ptype, values):
+    """Format values as a Mu array literal of the given RV property type."""
+    if ptype == commands.FloatType:
+        items = []
+        for v in values:
+            v = float(v)
+            if not math.isfinite(v):
+                raise ValueError(f"non-finite float {v} has no Mu literal")
+            items.append(repr(v))
+    elif ptype == commands.IntType:
+        items = [str(int(v)) for v in values]
+    else:
+        items = [muString(v) for v in values]
+    return f"{_MU_ARRAY_TYPES[ptype]}[] {{{', '.join(items)}}}"
+
+
+_SETTERS = {
+    commands.FloatType: ("setFloatProperty", commands.setFloatProperty),
+    commands.IntType: ("setIntProperty", commands.setIntProperty),
+    commands.StringType: ("setStringProperty", commands.setStringProperty),
+}
+
+
 class AnnotateDrawEngine:
     def __init__(self, mode):
         self._mode = mode
@@ -102,6 +150,10 @@ class AnnotateDrawEngine:
         self._pen_paint_node = None
         self._pen_frame = None
         self._pen_stroke_width = 0.0  # constant width for the active stroke, used per-drag insert
+        self._pen_input = None  # _PenDecimator buffering the active stroke's drag points
+        self._pen_dpr = 1.0
+        self._pen_last_flush = 0.0
+        self._pen_flush_timer = None
         # True while the physical eraser end of a Wacom stylus is in use; forces erase
         # mode regardless of the selected tool.
         self._stylus_erasing = False
@@ -116,10 +168,53 @@ class AnnotateDrawEngine:
         self._undo_stack = []  # list of (paint_node, frame, node_name)
         self._redo_stack = []
 
+        # Per paint node, the full names of properties known to exist, so
+        # _ensure_property() doesn't have to ask RV again. Properties are
+        # never deleted here; the entry for a node is dropped if writing to
+        # it fails (e.g. the node was deleted and re-created).
+        self._known_props = {}
+        self._host_tag = None
+
+        # frame -> draw order -> softDeleted/uuid for every RVPaint node,
+        # used by clear/undo/redo instead of rescanning the node's properties.
+        self._index = _AnnotationIndex()
+
     # ------------------------------------------------------------------
     # Event table setup
     # ------------------------------------------------------------------
 
+    @property
+    def graph_bindings(self):
+        """Global bindings that keep the annotation index in sync with the graph."""
+        return [
+            ("graph-state-change", self._on_graph_property_change, "Track annotation changes"),
+            ("graph-state-change-insert", self._on_graph_property_insert, "Track annotation changes"),
+            ("graph-new-property", self._on_graph_new_property, "Track annotation changes"),
+            ("graph-after-delete-node", self._on_graph_node_deleted, "Track annotation changes"),
+        ]
+
+    def reset_annotation_index(self):
+        """Forget the annotation index; it's rebuilt on demand."""
+        self._index.clear()
+
+    def _on_graph_property_change(self, event):
+        self._index.property_changed(event.contents())
+        event.reject()
+
+    def _on_graph_property_insert(self, event):
+        # contents: "node.component.property;index;size"
+        self._index.property_changed(event.contents().split(";", 1)[0])
+        event.reject()
+
+    def _on_graph_new_property(self, event):
+        # contents: "layout;sizes;node.component.property"
+        self._index.property_changed(event.contents().rsplit(";", 1)[-1])
+        event.reject()
+
+    def _on_graph_node_deleted(self, event):
+        self._index.forget(event.contents())
+        event.reject()
+
     def setup_event_table(self, mode):
         mode.defineEventTable(TABLE_NAME, self.bindings)
         mode.defineEventTableRegex(TABLE_NAME, self.regex_bindings)
@@ -286,10 +381,86 @@ class AnnotateDrawEngine:
         except Exception:
             return None, None
 
+    # ------------------------------------------------------------------
+    # Paint property helpers
+    # ------------------------------------------------------------------
+
+    def _ensure_property(self, paint_node, prop, ptype, w):
+        """Create prop if it doesn't exist yet, asking RV only the first time."""
+        known = self._known_props.setdefault(paint_node, set())
+        if prop in known:
+            return False
+        created = not commands.propertyExists(prop)
+        if created:
+            commands.newProperty(prop, ptype, w)
+        known.add(prop)
+        return created
+
+    def _forget_properties(self, paint_node):
+        self._known_props.pop(paint_node, None)
+
+    def _create_component(self, paint_node, component, props):
+        """Create and set all properties of a paint component in one go.
+
+        props maps property name to (type, width, values); the properties
+        are created first, then set in the dict's order (which matters:
+        setting .points is what announces a new stroke to LiveReview).
+        Everything runs as a single Mu evaluation instead of a propertyExists,
+        newProperty and set*Property round trip per property.
+        """
+        try:
+            lines = []
+            for name, (ptype, w, values) in props.items():
+                prop = muString(f"{component}.{name}")
+                lines.append(f"if (!commands.propertyExists({prop})) {{ commands.newProperty({prop}, {ptype}, {w}); }}")
+            for name, (ptype, w, values) in props.items():
+                prop = muString(f"{component}.{name}")
+                lines.append(f"commands.{_SETTERS[ptype][0]}({prop}, {_mu_array(ptype, values)}, true);")
+            runtime.eval("{\n%s\n}" % "\n".join(lines), ["commands"])
+        except Exception as e:
+            # Fall back to one call per property, which reports the exact failure.
+            print(f"[annotate_beta] batched property write failed, retrying per property: {e}")
+            self._forget_properties(paint_node)
+            for name, (ptype, w, values) in props.items():
+                prop = f"{component}.{name}"
+                if not commands.propertyExists(prop):
+                    commands.newProperty(prop, ptype, w)
+            for name, (ptype, w, values) in props.items():
+                _SETTERS[ptype][1](f"{component}.{name}", list(values), True)
+
+        self._known_props.setdefault(paint_node, set()).update(f"{component}.{name}" for name in props)
+
+    def _set_properties(self, values):
+        """Set existing properties in one Mu evaluation.
+
+        values maps full property name to (type, values) and is written in
+        order. Falls back to one call per property, skipping those that fail.
+        """
+        if not values:
+            return
+        try:
+            lines = [
+                f"commands.{_SETTERS[ptype][0]}({muString(prop)}, {_mu_array(ptype, vals)}, true);"
+                for prop, (ptype, vals) in values.items()
+            ]
+            runtime.eval("{\n%s\n}" % "\n".join(lines), ["commands"])
+        except Exception as e:
+            print(f"[annotate_beta] batched property write failed, retrying per property: {e}")
+            for prop, (ptype, vals) in values.items():
+                try:
+                    _SETTERS[ptype][1](prop, list(vals), True)
+                except Exception:
+                    pass
+            self._index.clear()
+
+    def _host_and_pid(self):
+        if self._host_tag is None:
+            self._host_tag = f"{commands.myNetworkHost().replace('.', '_')}_{os.getpid()}"
+        return self._host_tag
+
     def _next_id(self, paint_node):
         prop = f"{paint_node}.paint.nextId"
-        if not commands.propertyExists(prop):
-            commands.newProperty(prop, commands.IntType, 1)
+        if self._ensure_property(paint_node, prop, commands.IntType, 1):
             commands.setIntProperty(prop, [0])
         i = commands.getIntProperty(prop)[0] + 1
         commands.setIntProperty(prop, [i])
@@ -297,33 +468,23 @@ class AnnotateDrawEngine:
 
     def _ensure_visible(self, paint_node):
         prop = f"{paint_node}.paint.show"
-        if not commands.propertyExists(prop):
-            commands.newProperty(prop, commands.IntType, 1)
+        self._ensure_property(paint_node, prop, commands.IntType, 1)
         commands.setIntProperty(prop, [1], True)
 
     def _unique_name(self, paint_node, prefix, frame):
         node_id = self._next_id(paint_node)
-        host = commands.myNetworkHost().replace(".", "_")
-        pid = os.getpid()
-        return f"{paint_node}.{prefix}:{node_id}:{frame}:{host}_{pid}"
+        return f"{paint_node}.{prefix}:{node_id}:{frame}:{self._host_and_pid()}"
 
     def _frame_order_and_undo(self, paint_node, frame, node_name, shape_uuid):
         """Insert the component into the frame draw order and undo stack."""
-
-        def _ensure(prop, ptype, w):
-            if not commands.propertyExists(prop):
-                commands.newProperty(prop, ptype, w)
-
         component = node_name.split(".")[-1]
         order_prop = f"{paint_node}.frame:{frame}.order"
-        _ensure(order_prop, commands.StringType, 1)
+        self._ensure_property(paint_node, order_prop, commands.StringType, 1)
         if component not in commands.getStringProperty(order_prop):
             commands.insertStringProperty(order_prop, [component])
 
-        host = commands.myNetworkHost().replace(".", "_")
-        pid = os.getpid()
-        undo_prop = f"{paint_node}.frame:{frame}.userUndoStack:{host}_{pid}"
-        _ensure(undo_prop, commands.StringType, 1)
+        undo_prop = f"{paint_node}.frame:{frame}.userUndoStack:{self._host_and_pid()}"
+        self._ensure_property(paint_node, undo_prop, commands.StringType, 1)
         commands.insertStringProperty(undo_prop, [shape_uuid, "create"])
 
         if getattr(self._mode, "_auto_mark", False):
@@ -337,7 +498,16 @@ class AnnotateDrawEngine:
     # ------------------------------------------------------------------
 
     def _pointer_location(self, event):
-        """Return (image_name, _Vec2) in image space, or ("", None).
+        """Return (image_name, _Vec2) in image space for event's pointer, or ("", None)."""
+        try:
+            raw = event.pointer()
+        except Exception as e:
+            print(f"[annotate_beta] _pointer_location error: {e}")
+            return "", None
+        return self._pixel_location(raw)
+
+    def _pixel_location(self, raw, dpr=None):
+        """Return (image_name, _Vec2) in image space for a raw pointer position, or ("", None).
 
         imagesAtPixel returns nodes outermost→innermost (sorted by imageNum descending):
           [displayGroup_colorPipeline, defaultSequence_sequence, sourceGroup_source]
@@ -349,8 +519,8 @@ class AnnotateDrawEngine:
         source name is not valid for eventToImageSpace.
         """
         try:
-            raw = event.pointer()
-            dpr = commands.devicePixelRatio()
+            if dpr is None:
+                dpr = commands.devicePixelRatio()
             ip = (raw[0] * dpr, raw[1] * dpr)
 
             pinfos = commands.imagesAtPixel(raw)
@@ -371,7 +541,7 @@ class AnnotateDrawEngine:
         except Exception as e:
             import traceback
 
-            print(f"[annotate_beta] _pointer_location error: {e}")
+            print(f"[annotate_beta] _pixel_location error: {e}")
             traceback.print_exc()
             return "", None
 
@@ -387,46 +557,34 @@ class AnnotateDrawEngine:
             border, inner = self._colors()
             shape_uuid = str(uuid.uuid4())
 
-            def _ensure(prop, ptype, w):
-                if not commands.propertyExists(prop):
-                    commands.newProperty(prop, ptype, w)
-
-            _ensure(f"{n}.startFrame", commands.IntType, 1)
-            _ensure(f"{n}.duration", commands.IntType, 1)
-            _ensure(f"{n}.eye", commands.IntType, 1)
-            commands.setIntProperty(f"{n}.startFrame", [frame], True)
-            commands.setIntProperty(f"{n}.duration", [1], True)
-            commands.setIntProperty(f"{n}.eye", [2], True)
+            props = {
+                "startFrame": (commands.IntType, 1, [frame]),
+                "duration": (commands.IntType, 1, [1]),
+                "eye": (commands.IntType, 1, [2]),
+            }
 
             if prefix in ("rect", "ellipse"):
-                for prop, w in ((".min", 2), (".max", 2), (".innerColor", 4), (".borderColor", 4), (".borderWidth", 1)):
-                    _ensure(f"{n}{prop}", commands.FloatType, w)
                 min_x = min(anchor.x, cur.x)
                 min_y = min(anchor.y, cur.y)
                 max_x = max(anchor.x, cur.x)
                 max_y = max(anchor.y, cur.y)
-                commands.setFloatProperty(f"{n}.min", [min_x, min_y], True)
-                commands.setFloatProperty(f"{n}.max", [max_x, max_y], True)
-                commands.setFloatProperty(f"{n}.innerColor", inner, True)
-                commands.setFloatProperty(f"{n}.borderColor", border, True)
-                commands.setFloatProperty(f"{n}.borderWidth", [bw], True)
+                props["min"] = (commands.FloatType, 2, [min_x, min_y])
+                props["max"] = (commands.FloatType, 2, [max_x, max_y])
+                props["innerColor"] = (commands.FloatType, 4, inner)
+                props["borderColor"] = (commands.FloatType, 4, border)
+                props["borderWidth"] = (commands.FloatType, 1, [bw])
             else:
-                for prop, w in ((".startPos", 2), (".endPos", 2), (".borderColor", 4), (".borderWidth", 1)):
-                    _ensure(f"{n}{prop}", commands.FloatType, w)
-                commands.setFloatProperty(f"{n}.startPos", [anchor.x, anchor.y], True)
-                commands.setFloatProperty(f"{n}.endPos", [cur.x, cur.y], True)
-                commands.setFloatProperty(f"{n}.borderColor", border, True)
-                commands.setFloatProperty(f"{n}.borderWidth", [bw], True)
+                props["startPos"] = (commands.FloatType, 2, [anchor.x, anchor.y])
+                props["endPos"] = (commands.FloatType, 2, [cur.x, cur.y])
+                props["borderColor"] = (commands.FloatType, 4, border)
+                props["borderWidth"] = (commands.FloatType, 1, [bw])
                 if prefix == "arrow":
-                    _ensure(f"{n}.innerColor", commands.FloatType, 4)
-                    _ensure(f"{n}.thickness", commands.FloatType, 1)
-                    commands.setFloatProperty(f"{n}.innerColor", inner, True)
-                    commands.setFloatProperty(f"{n}.thickness", [bw], True)
+                    props["innerColor"] = (commands.FloatType, 4, inner)
+                    props["thickness"] = (commands.FloatType, 1, [bw])
 
-            _ensure(f"{n}.uuid", commands.StringType, 1)
-            _ensure(f"{n}.softDeleted", commands.IntType, 1)
-            commands.setStringProperty(f"{n}.uuid", [shape_uuid], True)
-            commands.setIntProperty(f"{n}.softDeleted", [0], True)
+            props["uuid"] = (commands.StringType, 1, [shape_uuid])
+            props["softDeleted"] = (commands.IntType, 1, [0])
+            self._create_component(paint_node, n, props)
 
             self._frame_order_and_undo(paint_node, frame, n, shape_uuid)
 
@@ -437,6 +595,7 @@ class AnnotateDrawEngine:
 
             print(f"[annotate_beta] _new_shape error: {e}")
             traceback.print_exc()
+            self._forget_properties(paint_node)
             return None
 
     def _update_shape(self, shape_node, prefix, anchor, cur):
@@ -472,62 +631,33 @@ class AnnotateDrawEngine:
             font_style = "italic" if self._mode._font_italic else "normal"
             text_deco = "underline" if self._mode._font_underline else "none"
 
-            def _ensure(prop, ptype, w):
-                if not commands.propertyExists(prop):
-                    commands.newProperty(prop, ptype, w)
-
-            for prop, ptype, w in (
-                (".position", commands.FloatType, 2),
-                (".color", commands.FloatType, 4),
-                (".size", commands.FloatType, 1),
-                (".scale", commands.FloatType, 1),
-                (".rotation", commands.FloatType, 1),
-                (".spacing", commands.FloatType, 1),
-                (".font", commands.StringType, 1),
-                (".text", commands.StringType, 1),
-                (".origin", commands.StringType, 1),
-                (".debug", commands.IntType, 1),
-                (".startFrame", commands.IntType, 1),
-                (".duration", commands.IntType, 1),
-                (".mode", commands.IntType, 1),
-            ):
-                _ensure(f"{n}{prop}", ptype, w)
-
-            commands.setFloatProperty(f"{n}.position", [pos.x, pos.y], True)
-            commands.setFloatProperty(f"{n}.color", color, True)
-            commands.setFloatProperty(f"{n}.size", [0.01], True)
-            commands.setFloatProperty(f"{n}.scale", [1.0], True)
-            commands.setFloatProperty(f"{n}.rotation", [0.0], True)
-            commands.setFloatProperty(f"{n}.spacing", [0.8], True)
-            commands.setStringProperty(f"{n}.font", [""], True)
-            commands.setStringProperty(f"{n}.text", ["|"], True)
-            commands.setStringProperty(f"{n}.origin", [""], True)
-            commands.setIntProperty(f"{n}.debug", [0], True)
-            commands.setIntProperty(f"{n}.startFrame", [frame], True)
-            commands.setIntProperty(f"{n}.duration", [1], True)
-            commands.setIntProperty(f"{n}.mode", [0], True)
-
-            for prop, ptype, w in (
-                (".fontFamily", commands.StringType, 1),
-                (".fontSize", commands.FloatType, 1),
-                (".fontWeight", commands.StringType, 1),
-                (".fontStyle", commands.StringType, 1),
-                (".textDecoration", commands.StringType, 1),
-                (".textAlign", commands.StringType, 1),
-            ):
-                _ensure(f"{n}{prop}", ptype, w)
-
-            commands.setStringProperty(f"{n}.fontFamily", [self._mode._font_family], True)
-            commands.setFloatProperty(f"{n}.fontSize", [font_size], True)
-            commands.setStringProperty(f"{n}.fontWeight", [font_weight], True)
-            commands.setStringProperty(f"{n}.fontStyle", [font_style], True)
-            commands.setStringProperty(f"{n}.textDecoration", [text_deco], True)
-            commands.setStringProperty(f"{n}.textAlign", ["left"], True)
-
-            _ensure(f"{n}.uuid", commands.StringType, 1)
-            _ensure(f"{n}.softDeleted", commands.IntType, 1)
-            commands.setStringProperty(f"{n}.uuid", [shape_uuid], True)
-            commands.setIntProperty(f"{n}.softDeleted", [0], True)
+            self._create_component(
+                paint_node,
+                n,
+                {
+                    "position": (commands.FloatType, 2, [pos.x, pos.y]),
+                    "color": (commands.FloatType, 4, color),
+                    "size": (commands.FloatType, 1, [0.01]),
+                    "scale": (commands.FloatType, 1, [1.0]),
+                    "rotation": (commands.FloatType, 1, [0.0]),
+                    "spacing": (commands.FloatType, 1, [0.8]),
+                    "font": (commands.StringType, 1, [""]),
+                    "text": (commands.StringType, 1, ["|"]),
+                    "origin": (commands.StringType, 1, [""]),
+                    "debug": (commands.IntType, 1, [0]),
+                    "startFrame": (commands.IntType, 1, [frame]),
+                    "duration": (commands.IntType, 1, [1]),
+                    "mode": (commands.IntType, 1, [0]),
+                    "fontFamily": (commands.StringType, 1, [self._mode._font_family]),
+                    "fontSize": (commands.FloatType, 1, [font_size]),
+                    "fontWeight": (commands.StringType, 1, [font_weight]),
+                    "fontStyle": (commands.StringType, 1, [font_style]),
+                    "textDecoration": (commands.StringType, 1, [text_deco]),
+                    "textAlign": (commands.StringType, 1, ["left"]),
+                    "uuid": (commands.StringType, 1, [shape_uuid]),
+                    "softDeleted": (commands.IntType, 1, [0]),
+                },
+            )
 
             self._frame_order_and_undo(paint_node, frame, n, shape_uuid)
             commands.redraw()
@@ -538,6 +668,7 @@ class AnnotateDrawEngine:
 
             print(f"[annotate_beta] _new_text_node error: {e}")
             traceback.print_exc()
+            self._forget_properties(paint_node)
             self._end_sync()
             return None
 
@@ -580,8 +711,7 @@ class AnnotateDrawEngine:
     def _cancel_text(self):
         if self._text_node:
             try:
-                self._remove_from_order(self._text_paint_node, self._text_frame, self._text_node)
-                commands.setIntProperty(f"{self._text_node}.softDeleted", [1], True)
+                self._set_deleted(self._text_paint_node, self._text_frame, self._text_node, True)
                 commands.redraw()
             except Exception:
                 pass
@@ -630,34 +760,6 @@ class AnnotateDrawEngine:
             self._pen_stroke_width = width
             push_width = first_point_width if first_point_width is not None else width
 
-            def _ensure(prop, ptype, w):
-                if not commands.propertyExists(prop):
-                    commands.newProperty(prop, ptype, w)
-
-            for prop, ptype, w in (
-                (".color", commands.FloatType, 4),
-                (".width", commands.FloatType, 1),
-                (".brush", commands.StringType, 1),
-                (".uuid", commands.StringType, 1),
-                (".points", commands.FloatType, 2),
-                (".join", commands.IntType, 1),
-                (".cap", commands.IntType, 1),
-                (".splat", commands.IntType, 1),
-                (".mode", commands.IntType, 1),
-                (".debug", commands.IntType, 1),
-                (".smoothingWidth", commands.FloatType, 1),
-                (".startFrame", commands.IntType, 1),
-                (".duration", commands.IntType, 1),
-                # Stamp-brush properties (only take effect for brush names other than
-                # "circle"/"gauss" — see PaintIPNode::compilePenComponent). Not yet
-                # exposed in this UI; written here so future sliders/pickers have a
-                # ready-made property to set.
-                (".hardness", commands.FloatType, 1),
-                (".tipTexture", commands.StringType, 1),
-                (".blendMode", commands.IntType, 1),
-            ):
-                _ensure(f"{n}{prop}", ptype, w)
-
             # mode: 0=OverMode, 1=EraseMode, 2=ScaleMode (burn/dodge use ScaleMode)
             if erase_mode:
                 stroke_mode = 1
@@ -669,24 +771,33 @@ class AnnotateDrawEngine:
             # All properties read by _get_paint_start must be written before .points,
             # because setting .points fires graph-state-change which immediately tries
             # to build the PAINT_START payload for the LiveReview package.
-            _ensure(f"{n}.softDeleted", commands.IntType, 1)
-            commands.setFloatProperty(f"{n}.color", color, True)
-            commands.setFloatProperty(f"{n}.width", [push_width], True)
-            commands.setStringProperty(f"{n}.brush", [brush], True)
-            commands.setIntProperty(f"{n}.mode", [stroke_mode], True)
-            commands.setIntProperty(f"{n}.startFrame", [frame], True)
-            commands.setIntProperty(f"{n}.duration", [1], True)
-            commands.setStringProperty(f"{n}.uuid", [stroke_uuid], True)
-            commands.setIntProperty(f"{n}.softDeleted", [0], True)
-            commands.setFloatProperty(f"{n}.points", [first_point.x, first_point.y], True)
-            commands.setIntProperty(f"{n}.join", [1], True)  # RoundJoin
-            commands.setIntProperty(f"{n}.cap", [2], True)  # RoundCap
-            commands.setIntProperty(f"{n}.splat", [1 if brush == "gauss" else 0], True)
-            commands.setIntProperty(f"{n}.debug", [0], True)
-            commands.setFloatProperty(f"{n}.smoothingWidth", [1.0], True)
-            commands.setFloatProperty(f"{n}.hardness", [100.0], True)
-            commands.setStringProperty(f"{n}.tipTexture", [""], True)
-            commands.setIntProperty(f"{n}.blendMode", [2 if blend_mode == "additive" else 0], True)
+            self._create_component(
+                paint_node,
+                n,
+                {
+                    "color": (commands.FloatType, 4, color),
+                    "width": (commands.FloatType, 1, [push_width]),
+                    "brush": (commands.StringType, 1, [brush]),
+                    "mode": (commands.IntType, 1, [stroke_mode]),
+                    "startFrame": (commands.IntType, 1, [frame]),
+                    "duration": (commands.IntType, 1, [1]),
+                    "uuid": (commands.StringType, 1, [stroke_uuid]),
+                    "softDeleted": (commands.IntType, 1, [0]),
+                    "points": (commands.FloatType, 2, [first_point.x, first_point.y]),
+                    "join": (commands.IntType, 1, [1]),  # RoundJoin
+                    "cap": (commands.IntType, 1, [2]),  # RoundCap
+                    "splat": (commands.IntType, 1, [1 if brush == "gauss" else 0]),
+                    "debug": (commands.IntType, 1, [0]),
+                    "smoothingWidth": (commands.FloatType, 1, [1.0]),
+                    # Stamp-brush properties (only take effect for brush names other than
+                    # "circle"/"gauss" — see PaintIPNode::compilePenComponent). Not yet
+                    # exposed in this UI; written here so future sliders/pickers have a
+                    # ready-made property to set.
+                    "hardness": (commands.FloatType, 1, [100.0]),
+                    "tipTexture": (commands.StringType, 1, [""]),
+                    "blendMode": (commands.IntType, 1, [2 if blend_mode == "additive" else 0]),
+                },
+            )
 
             self._frame_order_and_undo(paint_node, frame, n, stroke_uuid)
             commands.redraw()
@@ -696,6 +807,7 @@ class AnnotateDrawEngine:
 
             print(f"[annotate_beta] _new_stroke error: {e}")
             _tb.print_exc()
+            self._forget_properties(paint_node)
             return None
 
     def _pen_push(self, event):
@@ -730,11 +842,19 @@ class AnnotateDrawEngine:
                 brush = getattr(self._mode, "_eraser_brush", "circle")
             else:
                 brush = "circle"
-        stroke = self._new_stroke(paint_node, frame, pei, brush, erase, self._pressure_width(event))
+        first_width = self._pressure_width(event)
+        stroke = self._new_stroke(paint_node, frame, pei, brush, erase, first_width)
         if stroke:
             self._pen_stroke = stroke
             self._pen_paint_node = paint_node
             self._pen_frame = frame
+            raw = event.pointer()
+            self._pen_dpr = commands.devicePixelRatio()
+            self._pen_input = _PenDecimator(
+                _PEN_MIN_DISTANCE, _PEN_TOLERANCE, _PEN_WIDTH_TOLERANCE * self._pen_stroke_width
+            )
+            self._pen_input.reset(raw[0] * self._pen_dpr, raw[1] * self._pen_dpr, first_width)
+            self._pen_last_flush = time.monotonic()
             commands.sendInternalEvent("set-current-annotate-mode-node", paint_node)
             # sync accumulation is still open — will be flushed at _pen_release
         else:
@@ -743,29 +863,64 @@ class AnnotateDrawEngine:
     def _pen_drag(self, event):
         if not self._pen_stroke:
             return
-        name, pei = self._pointer_location(event)
-        if not name:
+        try:
+            raw = event.pointer()
+            dpr = self._pen_dpr
+            self._pen_input.add(raw[0] * dpr, raw[1] * dpr, self._pressure_width(event), raw)
+        except Exception as e:
+            print(f"[annotate_beta] _pen_drag error: {e}")
+            return
+        remaining = _PEN_FLUSH_INTERVAL - (time.monotonic() - self._pen_last_flush)
+        if remaining <= 0.0:
+            self._flush_pen()
+        else:
+            # Make sure the tip catches up even if the pen stops moving.
+            self._schedule_pen_flush(remaining)
+
+    def _schedule_pen_flush(self, delay):
+        if self._pen_flush_timer is None:
+            self._pen_flush_timer = QtCore.QTimer()
+            self._pen_flush_timer.setSingleShot(True)
+            self._pen_flush_timer.timeout.connect(self._flush_pen)
+        if not self._pen_flush_timer.isActive():
+            self._pen_flush_timer.start(max(1, int(math.ceil(delay * 1000.0))))
+
+    def _flush_pen(self):
+        """Write the buffered drag points of the active stroke and redraw once."""
+        self._pen_last_flush = time.monotonic()
+        if self._pen_flush_timer is not None:
+            self._pen_flush_timer.stop()
+        if not self._pen_stroke or self._pen_input is None:
+            return
+        points = []
+        widths = []
+        for _x, _y, width, raw in self._pen_input.drain():
+            name, pei = self._pixel_location(raw, self._pen_dpr)
+            if name:
+                points += (pei.x, pei.y)
+                widths.append(width)
+        if not widths:
             return
         try:
-            commands.insertFloatProperty(f"{self._pen_stroke}.points", [pei.x, pei.y])
-            commands.insertFloatProperty(f"{self._pen_stroke}.width", [self._pressure_width(event)])
+            commands.insertFloatProperty(f"{self._pen_stroke}.points", points)
+            commands.insertFloatProperty(f"{self._pen_stroke}.width", widths)
             commands.redraw()
             if not getattr(self._mode, "_sync_whole_strokes", True):
                 self._end_sync(force=True)
                 self._begin_sync()
         except Exception as e:
-            print(f"[annotate_beta] _pen_drag error: {e}")
+            print(f"[annotate_beta] _flush_pen error: {e}")
 
     def _pen_release(self, event):
         if not self._pen_stroke:
             return
-        name, pei = self._pointer_location(event)
-        if name and pei:
-            try:
-                commands.insertFloatProperty(f"{self._pen_stroke}.points", [pei.x, pei.y])
-                commands.insertFloatProperty(f"{self._pen_stroke}.width", [self._pressure_width(event)])
-            except Exception:
-                pass
+        try:
+            raw = event.pointer()
+            dpr = self._pen_dpr
+            self._pen_input.add(raw[0] * dpr, raw[1] * dpr, self._pressure_width(event), raw)
+        except Exception:
+            pass
+        self._flush_pen()
         # Commit to undo stack now that stroke is complete
         self._undo_stack.append((self._pen_paint_node, self._pen_frame, self._pen_stroke))
         self._redo_stack.clear()
@@ -774,6 +929,7 @@ class AnnotateDrawEngine:
         self._pen_stroke = None
         self._pen_paint_node = None
         self._pen_frame = None
+        self._pen_input = None
         commands.redraw()
         # End the whole-stroke accumulation started in _pen_push and flush to network.
         self._end_sync(force=True)
@@ -1078,30 +1234,25 @@ class AnnotateDrawEngine:
         """
         return node_name.split(".", 1)[1] if "." in node_name else node_name
 
-    def _remove_from_order(self, paint_node, frame, node_name):
-        """Remove a component from the frame draw-order list."""
-        if not paint_node:
-            return
-        order_prop = f"{paint_node}.frame:{frame}.order"
-        if not commands.propertyExists(order_prop):
-            return
-        comp = self._component_name(node_name)
-        current = list(commands.getStringProperty(order_prop))
-        if comp in current:
-            current.remove(comp)
-            commands.setStringProperty(order_prop, current, True)
-
-    def _restore_to_order(self, paint_node, frame, node_name):
-        """Re-append a component to the frame draw-order list."""
-        if not paint_node:
-            return
-        order_prop = f"{paint_node}.frame:{frame}.order"
-        if not commands.propertyExists(order_prop):
-            return
+    def _set_deleted(self, paint_node, frame, node_name, deleted):
+        """Soft-delete or restore a component and update the frame draw-order list."""
         comp = self._component_name(node_name)
-        current = list(commands.getStringProperty(order_prop))
-        if comp not in current:
-            commands.insertStringProperty(order_prop, [comp])
+        writes = {}
+        order = self._index.order(paint_node, frame) if paint_node else None
+        if order is not None:
+            if deleted and comp in order:
+                order = [c for c in order if c != comp]
+                writes[f"{paint_node}.frame:{frame}.order"] = (commands.StringType, order)
+            elif not deleted and comp not in order:
+                order = order + [comp]
+                writes[f"{paint_node}.frame:{frame}.order"] = (commands.StringType, order)
+        writes[f"{node_name}.softDeleted"] = (commands.IntType, [1 if deleted else 0])
+        with self._index.writing():
+            self._set_properties(writes)
+        if order is not None:
+            self._index.set_order(paint_node, frame, order)
+        if paint_node:
+            self._index.set_deleted(paint_node, comp, deleted)
 
     # ------------------------------------------------------------------
     # Undo / redo / clear
@@ -1113,15 +1264,14 @@ class AnnotateDrawEngine:
         paint_node, frame, node_name = self._undo_stack.pop()
         self._begin_sync()
         try:
-            self._remove_from_order(paint_node, frame, node_name)
-            commands.setIntProperty(f"{node_name}.softDeleted", [1], True)
+            self._set_deleted(paint_node, frame, node_name, True)
             commands.redraw()
         except Exception as e:
             print(f"[annotate_beta] undo error: {e}")
         self._end_sync(force=True)
         self._redo_stack.append((paint_node, frame, node_name))
         self._notify_buttons()
-        commands.sendInternalEvent("undo-paint", self._uuid_for(node_name))
+        commands.sendInternalEvent("undo-paint", self._index_uuid(paint_node, node_name))
 
     def redo(self):
         if not self._redo_stack:
@@ -1129,36 +1279,51 @@ class AnnotateDrawEngine:
         paint_node, frame, node_name = self._redo_stack.pop()
         self._begin_sync()
         try:
-            self._restore_to_order(paint_node, frame, node_name)
-            commands.setIntProperty(f"{node_name}.softDeleted", [0], True)
+            self._set_deleted(paint_node, frame, node_name, False)
             commands.redraw()
         except Exception as e:
             print(f"[annotate_beta] redo error: {e}")
         self._end_sync(force=True)
         self._undo_stack.append((paint_node, frame, node_name))
         self._notify_buttons()
-        commands.sendInternalEvent("redo-paint", self._uuid_for(node_name))
+        commands.sendInternalEvent("redo-paint", self._index_uuid(paint_node, node_name))
 
-    @staticmethod
-    def _annotated_frames(paint_node):
-        """Return the set of frame numbers that have an order property on paint_node.
+    def _clear_frames(self, paint_node, frames, writes, cleared, cleared_uuids):
+        """Soft-delete the visible components of paint_node on frames.
 
-        Scans actual properties rather than iterating a frame range so that
-        annotations stored at source-space frame numbers outside the current
-        timeline range are still found.
+        Queues the property writes in writes and appends (paint_node, frame,
+        node_name) for each cleared component to cleared. Returns the new
+        draw order per touched frame, to be stored in the index once the
+        writes are done.
         """
-        try:
-            frames = set()
-            for prop in commands.properties(paint_node):
-                # prop is e.g. "RVPaint_1.frame:42.order"
-                parts = prop.split(".")
-                if len(parts) >= 3 and parts[2] == "order":
-                    comp_parts = parts[1].split(":")
-                    if len(comp_parts) == 2 and comp_parts[0] == "frame":
-                        frames.add(int(comp_parts[1]))
-            return frames
-        except Exception:
-            return set()
+        new_orders = {}
+        for frame in frames:
+            components = self._index.order(paint_node, frame)
+            if components is None:
+                continue
+            surviving = []
+            for comp in components:
+                deleted, uuid = self._index.state(paint_node, comp)
+                if deleted is None or deleted:
+                    # No softDeleted property (can't be cleared) or already cleared.
+                    surviving.append(comp)
+                    continue
+                writes[f"{paint_node}.{comp}.softDeleted"] = (commands.IntType, [1])
+                cleared.append((paint_node, frame, f"{paint_node}.{comp}"))
+                if uuid:
+                    cleared_uuids.append(uuid)
+            if len(surviving) != len(components):
+                writes[f"{paint_node}.frame:{frame}.order"] = (commands.StringType, surviving)
+                new_orders[frame] = surviving
+        return new_orders
+
+    def _apply_clear(self, writes, cleared, new_orders):
+        with self._index.writing():
+            self._set_properties(writes)
+        for paint_node, _frame, node_name in cleared:
+            self._index.set_deleted(paint_node, self._component_name(node_name), True)
+        for (paint_node, frame), order in new_orders.items():
+            self._index.set_order(paint_node, frame, order)
 
     def clear_frame(self):
         """Remove all visible nodes on the current frame from the draw order.
@@ -1174,33 +1339,14 @@ class AnnotateDrawEngine:
         if not all_paint_nodes:
             return
         self._begin_sync()
+        writes = {}
         cleared = []
         cleared_uuids = []
+        new_orders = {}
         for paint_node in all_paint_nodes:
-            order_prop = f"{paint_node}.frame:{frame}.order"
-            if not commands.propertyExists(order_prop):
-                continue
-            components = list(commands.getStringProperty(order_prop))
-            surviving = []
-            node_cleared = False
-            for comp in components:
-                node_name = f"{paint_node}.{comp}"
-                deleted_prop = f"{node_name}.softDeleted"
-                try:
-                    already_deleted = commands.propertyExists(deleted_prop) and commands.getIntProperty(deleted_prop)[0]
-                    if not already_deleted:
-                        commands.setIntProperty(deleted_prop, [1], True)
-                        cleared.append((paint_node, frame, node_name))
-                        uuid = self._uuid_for(node_name)
-                        if uuid:
-                            cleared_uuids.append(uuid)
-                        node_cleared = True
-                    else:
-                        surviving.append(comp)
-                except Exception:
-                    surviving.append(comp)
-            if node_cleared:
-                commands.setStringProperty(order_prop, surviving, True)
+            for f, order in self._clear_frames(paint_node, (frame,), writes, cleared, cleared_uuids).items():
+                new_orders[(paint_node, f)] = order
+        self._apply_clear(writes, cleared, new_orders)
         self._end_sync(force=True)
         if cleared:
             self._undo_stack.extend(cleared)
@@ -1223,45 +1369,30 @@ class AnnotateDrawEngine:
         if not all_paint_nodes:
             return
         self._begin_sync()
-        any_cleared = False
+        writes = {}
+        cleared = []
         cleared_uuids = []
+        new_orders = {}
         for paint_node in all_paint_nodes:
-            for frame in self._annotated_frames(paint_node):
-                order_prop = f"{paint_node}.frame:{frame}.order"
-                if not commands.propertyExists(order_prop):
-                    continue
-                components = list(commands.getStringProperty(order_prop))
-                surviving = []
-                frame_cleared = False
-                for comp in components:
-                    node_name = f"{paint_node}.{comp}"
-                    deleted_prop = f"{node_name}.softDeleted"
-                    try:
-                        already_deleted = (
-                            commands.propertyExists(deleted_prop) and commands.getIntProperty(deleted_prop)[0]
-                        )
-                        if not already_deleted:
-                            commands.setIntProperty(deleted_prop, [1], True)
-                            uuid = self._uuid_for(node_name)
-                            if uuid:
-                                cleared_uuids.append(uuid)
-                            frame_cleared = True
-                        else:
-                            surviving.append(comp)
-                    except Exception:
-                        surviving.append(comp)
-                if frame_cleared:
-                    commands.setStringProperty(order_prop, surviving, True)
-                    any_cleared = True
+            frames = self._index.frames(paint_node)
+            for f, order in self._clear_frames(paint_node, frames, writes, cleared, cleared_uuids).items():
+                new_orders[(paint_node, f)] = order
+        self._apply_clear(writes, cleared, new_orders)
         self._end_sync(force=True)
         self._undo_stack.clear()
         self._redo_stack.clear()
         self._notify_buttons()
-        if any_cleared:
+        if cleared:
             commands.redraw()
         payload = "|".join(cleared_uuids) if cleared_uuids else all_paint_nodes[0]
         commands.sendInternalEvent("clear-all-paint", payload)
 
+    def _index_uuid(self, paint_node, node_name):
+        """Like _uuid_for, but answered from the annotation index when possible."""
+        if not paint_node:
+            return self._uuid_for(node_name)
+        return self._index.state(paint_node, self._component_name(node_name))[1]
+
     def _uuid_for(self, node_name):
         """Return the UUID stored on a paint node, or empty string if unavailable."""
         try:
@@ -1320,6 +1451,211 @@ class AnnotateDrawEngine:
             commands.sendInternalEvent("internal-sync-flush")
 
 
+class _AnnotationIndex:
+    """Cache of the annotations stored on RVPaint nodes.
+
+    Per paint node it holds frame -> draw order (the frame:N.order lists)
+    and component -> (softDeleted, uuid). A node is scanned the first time
+    it's asked about. Changes made elsewhere (remote sync, session loads,
+    the Mu annotate mode) come in through property_changed(), which drops
+    the affected entries so they're re-read on next use; the engine's own
+    writes happen inside writing() and update the index directly.
+    """
+
+    def __init__(self):
+        self._orders = {}  # paint node -> {frame: [component, ...]}; None value = re-read
+        self._states = {}  # paint node -> {component: (softDeleted or None, uuid)}
+        self._scanned = {}  # paint node -> property names seen by the scan or since
+        self._writing = 0
+
+    def clear(self):
+        self._orders.clear()
+        self._states.clear()
+        self._scanned.clear()
+
+    def forget(self, paint_node):
+        self._orders.pop(paint_node, None)
+        self._states.pop(paint_node, None)
+        self._scanned.pop(paint_node, None)
+
+    @contextlib.contextmanager
+    def writing(self):
+        self._writing += 1
+        try:
+            yield
+        finally:
+            self._writing -= 1
+
+    def property_changed(self, name):
+        """Invalidate whatever a change to the full property name affects."""
+        if self._writing:
+            return
+        parts = name.split(".")
+        if len(parts) != 3:
+            return
+        node, comp, prop = parts
+        orders = self._orders.get(node)
+        if orders is None:
+            return
+        self._scanned[node].add(name)
+        if prop == "order" and comp.startswith("frame:"):
+            try:
+                orders[int(comp[6:])] = None
+            except ValueError:
+                pass
+        elif prop in ("softDeleted", "uuid"):
+            self._states[node].pop(comp, None)
+
+    def frames(self, paint_node):
+        """Return the frame numbers that have an order property on paint_node.
+
+        Scans actual properties rather than iterating a frame range so that
+        annotations stored at source-space frame numbers outside the current
+        timeline range are still found.
+        """
+        orders = self._orders.get(paint_node)
+        if orders is None:
+            orders = self._orders[paint_node] = {}
+            self._states[paint_node] = {}
+            scanned = self._scanned[paint_node] = set()
+            try:
+                props = commands.properties(paint_node)
+                scanned.update(props)
+                for prop in props:
+                    # prop is e.g. "RVPaint_1.frame:42.order"
+                    parts = prop.split(".")
+                    if len(parts) >= 3 and parts[2] == "order":
+                        comp_parts = parts[1].split(":")
+                        if len(comp_parts) == 2 and comp_parts[0] == "frame":
+                            orders[int(comp_parts[1])] = None
+            except Exception:
+                pass
+        return sorted(orders)
+
+    def order(self, paint_node, frame):
+        """Return the draw order list of paint_node on frame, or None if it has none."""
+        self.frames(paint_node)
+        orders = self._orders[paint_node]
+        if frame in orders and orders[frame] is not None:
+            return orders[frame]
+        order_prop = f"{paint_node}.frame:{frame}.order"
+        try:
+            order = list(commands.getStringProperty(order_prop)) if self._exists(paint_node, order_prop) else None
+        except Exception:
+            order = None
+        if order is None:
+            orders.pop(frame, None)
+        else:
+            orders[frame] = order
+        return order
+
+    def set_order(self, paint_node, frame, order):
+        if paint_node in self._orders:
+            self._orders[paint_node][frame] = list(order)
+
+    def state(self, paint_node, comp):
+        """Return (softDeleted, uuid) of a component; softDeleted is None if it has no such property."""
+        self.frames(paint_node)
+        states = self._states[paint_node]
+        state = states.get(comp)
+        if state is None:
+            node_name = f"{paint_node}.{comp}"
+            try:
+                deleted_prop = f"{node_name}.softDeleted"
+                deleted = (
+                    bool(commands.getIntProperty(deleted_prop)[0]) if self._exists(paint_node, deleted_prop) else None
+                )
+            except Exception:
+                deleted = None
+            try:
+                uuid_prop = f"{node_name}.uuid"
+                uuid = commands.getStringProperty(uuid_prop)[0] if self._exists(paint_node, uuid_prop) else ""
+            except Exception:
+                uuid = ""
+            state = states[comp] = (deleted, uuid)
+        return state
+
+    def _exists(self, paint_node, prop):
+        # Properties are never deleted from paint nodes here, so anything the
+        # scan (or a later event) saw still exists.
+        return prop in self._scanned[paint_node] or commands.propertyExists(prop)
+
+    def set_deleted(self, paint_node, comp, deleted):
+        states = self._states.get(paint_node)
+        if states is not None and comp in states:
+            states[comp] = (bool(deleted), states[comp][1])
+
+
+class _PenDecimator:
+    """Incremental point decimation for a pen stroke being drawn.
+
+    Each point is (x, y, width, payload) with x/y in device pixels. The most
+    recent point is held back until the next one arrives, then dropped if it
+    is too close to the last kept point, or if it and every point dropped
+    since the last kept one stay within tolerance of the segment from the
+    last kept point to the new one. drain() returns the kept points
+    including the held-back tip.
+    """
+
+    __slots__ = ("_min_distance", "_tolerance", "_width_tolerance", "_anchor", "_tip", "_dropped", "_kept")
+
+    def __init__(self, min_distance, tolerance, width_tolerance):
+        self._min_distance = min_distance
+        self._tolerance = tolerance
+        self._width_tolerance = width_tolerance
+        self._anchor = None
+        self._tip = None
+        self._dropped = []
+        self._kept = []
+
+    def reset(self, x, y, width):
+        """Start from a point that has already been written to the stroke."""
+        self._anchor = (x, y, width, None)
+        self._tip = None
+        self._dropped = []
+        self._kept = []
+
+    def add(self, x, y, width, payload=None):
+        point = (x, y, width, payload)
+        tip = self._tip
+        self._tip = point
+        if tip is None:
+            return
+        anchor = self._anchor
+        if anchor is not None:
+            if math.hypot(tip[0] - anchor[0], tip[1] - anchor[1]) < self._min_distance:
+                return
+            self._dropped.append(tip)
+            if all(self._on_segment(anchor, c, point) for c in self._dropped):
+                return
+        self._keep(tip)
+
+    def drain(self):
+        if self._tip is not None:
+            self._keep(self._tip)
+            self._tip = None
+        kept = self._kept
+        self._kept = []
+        return kept
+
+    def _keep(self, point):
+        self._kept.append(point)
+        self._anchor = point
+        self._dropped = []
+
+    def _on_segment(self, a, c, b):
+        """True if c is within tolerance of segment a -> b, in position and width."""
+        cx = c[0] - a[0]
+        cy = c[1] - a[1]
+        dx = b[0] - a[0]
+        dy = b[1] - a[1]
+        seg2 = dx * dx + dy * dy
+        t = 0.0 if seg2 == 0.0 else max(0.0, min(1.0, (cx * dx + cy * dy) / seg2))
+        if math.hypot(t * dx - cx, t * dy - cy) > self._tolerance:
+            return False
+        return abs(a[2] + t * (b[2] - a[2]) - c[2]) <= self._width_tolerance
+
+
 class _Vec2:
     __slots__ = ("x", "y")
 
@@ -104,6 +104,8 @@ class AnnotateBetaMode(rvtypes.MinorMode):
 
     def activate(self):
         rvtypes.MinorMode.activate(self)
+        # Graph events aren't seen while inactive, so start from a fresh index.
+        self._engine.reset_annotation_index()
         commands.sendInternalEvent("annotate-mode-activated", "")
         # Re-push the event table in case the mode was deactivated by a view change.
         if self._tool in _DRAWING_TOOLS:
@@ -664,7 +666,7 @@ class AnnotateBetaMode(rvtypes.MinorMode):
             # brackets the modifier block with double dashes -- see QTTranslator::modifierString.)
             ("key-down--alt-shift--right", self._next_annotated_frame, "Next Annotated Frame"),
             ("key-down--alt-shift--left", self._prev_annotated_frame, "Previous Annotated Frame"),
-        ]
+        ] + self._engine.graph_bindings
 
     def _on_eyedropper_click(self, event):
         if self._tool != TOOL_EYEDROPPER:
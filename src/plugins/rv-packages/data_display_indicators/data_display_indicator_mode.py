@@ -15,27 +15,29 @@ from OpenGL.GLUT import *
 from OpenGL.GLU import *
 
 
-class WireBox(object):
-    def render(self):
-        glColor(self.r, self.g, self.b, 1.0)
-        glBegin(GL_LINE_LOOP)
-        glVertex(self.w)
-        glVertex(self.x)
-        glVertex(self.y)
-        glVertex(self.z)
-        glEnd()
-
-    def __init__(self, r, g, b, w, x, y, z):
-        self.r = r
-        self.g = g
-        self.b = b
-        self.w = w
-        self.x = x
-        self.y = y
-        self.z = z
+DISPLAY_WINDOW_COLOR = (0.5, 0.5, 1.0)
+DATA_WINDOW_COLOR = (1.0, 0.5, 0.5)
+
+
+def addWireBox(vertices, colors, color, corners):
+    """
+    Append the four edges of the box with the given corners as line segments
+    """
+
+    for i in range(4):
+        vertices.append(corners[i])
+        vertices.append(corners[(i + 1) % 4])
+    colors.extend([color] * 8)
 
 
 class EXRWindowIndicatorMode(rvt.MinorMode):
+    #
+    #   Indicators are cached per source and frame until the graph changes,
+    #   the cache is dropped when it grows past this many entries.
+    #
+
+    maxCachedIndicators = 4096
+
     def setupProjection(self, event):
         """
         Set the orthographic view to draw the bound boxes in
@@ -48,14 +50,12 @@ class EXRWindowIndicatorMode(rvt.MinorMode):
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
 
-    def getWindows(self, source):
+    def getWindows(self, attrs):
         """
         Get EXR Data/Display window values from EXR attributes (transmitted from RV
         EXR reader as frame buffer attributes).
         """
 
-        attrs = rvc.sourceAttributes(source)
-
         dataH = 0.0
         pa = 1.0
         for a in attrs:
@@ -85,142 +85,181 @@ class EXRWindowIndicatorMode(rvt.MinorMode):
 
         return (dataX, dataY, dataW, dataH, dispX, dispY, dispW, dispH, pa)
 
-    def getBoxes(self, s):
+    def getIndicator(self, s, frame):
         """
-        Collect the coordinates and colors of the bounding boxes
+        Return the cached indicator for source s at frame: None if the source
+        is not an EXR, otherwise the display window height, the sine and
+        cosine of the source rotation and the data window corner offsets from
+        the image geometry per unit of vertical scale (None if the data window
+        is the same as the display window).
         """
 
-        boxes = []
+        key = (s, frame)
+        if key in self._indicators:
+            return self._indicators[key]
+
+        attrs = rvc.sourceAttributes(s)
+        indicator = self.computeIndicator(s, frame, self.getWindows(attrs))
 
         #
-        #   Get data/display windows if EXR
+        #   Attributes are missing until the frame is loaded, so only cache
+        #   what was computed from a loaded frame.
         #
 
-        wins = self.getWindows(s)
+        if attrs:
+            if len(self._indicators) >= self.maxCachedIndicators:
+                self._indicators.clear()
+            self._indicators[key] = indicator
+
+        return indicator
+
+    def computeIndicator(self, s, frame, wins):
+        """
+        Compute the indicator for source s from its parsed EXR windows
+        """
 
         if not wins:
-            return []
+            return None
 
         (dataX, dataY, dataW, dataH, dispX, dispY, dispW, dispH, pa) = wins
 
         #
-        #   Display window:
+        #   Data window (skip if same as Display):
         #
 
-        geom = rvc.imageGeometry(s, False)
-        boxes.append(WireBox(0.5, 0.5, 1.0, geom[0], geom[1], geom[2], geom[3]))
-
-        # Useful for debugging
-        # geom2 = rvc.imageGeometry(s, True)
-        # boxes.append(WireBox(0.5, 1.0, 0.5, geom2[0], geom2[1], geom2[2], geom2[3]))
+        if dataW == dispW and dataH == dispH:
+            return (dispH, 0.0, 1.0, None)
 
         #
-        #   Data window (skip if same as Display):
+        #   Find the angle/radians of rotation
         #
 
-        if dataW != dispW or dataH != dispH:
-            #
-            #   Find the angle/radians of rotation
-            #
+        flip = 0
+        flop = 0
+        angle = 0
+        for xfrm in rvec.nodesInEvalPath(frame, "RVTransform2D", s):
+            flip = rvc.getIntProperty("%s.transform.flip" % xfrm)[0] - flip
+            flop = rvc.getIntProperty("%s.transform.flop" % xfrm)[0] - flop
+            angle += rvc.getFloatProperty("%s.transform.rotate" % xfrm)[0]
+        theta = (angle / 180.0) * math.pi
+        sinT = math.sin(theta)
+        cosT = math.cos(theta)
 
-            flip = 0
-            flop = 0
-            angle = 0
-            for xfrm in rvec.nodesInEvalPath(rvc.frame(), "RVTransform2D", s):
-                flip = rvc.getIntProperty("%s.transform.flip" % xfrm)[0] - flip
-                flop = rvc.getIntProperty("%s.transform.flop" % xfrm)[0] - flop
-                angle += rvc.getFloatProperty("%s.transform.rotate" % xfrm)[0]
-            theta = (angle / 180.0) * math.pi
+        #
+        #   Boundary differences between windows, per unit of vertical
+        #   scale, rotated to match the image
+        #
 
-            #
-            #   "Unrotate" the image geometry to calculate scale
-            #
+        flipflop = -1.0 if (flip != flop) else 1.0
+        unitX = pa * flipflop
+
+        diffCoords = (
+            (
+                (dispX - dataX) * unitX,
+                (dataY + dataH) - (dispY + dispH),
+            ),
+            (
+                ((dispX + dispW) - (dataX + dataW)) * unitX,
+                (dataY + dataH) - (dispY + dispH),
+            ),
+            (
+                ((dispX + dispW) - (dataX + dataW)) * unitX,
+                dataY - dispY,
+            ),
+            ((dispX - dataX) * unitX, dataY - dispY),
+        )
+
+        offsets = tuple((dx * cosT + dy * sinT, dy * cosT - dx * sinT) for dx, dy in diffCoords)
+
+        return (dispH, sinT, cosT, offsets)
+
+    def getBoxes(self, sources, frame):
+        """
+        Collect the line vertices and colors of the bounding boxes of all
+        sources
+        """
 
-            unRotMatrix = (
-                (math.cos(-theta), math.sin(-theta)),
-                (-math.sin(-theta), math.cos(-theta)),
-            )
+        vertices = []
+        colors = []
 
-            geomCoords = (geom[0], geom[1], geom[2], geom[3])
-            geomUnRot = self.dot2D(geomCoords, unRotMatrix)
+        for s in sources:
+            indicator = self.getIndicator(s, frame)
+            if indicator is None:
+                continue
 
-            scaleY = (geomUnRot[1][1] - geomUnRot[2][1]) / dispH
-            flipflop = -1.0 if (flip != flop) else 1.0
-            scaleX = scaleY * pa * flipflop
+            (dispH, sinT, cosT, offsets) = indicator
 
             #
-            #   Rotate the boundary differences between windows
+            #   Display window:
             #
 
-            rotMatrix = (
-                (math.cos(theta), math.sin(theta)),
-                (-math.sin(theta), math.cos(theta)),
-            )
+            geom = rvc.imageGeometry(s, False)
+            addWireBox(vertices, colors, DISPLAY_WINDOW_COLOR, geom)
 
-            diffCoords = (
-                (
-                    (dispX - dataX) * scaleX,
-                    ((dataY + dataH) - (dispY + dispH)) * scaleY,
-                ),
-                (
-                    ((dispX + dispW) - (dataX + dataW)) * scaleX,
-                    ((dataY + dataH) - (dispY + dispH)) * scaleY,
-                ),
-                (
-                    ((dispX + dispW) - (dataX + dataW)) * scaleX,
-                    (dataY - dispY) * scaleY,
-                ),
-                ((dispX - dataX) * scaleX, (dataY - dispY) * scaleY),
-            )
-
-            diffRot = self.dot2D(diffCoords, rotMatrix)
+            if offsets is None:
+                continue
 
             #
-            #   Add the diffs to the image geometry to get the Data window
+            #   "Unrotate" the image geometry to calculate scale, then add the
+            #   scaled diffs to the image geometry to get the Data window
             #
 
-            boxes.append(
-                WireBox(
-                    1.0,
-                    0.5,
-                    0.5,
-                    (geom[0][0] + diffRot[0][0], geom[0][1] + diffRot[0][1]),
-                    (geom[1][0] + diffRot[1][0], geom[1][1] + diffRot[1][1]),
-                    (geom[2][0] + diffRot[2][0], geom[2][1] + diffRot[2][1]),
-                    (geom[3][0] + diffRot[3][0], geom[3][1] + diffRot[3][1]),
-                )
+            scaleY = ((geom[1][0] - geom[2][0]) * sinT + (geom[1][1] - geom[2][1]) * cosT) / dispH
+
+            addWireBox(
+                vertices,
+                colors,
+                DATA_WINDOW_COLOR,
+                [(g[0] + o[0] * scaleY, g[1] + o[1] * scaleY) for g, o in zip(geom, offsets)],
             )
 
-        return boxes
+        return vertices, colors
 
-    def dot2D(self, array1, array2):
-        array3 = [[0, 0], [0, 0], [0, 0], [0, 0]]
-        for i in range(4):
-            for j in range(2):
-                array3[i][j] = sum(p * q for p, q in zip(array1[i], array2[j]))
+    def drawLines(self, vertices, colors):
+        """
+        Draw all the box edges from a single vertex array
+        """
 
-        return array3
+        arrayBuffer = glGetIntegerv(GL_ARRAY_BUFFER_BINDING)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        try:
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glVertexPointerf(vertices)
+            glColorPointerf(colors)
+            glDrawArrays(GL_LINES, 0, len(vertices))
+        finally:
+            glPopClientAttrib()
+            glBindBuffer(GL_ARRAY_BUFFER, arrayBuffer)
+
+    def invalidate(self, event):
+        event.reject()
+        self._indicators.clear()
 
     def render(self, event):
-        sources = rvc.sourcesAtFrame(rvc.frame())
+        frame = rvc.frame()
+        sources = rvc.sourcesAtFrame(frame)
 
         if len(sources) == 0:
             return
 
-        boxes = []
-        for s in sources:
-            boxes += self.getBoxes(s)
+        vertices, colors = self.getBoxes(sources, frame)
 
         self.setupProjection(event)
-        for box in boxes:
-            box.render()
+        if vertices:
+            self.drawLines(vertices, colors)
 
     def __init__(self):
         rvt.MinorMode.__init__(self)
 
+        self._indicators = {}
+
         self.init(
             "data-display-indicator-mode",
-            None,  # no bindings
+            [
+                ("graph-state-change", self.invalidate, "Drop cached EXR windows"),
+            ],
             None,  # no bindings
             None,
         )  # menu item supplied by package system
@@ -4,14 +4,28 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 
+import contextlib
+import hashlib
+import json
 import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
 import requests
 
+from concurrent.futures import Future
 from http.cookies import SimpleCookie
-from tempfile import NamedTemporaryFile
-from typing import Dict, Iterable
+from typing import Dict, Iterable, Optional
 from urllib.parse import urlparse
 
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
 # !!!!! W A R N I N G !!!!!
 #
 # This is a demo package for RV. It is not meant to be used in production.
@@ -44,6 +58,22 @@ HEADERS_ENV = "RV_MEDIA_LIBRARY_UNSECURE_DEMO_HEADERS"
 # The redirection is enabled if the environment variable is set.
 DOWNLOAD_ENV = "RV_MEDIA_LIBRARY_UNSECURE_DEMO_FORCE_LOCAL_CACHE"
 
+# The environment variables that configure where the redirected urls are downloaded to.
+# Downloads are kept across RV sessions, and shared between RV instances, in CACHE_DIR_ENV
+# (default: <tmp>/rv_media_library), up to CACHE_SIZE_ENV megabytes. The least recently used
+# files are removed first. Up to DOWNLOAD_WORKERS_ENV urls are downloaded at the same time.
+CACHE_DIR_ENV = "RV_MEDIA_LIBRARY_UNSECURE_DEMO_CACHE"
+CACHE_SIZE_ENV = "RV_MEDIA_LIBRARY_UNSECURE_DEMO_CACHE_MB"
+DOWNLOAD_WORKERS_ENV = "RV_MEDIA_LIBRARY_UNSECURE_DEMO_DOWNLOAD_WORKERS"
+
+DEFAULT_CACHE_SIZE_MB = 10240
+DEFAULT_DOWNLOAD_WORKERS = 4
+
+# Interrupted downloads are resumed this many times before giving up.
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_TIMEOUT = 30
+
 
 def is_plugin_enabled() -> bool:
     """
@@ -143,49 +173,371 @@ def get_http_headers(url: str) -> Iterable[Dict]:
     yield from ()
 
 
-redirection_cache = {}
+class MediaCache:
+    """
+    Size-bounded cache of downloaded media on disk, shared by every RV instance on the machine.
+
+    Each url gets its own directory holding the downloaded file, under its original name so that RV
+    picks the right reader, and an entry.json recording the url and the ETag/Last-Modified validators
+    the server sent with it. A file is downloaded as <name>.part next to it, so an interrupted download
+    can be resumed with a range request. Entries are marked as used when they are looked up, and the
+    least recently used ones are evicted once the cache grows past its size limit.
+    """
 
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_dir(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest()[:32])
+
+    def file_path(self, url: str) -> str:
+        filename = os.path.basename(urlparse(url).path) or "media"
+        return os.path.join(self.entry_dir(url), filename)
+
+    def read_entry(self, url: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.entry_dir(url), "entry.json")) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return entry if entry.get("url") == url else None
+
+    def write_entry(self, url: str, entry: Dict):
+        path = os.path.join(self.entry_dir(url), "entry.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(entry, f)
+        os.replace(path + ".tmp", path)
+
+    def touch(self, url: str):
+        try:
+            os.utime(os.path.join(self.entry_dir(url), "entry.json"))
+        except OSError:
+            pass
+
+    @contextlib.contextmanager
+    def locked(self, path: str, blocking: bool = True):
+        """
+        Holds an exclusive lock on the given file. Raises OSError if blocking is False and the lock is
+        held by someone else.
+        """
+        with open(path, "a+b") as lock_file:
+            if sys.platform == "win32":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            try:
+                yield
+            finally:
+                if sys.platform == "win32":
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def evict(self, keep: Iterable[str] = ()):
+        """
+        Deletes the least recently used entries until the cache fits its size limit. Entries in keep,
+        and entries being downloaded, are never deleted.
+        """
+        keep = set(keep)
+
+        with self.locked(os.path.join(self.directory, ".lock")):
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.is_dir():
+                    continue
+
+                size = 0
+                used = 0.0
+                for item in os.scandir(entry.path):
+                    st = item.stat()
+                    size += st.st_size
+                    if item.name == "entry.json":
+                        used = st.st_mtime
+
+                entries.append((used, size, entry.path))
+                total += size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path in keep:
+                    continue
+
+                try:
+                    with self.locked(os.path.join(path, ".lock"), blocking=False):
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    continue
+                total -= size
+
+
+class MediaFetcher:
+    """
+    Downloads library media into a MediaCache.
 
-def get_http_redirection(url: str) -> str:
+    All downloads go through one requests.Session, so connections to the media servers are pooled and
+    reused, and run on a pool of worker threads, so several urls can be fetched at once with
+    prefetch(). Asking for a url that is already being downloaded waits for that download instead of
+    starting another one. The workers are daemon threads: quitting RV does not wait for downloads, and
+    the partial files are resumed the next time they are needed.
     """
-    Returns the url to redirect to.
 
-    In this demonstration function, it will download the file on disk and redirect to it. Subsequent calls will skip the
-    download step.
+    def __init__(self, cache: MediaCache, workers: int, session: Optional[requests.Session] = None):
+        self.cache = cache
+        self.session = session or requests.Session()
+
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self._queue = queue.Queue()
+
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"media-library-download-{i}", daemon=True).start()
+
+    def fetch(self, url: str) -> Future:
+        """
+        Returns a future for the local path of the given url, starting its download if needed. Each
+        url is checked against the server once per RV session, failed downloads are retried on the
+        next call.
+        """
+        with self._lock:
+            future = self._futures.get(url)
+            if future is None or (future.done() and future.exception() is not None):
+                future = Future()
+                self._futures[url] = future
+                self._queue.put((url, future))
+
+            return future
+
+    def redirect(self, url: str) -> str:
+        """
+        Returns the local path of the given url, waiting for its download.
+        """
+        future = self.fetch(url)
+        path = future.result()
+
+        # Another RV instance may have evicted the file since it was fetched.
+        if not os.path.exists(path):
+            with self._lock:
+                if self._futures.get(url) is future:
+                    del self._futures[url]
+            path = self.fetch(url).result()
+
+        return path
+
+    def _work(self):
+        while True:
+            url, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                future.set_result(self._fetch(url))
+            except Exception as e:
+                print(f"ERROR: Download of {url} failed: {e}")
+                future.set_exception(e)
+
+    def _request(self, url: str, headers: Dict) -> requests.Response:
+        cookies = requests.cookies.RequestsCookieJar()
+        for cookie in get_http_cookies(url):
+            cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+
+        request_headers = {header["name"]: header["value"] for header in get_http_headers(url)}
+        request_headers.update(headers)
+
+        return self.session.get(url, headers=request_headers, cookies=cookies, stream=True, timeout=DOWNLOAD_TIMEOUT)
+
+    def _fetch(self, url: str) -> str:
+        path = self.cache.file_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self.cache.locked(os.path.join(os.path.dirname(path), ".lock")):
+            entry = self.cache.read_entry(url)
+            if entry and entry.get("complete") and os.path.exists(path) and self._is_current(url, entry):
+                self.cache.touch(url)
+            else:
+                self._download(url, path)
+
+        # Only downloads still in flight, this one included, are kept. Media fetched earlier may be
+        # evicted, redirect() downloads it again if it is asked for after that.
+        with self._lock:
+            keep = [self.cache.entry_dir(u) for u, future in self._futures.items() if not future.done()]
+
+        try:
+            self.cache.evict(keep)
+        except OSError as e:
+            print(f"WARNING: Failed to evict media cache {self.cache.directory}: {e}")
+
+        return path
+
+    def _is_current(self, url: str, entry: Dict) -> bool:
+        """
+        Returns True if the cached copy of the url is still the one the server has. The cached copy is
+        used as is if the server can't be reached.
+        """
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if not headers:
+            return True
+
+        try:
+            with self._request(url, headers) as response:
+                if response.status_code == 304:
+                    return True
+                return bool(entry.get("etag")) and response.headers.get("ETag") == entry["etag"]
+        except requests.RequestException as e:
+            print(f"WARNING: Could not check {url}, using the cached copy: {e}")
+            return True
+
+    def _download(self, url: str, path: str):
+        part = path + ".part"
+
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            entry = self.cache.read_entry(url) or {}
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            validator = entry.get("etag") or entry.get("last_modified")
+
+            # Content-Length and byte ranges count the encoded bytes, but iter_content() decodes them, so
+            # ask for the file as is.
+            headers = {"Accept-Encoding": "identity"}
+            if offset and validator and not entry.get("complete") and not entry.get("encoded"):
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+            else:
+                offset = 0
+
+            try:
+                with self._request(url, headers) as response:
+                    if response.status_code == 416:
+                        os.remove(part)
+                        continue
+                    response.raise_for_status()
+
+                    if response.status_code != 206:
+                        offset = 0
+
+                    # A server may compress the file anyway. The decoded size is then unknown, and the download
+                    # can't be resumed.
+                    encoded = response.headers.get("content-encoding", "identity").lower() != "identity"
+                    if encoded and offset:
+                        os.remove(part)
+                        continue
+
+                    total = response.headers.get("content-length")
+                    total = int(total) + offset if total is not None and not encoded else None
+
+                    self.cache.write_entry(
+                        url,
+                        {
+                            "url": url,
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                            "size": total,
+                            "encoded": encoded,
+                            "complete": False,
+                        },
+                    )
+
+                    if offset:
+                        print(f"Resuming download of {url} at {offset} / {total} bytes.")
+                    else:
+                        print(f"Downloading {url}.")
+
+                    with open(part, "ab" if offset else "wb") as file:
+                        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                            file.write(chunk)
+
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == DOWNLOAD_RETRIES:
+                    raise
+                print(f"WARNING: Download of {url} was interrupted, resuming: {e}")
+                time.sleep(attempt + 1)
+                continue
+
+            size = os.path.getsize(part)
+            if total is not None and size != total:
+                if attempt == DOWNLOAD_RETRIES:
+                    raise IOError(f"Downloaded {size} of {total} bytes")
+                continue
+
+            os.replace(part, path)
+
+            entry = self.cache.read_entry(url)
+            entry.update(size=size, complete=True)
+            self.cache.write_entry(url, entry)
+
+            print(f"Download of {url} completed.")
+            return
+
+        raise IOError(f"Could not download {url}")
+
+
+media_fetcher_lock = threading.Lock()
+media_fetcher = None
+
+
+def get_media_fetcher() -> MediaFetcher:
     """
+    Returns the MediaFetcher shared by every redirected url, creating it on first use.
+    """
+
+    global media_fetcher
+
+    with media_fetcher_lock:
+        if media_fetcher is None:
+            directory = os.environ.get(CACHE_DIR_ENV) or os.path.join(tempfile.gettempdir(), "rv_media_library")
 
-    global redirection_cache
+            try:
+                max_mb = float(os.environ.get(CACHE_SIZE_ENV) or DEFAULT_CACHE_SIZE_MB)
+            except ValueError:
+                print(f"WARNING: Ignoring invalid {CACHE_SIZE_ENV}")
+                max_mb = DEFAULT_CACHE_SIZE_MB
 
-    if url in redirection_cache:
-        return redirection_cache[url].name
+            try:
+                workers = max(1, int(os.environ.get(DOWNLOAD_WORKERS_ENV) or DEFAULT_DOWNLOAD_WORKERS))
+            except ValueError:
+                print(f"WARNING: Ignoring invalid {DOWNLOAD_WORKERS_ENV}")
+                workers = DEFAULT_DOWNLOAD_WORKERS
 
-    filename = os.path.basename(urlparse(url).path)
-    file = NamedTemporaryFile(suffix=filename)
+            media_fetcher = MediaFetcher(MediaCache(directory, int(max_mb * 1024 * 1024)), workers)
 
-    session = requests.Session()
+        return media_fetcher
 
-    for cookie in get_http_cookies(url):
-        session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
 
-    for header in get_http_headers(url):
-        session.headers[header["name"]] = header["value"]
+def prefetch(urls: Iterable[str]):
+    """
+    Starts downloading the given urls in the background.
+
+    This is an API for integrators, RV itself does not call it: RV asks for the redirection of each url
+    only when it loads that media, one url at a time. A session loader that knows every library url of a
+    session up front can call this before loading it, so that the downloads run concurrently and
+    get_http_redirection() finds them on disk or already in flight.
+    """
 
-    req = session.get(url, stream=True)
+    for url in urls:
+        if is_redirecting(url):
+            get_media_fetcher().fetch(url)
 
-    total = req.headers.get("content-length")
 
-    print(f"Downloading {url}.")
-    if total is None:
-        file.write(req.content)
-    else:
-        total = int(total)
-        current = 0
+def get_http_redirection(url: str) -> str:
+    """
+    Returns the url to redirect to.
 
-        for chunk in req.iter_content(round(total / 100)):
-            current += len(chunk)
-            file.write(chunk)
-            print(f"{current} / {total} ({round((current / total) * 100)}%)")
-    print(f"Download of {url} completed.")
+    In this demonstration function, it will download the file on disk and redirect to it. The download is kept in a
+    cache on disk, so subsequent calls, and later RV sessions, skip the download step as long as the file on the server
+    is unchanged.
+    """
 
-    redirection_cache[url] = file
-    return file.name
+    return get_media_fetcher().redirect(url)
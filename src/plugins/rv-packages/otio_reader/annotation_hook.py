@@ -11,6 +11,10 @@ import effectHook
 import opentimelineio as otio
 from rv import commands, extra_commands
 
+# Default of the transform_properties arguments below: None is a valid
+# value, meaning the transform is unavailable, so it cannot mean "not passed".
+_UNSET = object()
+
 
 def _get_transform_properties():
     """Retrieve RV transform properties for coordinate transformations."""
@@ -67,9 +71,15 @@ def _get_transform_properties():
         return None
 
 
-def _transform_otio_to_world_coordinate(point):
-    """Transform coordinates from OTIO space to RV world coordinate space (WCS)."""
-    transform_properties = _get_transform_properties()
+def _transform_otio_to_world_coordinate(point, transform_properties=_UNSET):
+    """Transform coordinates from OTIO space to RV world coordinate space (WCS).
+
+    Pass the result of _get_transform_properties(), even if it is None, when
+    transforming many points, otherwise the RV graph is queried again for
+    every point.
+    """
+    if transform_properties is _UNSET:
+        transform_properties = _get_transform_properties()
     if transform_properties is None:
         return None
 
@@ -82,17 +92,40 @@ def _transform_otio_to_world_coordinate(point):
     return (world_coordinate_x, world_coordinate_y, world_coordinate_width)
 
 
-def _transform_pos(x, y):
+def _transform_points(points, transform_properties):
+    """Transform all the points of a stroke to RV WCS in one pass.
+
+    Returns the flat [x0, y0, x1, y1, ...] positions and the widths, ready
+    to be set as a stroke's points and width properties, or None.
+    """
+    if transform_properties is None:
+        return None
+
+    bounds_size, bounds_center = transform_properties
+    center_x, center_y = bounds_center.x, bounds_center.y
+    size_x, size_y = bounds_size.x, bounds_size.y
+
+    positions = [
+        coordinate for point in points for coordinate in ((point.x - center_x) / size_x, (point.y - center_y) / size_y)
+    ]
+    widths = [point.width / size_x for point in points]
+
+    return positions, widths
+
+
+def _transform_pos(x, y, transform_properties=_UNSET):
     """Transform a 2D OTIO position to RV WCS. Returns (wcs_x, wcs_y) or None."""
-    result = _transform_otio_to_world_coordinate(otio.schemadef.Point.Point(x=x, y=y, width=0.0))
+    result = _transform_otio_to_world_coordinate(otio.schemadef.Point.Point(x=x, y=y, width=0.0), transform_properties)
     if result is None:
         return None
     return result[0], result[1]
 
 
-def _transform_scalar(w):
+def _transform_scalar(w, transform_properties=_UNSET):
     """Scale a scalar OTIO distance to RV WCS via the x-axis scale, or return the raw value."""
-    result = _transform_otio_to_world_coordinate(otio.schemadef.Point.Point(x=0.0, y=0.0, width=float(w)))
+    result = _transform_otio_to_world_coordinate(
+        otio.schemadef.Point.Point(x=0.0, y=0.0, width=float(w)), transform_properties
+    )
     return result[2] if result is not None else float(w)
 
 
@@ -104,19 +137,19 @@ def _add_shape_to_frame_order(paint_node, stroke_id, frame, prefix):
     commands.insertStringProperty(f"{frame_component}.order", [f"{prefix}:{stroke_id}:{frame}:annotation"])
 
 
-def _create_bbox_shape(layer, paint_node, stroke_id, frame, shape_type):
+def _create_bbox_shape(layer, paint_node, stroke_id, frame, shape_type, transform_properties=_UNSET):
     """Create an RVPaint rect: or ellipse: node from a shape layer."""
     prefix = "rect" if shape_type.startswith("Rectangle.") else "ellipse"
     shape_component = f"{paint_node}.{prefix}:{stroke_id}:{frame}:annotation"
 
-    min_pos = _transform_pos(layer.min.x, layer.min.y)
-    max_pos = _transform_pos(layer.max.x, layer.max.y)
+    min_pos = _transform_pos(layer.min.x, layer.min.y, transform_properties)
+    max_pos = _transform_pos(layer.max.x, layer.max.y, transform_properties)
     if min_pos is None or max_pos is None:
         logging.warning(f"annotation_hook: could not transform bbox coords for {shape_component} — skipping")
         return
 
     border_width = float(layer.border_width) if layer.border_width is not None else 0.0
-    wcs_border_width = _transform_scalar(border_width)
+    wcs_border_width = _transform_scalar(border_width, transform_properties)
 
     corner_radius = getattr(layer, "corner_radius", None)
     wcs_corner_radius = float(corner_radius) if corner_radius is not None else 0.0
@@ -144,19 +177,19 @@ def _create_bbox_shape(layer, paint_node, stroke_id, frame, shape_type):
         _add_shape_to_frame_order(paint_node, stroke_id, frame, prefix)
 
 
-def _create_point_pair_shape(layer, paint_node, stroke_id, frame, shape_type):
+def _create_point_pair_shape(layer, paint_node, stroke_id, frame, shape_type, transform_properties=_UNSET):
     """Create an RVPaint arrow: or line: node from a shape layer."""
     prefix = "arrow" if shape_type.startswith("Arrow.") else "line"
     shape_component = f"{paint_node}.{prefix}:{stroke_id}:{frame}:annotation"
 
-    start_pos = _transform_pos(layer.start_position.x, layer.start_position.y)
-    end_pos = _transform_pos(layer.end_position.x, layer.end_position.y)
+    start_pos = _transform_pos(layer.start_position.x, layer.start_position.y, transform_properties)
+    end_pos = _transform_pos(layer.end_position.x, layer.end_position.y, transform_properties)
     if start_pos is None or end_pos is None:
         logging.warning(f"annotation_hook: could not transform point-pair coords for {shape_component} — skipping")
         return
 
     raw_bw = float(layer.width if shape_type.startswith("Line.") else layer.border_width)
-    wcs_border_width = _transform_scalar(raw_bw)
+    wcs_border_width = _transform_scalar(raw_bw, transform_properties)
 
     is_deleted = layer.visible is False or bool(layer.soft_deleted)
 
@@ -173,7 +206,7 @@ def _create_point_pair_shape(layer, paint_node, stroke_id, frame, shape_type):
     }
 
     if shape_type.startswith("Arrow."):
-        wcs_thickness = _transform_scalar(float(layer.width))
+        wcs_thickness = _transform_scalar(float(layer.width), transform_properties)
         props["innerColor"] = [float(c) for c in layer.inner_color]
         props["thickness"] = [wcs_thickness]
 
@@ -183,12 +216,12 @@ def _create_point_pair_shape(layer, paint_node, stroke_id, frame, shape_type):
         _add_shape_to_frame_order(paint_node, stroke_id, frame, prefix)
 
 
-def _create_text_shape(layer, paint_node, stroke_id, frame, source_node=None):
+def _create_text_shape(layer, paint_node, stroke_id, frame, source_node=None, transform_properties=_UNSET):
     """Create an RVPaint text: node from a shape layer."""
     shape_component = f"{paint_node}.text:{stroke_id}:{frame}:annotation"
 
     anchor = layer.anchor
-    anchor_pos = _transform_pos(anchor.x, anchor.y)
+    anchor_pos = _transform_pos(anchor.x, anchor.y, transform_properties)
     if anchor_pos is None:
         logging.warning(f"annotation_hook: could not transform text anchor for {shape_component} — skipping")
         return
@@ -197,7 +230,7 @@ def _create_text_shape(layer, paint_node, stroke_id, frame, source_node=None):
     # border_width). RVPaint's fontSize is a WCS fraction (image-height-
     # normalised) — the renderer multiplies by framebuffer height at draw
     # time (see PaintCommand.cpp) — so no pixel conversion happens here.
-    font_size_wcs = _transform_scalar(float(layer.font_size))
+    font_size_wcs = _transform_scalar(float(layer.font_size), transform_properties)
 
     is_deleted = layer.visible is False or bool(layer.soft_deleted)
 
@@ -237,6 +270,7 @@ def hook_function(in_timeline: otio.schemadef.Annotation.Annotation, argument_ma
     except Exception:
         logging.warning("Unable to set Hold and Ghost properties")
 
+    layers = []
     for layer in in_timeline.layers:
         if layer.is_unknown_schema:
             logging.warning(
@@ -244,6 +278,20 @@ def hook_function(in_timeline: otio.schemadef.Annotation.Annotation, argument_ma
                 "(no schema registered in this version of RV)"
             )
             continue
+        layers.append(layer)
+
+    if not layers:
+        return
+
+    # Everything below only adds paint properties, so the transform, the
+    # paint node and its next stroke id can be looked up once for all layers.
+    transform_properties = _get_transform_properties()
+    source_node = argument_map.get("source_group")
+    paint_node = extra_commands.nodesInGroupOfType(source_node, "RVPaint")[0]
+    paint_component = f"{paint_node}.paint"
+    stroke_id = commands.getIntProperty(f"{paint_component}.nextId")[0]
+
+    for layer in layers:
         if isinstance(layer.layer_range, otio.opentime.TimeRange):
             time_range = layer.layer_range
         else:
@@ -252,10 +300,7 @@ def hook_function(in_timeline: otio.schemadef.Annotation.Annotation, argument_ma
         relative_time = time_range.end_time_inclusive()
         frame = relative_time.to_frames()
 
-        source_node = argument_map.get("source_group")
-        paint_node = extra_commands.nodesInGroupOfType(source_node, "RVPaint")[0]
-        paint_component = f"{paint_node}.paint"
-        stroke_id = commands.getIntProperty(f"{paint_component}.nextId")[0] + 1
+        stroke_id += 1
         frame_component = f"{paint_node}.frame:{frame}"
 
         # Set properties on the paint component of the RVPaint node
@@ -296,16 +341,13 @@ def hook_function(in_timeline: otio.schemadef.Annotation.Annotation, argument_ma
             if not commands.propertyExists(width_property):
                 commands.newProperty(width_property, commands.FloatType, 1)
 
-            for point in layer.points:
-                world_coordinate_x, world_coordinate_y, world_coordinate_width = _transform_otio_to_world_coordinate(
-                    point
-                )
-
-                commands.insertFloatProperty(
-                    points_property,
-                    [world_coordinate_x, world_coordinate_y],
-                )
-                commands.insertFloatProperty(width_property, [world_coordinate_width])
+            transformed = _transform_points(layer.points, transform_properties)
+            if transformed is None:
+                logging.warning(f"annotation_hook: could not transform points for {pen_component} — skipping")
+            elif transformed[1]:
+                positions, widths = transformed
+                commands.insertFloatProperty(points_property, positions)
+                commands.insertFloatProperty(width_property, widths)
 
             if not layer.soft_deleted:
                 if not commands.propertyExists(f"{frame_component}.order"):
@@ -314,13 +356,13 @@ def hook_function(in_timeline: otio.schemadef.Annotation.Annotation, argument_ma
                 commands.insertStringProperty(f"{frame_component}.order", [f"pen:{stroke_id}:{frame}:annotation"])
 
         elif shape_label.startswith(("Rectangle.", "Ellipse.")):
-            _create_bbox_shape(layer, paint_node, stroke_id, frame, shape_label)
+            _create_bbox_shape(layer, paint_node, stroke_id, frame, shape_label, transform_properties)
 
         elif shape_label.startswith(("Arrow.", "Line.")):
-            _create_point_pair_shape(layer, paint_node, stroke_id, frame, shape_label)
+            _create_point_pair_shape(layer, paint_node, stroke_id, frame, shape_label, transform_properties)
 
         elif shape_label.startswith("Text."):
-            _create_text_shape(layer, paint_node, stroke_id, frame, source_node)
+            _create_text_shape(layer, paint_node, stroke_id, frame, source_node, transform_properties)
 
         else:
             logging.warning(f"annotation_hook: unrecognised layer type {shape_label!r} — skipping")
@@ -34,6 +34,7 @@ from rv import commands
 from rv import extra_commands
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import opentimelineio as otio
 from contextlib import contextmanager
@@ -52,6 +53,23 @@ def set_context(context, **kwargs):
             context.update(old_context)
 
 
+PREFETCH_WORKERS_ENV = "RV_OTIO_READER_PREFETCH_WORKERS"
+DEFAULT_PREFETCH_WORKERS = 16
+
+
+def _prefetch_workers_from_env():
+    try:
+        return max(0, int(os.environ.get(PREFETCH_WORKERS_ENV) or DEFAULT_PREFETCH_WORKERS))
+    except ValueError:
+        logging.warning(f"Ignoring invalid {PREFETCH_WORKERS_ENV}")
+        return DEFAULT_PREFETCH_WORKERS
+
+
+# Number of threads used to resolve and check media paths before the RV
+# graph is built; 0 resolves them serially.
+PREFETCH_WORKERS = _prefetch_workers_from_env()
+
+
 class NoMappingForOtioTypeError(otio.exceptions.OTIOError):
     pass
 
@@ -71,6 +89,8 @@ def read_otio_file(otio_file):
     input_otio = otio.adapters.read_from_file(otio_file)
     context = {"otio_file": otio_file}
 
+    _prefetch_media(input_otio, context)
+
     commands.addSourceBegin()
     ret = create_rv_node_from_otio(input_otio, context)
     commands.addSourceEnd()
@@ -78,6 +98,84 @@ def read_otio_file(otio_file):
     return ret
 
 
+def _prefetch_media(otio_obj, context):
+    """
+    Resolve the media paths of every clip in otio_obj before the graph is
+    built.
+
+    The references are deduplicated, resolved with _get_media_path and
+    checked for existence on a thread pool (these are filesystem stats,
+    slow on network storage), and the results are stored in the context
+    for _get_media_path to reuse. The media of each clip's active reference
+    is then handed to RV's preloader, so that probing it overlaps with
+    building the graph rather than happening inside addSourceVerbose.
+    """
+    find_clips = getattr(otio_obj, "find_clips", None)
+    if find_clips is None:
+        return
+
+    urls = {}  # target url -> True if some clip uses it as its active media
+    for clip in find_clips():
+        active_key = getattr(clip, "active_media_reference_key", None)
+        if hasattr(clip, "media_references"):
+            media_refs = clip.media_references()
+        else:
+            media_refs = {active_key: clip.media_reference}
+        for key, media_ref in media_refs.items():
+            url = _media_url(media_ref)
+            if url is not None:
+                urls[url] = urls.get(url, False) or key == active_key
+
+    if not urls:
+        return
+
+    def resolve(url):
+        path = _resolve_media_path(url, context)
+        return path, _media_exists(path)
+
+    if PREFETCH_WORKERS > 0 and len(urls) > 1:
+        with ThreadPoolExecutor(max_workers=min(PREFETCH_WORKERS, len(urls))) as pool:
+            results = list(pool.map(resolve, urls))
+    else:
+        results = [resolve(url) for url in urls]
+
+    context["media_paths"] = {url: path for url, (path, _) in zip(urls, results)}
+
+    preloaded = set()
+    missing = 0
+    for (path, exists), active in zip(results, urls.values()):
+        if not exists:
+            missing += 1
+        elif active and path not in preloaded:
+            commands.startPreloadingMedia(path)
+            preloaded.add(path)
+    context["preloaded_media"] = preloaded
+
+    if missing:
+        logging.warning(
+            "{} of {} media references in {} were not found".format(missing, len(urls), context.get("otio_file"))
+        )
+
+
+def _media_url(media_ref):
+    """Return the target url RV loads for media_ref, or None if it has no media on disk."""
+    if isinstance(media_ref, otio.schema.ExternalReference):
+        return str(media_ref.target_url)
+    if isinstance(media_ref, otio.schema.ImageSequenceReference):
+        return str(media_ref.abstract_target_url(symbol="%0{n}d".format(n=media_ref.frame_zero_padding)))
+    return None
+
+
+def _media_exists(path):
+    """False only for local paths that are definitely missing."""
+    if "://" in path:
+        return True
+    if "%" in path:
+        # image sequence pattern: look for the directory, not every frame
+        return os.path.isdir(os.path.dirname(path) or ".")
+    return os.path.exists(path)
+
+
 def _run_hook(hook_name, otio_obj, context={}, optional=True):
     try:
         return otio.hooks.run(hook_name, otio_obj, context)
@@ -277,7 +375,8 @@ def _get_global_transform(tl, context) -> dict:
                 if isinstance(clip.media_reference, otio.schema.ExternalReference):
                     media_path = _get_media_path(str(clip.media_reference.target_url), context)
                     # print("PRELOADING MOVIE: {}".format(media_path))
-                    commands.startPreloadingMedia(media_path)
+                    if "preloaded_media" not in context:  # else _prefetch_media did it
+                        commands.startPreloadingMedia(media_path)
 
                 bounds = clip.media_reference.available_image_bounds
                 if bounds:
@@ -397,7 +496,7 @@ def _create_media(media_ref, trimmed_range, context=None):
     media_range = media_ref.available_range or trimmed_range
 
     if isinstance(media_ref, otio.schema.ExternalReference):
-        media = [_get_media_path(str(media_ref.target_url), context)]
+        media = [_get_media_path(_media_url(media_ref), context)]
 
         if context.get("track_kind", None) == otio.schema.TrackKind.Audio:
             # Create blank video media to accompany audio for valid source
@@ -407,12 +506,7 @@ def _create_media(media_ref, trimmed_range, context=None):
         return media
 
     elif isinstance(media_ref, otio.schema.ImageSequenceReference):
-        return [
-            _get_media_path(
-                str(media_ref.abstract_target_url(symbol="%0{n}d".format(n=media_ref.frame_zero_padding))),
-                context,
-            )
-        ]
+        return [_get_media_path(_media_url(media_ref), context)]
 
     elif isinstance(media_ref, otio.schema.GeneratorReference):
         if media_ref.generator_kind == "solid":
@@ -493,6 +587,14 @@ def _create_sources(item, context=None):
 def _get_media_path(target_url: str, context: dict | None = None) -> str:
     context = context or {}
 
+    # Paths resolved by _prefetch_media, unless a hook has since set sg_url.
+    media_paths = context.get("media_paths")
+    if media_paths and target_url in media_paths and "sg_url" not in context:
+        return media_paths[target_url]
+    return _resolve_media_path(target_url, context)
+
+
+def _resolve_media_path(target_url: str, context: dict) -> str:
     if "sg_url" in context and target_url.startswith("/file_serve/version"):
         return context.get("sg_url") + target_url
 
@@ -3,6 +3,9 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 #
+import contextlib
+import io
+import json
 import math
 import numbers
 import six
@@ -30,6 +33,13 @@ MAX_INT = int(runtime.eval("int.max;", []))
 
 DEFAULT_FPS = 24.0
 
+# Write .otio files item by item as the graph is walked instead of building
+# the whole timeline in memory first (see stream_otio_file)
+STREAMING_EXPORT = os.environ.get("RV_OTIO_WRITER_STREAMING", "0") not in ("", "0")
+
+# Indentation of the .otio JSON, matching otio.adapters.write_to_file
+JSON_INDENT = 4
+
 # The reverse color mapping is in otio_reader
 PINK = [1.0, 0.753, 0.796, 1.0]
 RED = [1.0, 0.0, 0.0, 1.0]
@@ -49,20 +59,92 @@ TRANSITION_TYPE_MAP = {
 }
 
 
+class _GraphSnapshot(object):
+    """
+    Memoized view of the RV graph for the duration of one export.
+    The writer asks for the same node types, connections, group members,
+    properties and media info many times while it recurses, and every one
+    of those is a round trip through the command bridge. The graph does not
+    change while an export runs, so each query is made once and replayed.
+    """
+
+    def __init__(self):
+        self._results = {}
+
+    def query(self, func, *args):
+        key = (func, args)
+        try:
+            ok, value = self._results[key]
+        except KeyError:
+            try:
+                ok, value = True, func(*args)
+            except Exception as e:
+                ok, value = False, e
+            self._results[key] = (ok, value)
+
+        if not ok:
+            raise value
+        return _copy_result(value)
+
+    def clear(self):
+        self._results.clear()
+
+
+_graph_snapshot = None
+
+
+def _copy_result(value):
+    # Callers are free to modify returned lists (e.g. reverse the inputs)
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    return value
+
+
+def _query(func, *args):
+    """
+    Call func(*args), answering from the active export snapshot if any.
+    :param func: `callable` a read-only graph query such as `commands.nodeType`
+    :return: whatever func returns
+    """
+    if _graph_snapshot is None:
+        return func(*args)
+    return _graph_snapshot.query(func, *args)
+
+
+@contextlib.contextmanager
+def graph_snapshot():
+    """
+    Cache graph queries made by the writer helpers until the block exits.
+    Nested uses share the outermost snapshot.
+    """
+    global _graph_snapshot
+    if _graph_snapshot is not None:
+        yield _graph_snapshot
+        return
+
+    _graph_snapshot = _GraphSnapshot()
+    try:
+        yield _graph_snapshot
+    finally:
+        _graph_snapshot = None
+
+
 def create_timeline_from_node(root_node_name):
+    with graph_snapshot():
+        return _create_timeline_from_node(root_node_name)
+
+
+def _create_timeline_from_node(root_node_name):
     timeline = otio.schema.Timeline()
 
     otio_root = create_otio_from_rv_node(root_node_name, timeline=timeline)
     if not otio_root:
         return
 
-    if commands.nodeType(root_node_name) == "RVStackGroup":
-        # check if the OTIO import saved any timeline properties to the stack
-        timeline.metadata.update(get_node_otio_metadata(root_node_name, "timeline_metadata"))
-        name_prop = "{}.otio.timeline_name".format(root_node_name)
-        if commands.propertyExists(name_prop):
-            timeline.name = commands.getStringProperty(name_prop)[0]
-
+    if _query(commands.nodeType, root_node_name) == "RVStackGroup":
+        _set_timeline_properties(timeline, root_node_name)
         timeline.tracks = otio_root
     else:
         timeline.tracks[:] = [otio_root]
@@ -70,18 +152,204 @@ def create_timeline_from_node(root_node_name):
     return timeline
 
 
-def write_otio_file(root_node_name, file_path):
+def _set_timeline_properties(timeline, stack_node_name):
+    # check if the OTIO import saved any timeline properties to the stack
+    timeline.metadata.update(get_node_otio_metadata(stack_node_name, "timeline_metadata"))
+    name_prop = "{}.otio.timeline_name".format(stack_node_name)
+    if _query(commands.propertyExists, name_prop):
+        timeline.name = _query(commands.getStringProperty, name_prop)[0]
+
+
+def write_otio_file(root_node_name, file_path, streaming=None):
     """
     Create an OTIO Timeline starting from the supplied RV node and write it
     to the path pointed to file
     :param root_node_name: `str`
     :param file_path: `str`
+    :param streaming: `bool` use stream_otio_file when the file format allows
+                      it, defaults to STREAMING_EXPORT
     """
+    if streaming is None:
+        streaming = STREAMING_EXPORT
+
+    if streaming and can_stream_to(file_path):
+        stream_otio_file(root_node_name, file_path)
+        return
 
     timeline = create_timeline_from_node(root_node_name)
     otio.adapters.write_to_file(timeline, file_path)
 
 
+def can_stream_to(file_path):
+    """
+    Whether stream_otio_file can write file_path: only plain .otio JSON can
+    be streamed, and only at the current schema versions.
+    :param file_path: `str`
+    :return: `bool`
+    """
+    if "OTIO_DEFAULT_TARGET_VERSION_FAMILY_LABEL" in os.environ:
+        return False
+    return os.path.splitext(file_path)[1].lower() == ".otio"
+
+
+def stream_otio_file(root_node_name, file_path):
+    """
+    Write the OTIO Timeline for the supplied RV node to an .otio file one
+    track item at a time. Items are serialized as soon as they are final and
+    are not kept, so memory use does not grow with the length of the
+    sequences. The file reads back equal to the one written by
+    write_otio_file; only the timeline's own fields come after its tracks.
+    :param root_node_name: `str`
+    :param file_path: `str`
+    """
+    # Write next to the target and only replace it once the whole timeline
+    # is written, so a failed export leaves any previous file untouched.
+    temp_path = "{}.{}.tmp".format(file_path, os.getpid())
+    try:
+        with graph_snapshot(), io.open(temp_path, "w", encoding="utf-8") as out:
+            _stream_timeline(root_node_name, out)
+        os.replace(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class _StreamedContainer(object):
+    """
+    An OTIO Stack or Track created without its children, and the children
+    still to be written into it: RV node names for a stack, otio items for a
+    track.
+    """
+
+    def __init__(self, container, children, children_are_nodes):
+        self.container = container
+        self.children = children
+        self.children_are_nodes = children_are_nodes
+
+
+def _open_streamed_stack(node_name, *args, **kwargs):
+    stack, input_node_names = _open_stack(node_name, *args, **kwargs)
+    return _StreamedContainer(stack, input_node_names, True)
+
+
+def _open_streamed_track(node_name, *args, **kwargs):
+    track, children = _open_track(node_name, *args, **kwargs)
+    return _StreamedContainer(track, children, False)
+
+
+def _has_hook(hook_name):
+    try:
+        return bool(otio.hooks.scripts_attached_to(hook_name))
+    except KeyError:
+        return False
+
+
+def _open_streamed(node_name, *args, **kwargs):
+    """
+    Streaming counterpart of create_otio_from_rv_node. Stacks and sequences
+    are opened without their children so those can be written one at a
+    time; everything else (and any container a post export hook needs to
+    see whole) is created in full.
+    :param node_name: `str`
+    :return: `_StreamedContainer`, `otio.schema.*` or None
+    """
+    open_type_map = {
+        "RVSequenceGroup": _open_streamed_track,
+        "RVStackGroup": _open_streamed_stack,
+    }
+
+    node_type = _query(commands.nodeType, node_name)
+    if node_type not in open_type_map or _has_hook("post_export_hook_{}".format(node_type)):
+        return create_otio_from_rv_node(node_name, *args, **kwargs)
+
+    process_node = _run_hook(
+        "pre_export_hook_{}".format(node_type), rv_node_name=node_name, optional=True, *args, **kwargs
+    )
+    if process_node is False:
+        return None
+
+    return open_type_map[node_type](node_name, *args, **kwargs)
+
+
+def _indented(text, depth):
+    return text.replace("\n", "\n" + " " * (JSON_INDENT * depth))
+
+
+def _write_streamed(out, value, depth, *args, **kwargs):
+    """
+    Write the JSON for a value returned by _open_streamed, indented to depth.
+    """
+    if not isinstance(value, _StreamedContainer):
+        out.write(_indented(value.to_json_string(JSON_INDENT), depth))
+        return
+
+    # Write the container around its empty children list, then fill the list
+    text = value.container.to_json_string(JSON_INDENT)
+    children_key = '\n{}"children": []'.format(" " * JSON_INDENT)
+    split = text.index(children_key) + len(children_key) - 2
+    out.write(_indented(text[:split], depth))
+
+    written = [0]
+
+    def next_child():
+        out.write(",\n" if written[0] else "[\n")
+        out.write(" " * (JSON_INDENT * (depth + 2)))
+        written[0] += 1
+
+    if value.children_are_nodes:
+        for node_name in value.children:
+            child = _open_streamed(node_name, *args, **kwargs)
+            if child is not None:
+                next_child()
+                _write_streamed(out, child, depth + 2, *args, **kwargs)
+    else:
+        # An item is only final once the next one has been created
+        pending = []
+        for item in value.children:
+            if pending:
+                next_child()
+                _write_streamed(out, pending.pop(), depth + 2)
+            pending.append(item)
+        if pending:
+            next_child()
+            _write_streamed(out, pending.pop(), depth + 2)
+
+    if written[0]:
+        out.write(_indented("\n]", depth + 1))
+    else:
+        out.write("[]")
+    out.write(_indented(text[split + 2 :], depth))
+
+
+def _stream_timeline(root_node_name, out):
+    timeline = otio.schema.Timeline()
+
+    # The timeline's global start time is only known once its tracks have
+    # been created, so its fields are written after them
+    out.write(
+        '{{\n{}"OTIO_SCHEMA": "{}.{}",\n'.format(" " * JSON_INDENT, timeline.schema_name(), timeline.schema_version())
+    )
+    out.write('{}"tracks": '.format(" " * JSON_INDENT))
+
+    if _query(commands.nodeType, root_node_name) == "RVStackGroup":
+        otio_root = _open_streamed(root_node_name, timeline=timeline)
+        if otio_root is None:
+            raise otio.exceptions.OTIOError("Nothing to export for {}".format(root_node_name))
+        _set_timeline_properties(timeline, root_node_name)
+    else:
+        otio_root = _StreamedContainer(timeline.tracks, [root_node_name], True)
+
+    _write_streamed(out, otio_root, 1, timeline=timeline)
+
+    fields = json.loads(timeline.to_json_string(JSON_INDENT))
+    for key, field in fields.items():
+        if key not in ("OTIO_SCHEMA", "tracks"):
+            out.write(',\n{}"{}": '.format(" " * JSON_INDENT, key))
+            out.write(_indented(json.dumps(field, indent=JSON_INDENT), 1))
+    out.write("\n}")
+
+
 def _run_hook(hook_name, optional=True, *args, **kwargs):
     try:
         return otio.hooks.run(hook_name, kwargs.get("timeline"), kwargs)
@@ -105,7 +373,7 @@ def create_otio_from_rv_node(node_name, *args, **kwargs):
         "Wipe": _create_transition,
     }
 
-    node_type = commands.nodeType(node_name)
+    node_type = _query(commands.nodeType, node_name)
     if node_type in create_type_map:
         process_node = _run_hook(
             "pre_export_hook_{}".format(node_type), rv_node_name=node_name, optional=True, *args, **kwargs
@@ -128,7 +396,7 @@ def create_otio_from_rv_node(node_name, *args, **kwargs):
     if not isinstance(result, otio.schema.Effect):
         return result
 
-    input_node_names, _ = commands.nodeConnections(node_name)
+    input_node_names, _ = _query(commands.nodeConnections, node_name)
     num_effect_inputs = len(input_node_names)
 
     # Each effect should have one input (another effect or something that
@@ -154,31 +422,50 @@ def _create_track(node_name, *args, **kwargs):
     :param node_name: `str`
     :return: `otio.schema.Track`
     """
+    track, children = _open_track(node_name, *args, **kwargs)
+    for child in children:
+        track.append(child)
+    return track
+
+
+def _open_track(node_name, *args, **kwargs):
+    """
+    Create an empty OTIO Track for an RVSequenceGroup along with a generator
+    of its items. An item yielded by the generator may still be modified
+    until the next one is yielded (a transition extends the item before it).
+    :param node_name: `str`
+    :return: (`otio.schema.Track`, generator of `otio.schema.Item`)
+    """
     seq_node = group_member_of_type(node_name, "RVSequence")
-    fps = commands.getFloatProperty(seq_node + ".output.fps")[0]
+    fps = _query(commands.getFloatProperty, seq_node + ".output.fps")[0]
 
-    track = otio.schema.Track(extra_commands.uiName(node_name))
+    track = otio.schema.Track(_query(extra_commands.uiName, node_name))
     track.markers.extend(_create_markers(node_name, fps))
 
-    input_node_names, _ = commands.nodeConnections(node_name)
+    return track, _track_children(node_name, seq_node, fps, *args, **kwargs)
+
+
+def _track_children(node_name, seq_node, fps, *args, **kwargs):
+    input_node_names, _ = _query(commands.nodeConnections, node_name)
 
     # Set timing for Sequence elements
     edl = {
-        "in_frame": commands.getIntProperty(seq_node + ".edl.in"),
-        "out_frame": commands.getIntProperty(seq_node + ".edl.out"),
-        "cut_in_frame": commands.getIntProperty(seq_node + ".edl.frame"),
-        "source": commands.getIntProperty(seq_node + ".edl.source"),
+        "in_frame": _query(commands.getIntProperty, seq_node + ".edl.in"),
+        "out_frame": _query(commands.getIntProperty, seq_node + ".edl.out"),
+        "cut_in_frame": _query(commands.getIntProperty, seq_node + ".edl.frame"),
+        "source": _query(commands.getIntProperty, seq_node + ".edl.source"),
     }
 
     has_edl = edl["in_frame"] and edl["out_frame"] and edl["source"]
 
+    previous = None
     transition = None
     for edl_index, rv_node in enumerate(
         [input_node_names[i] for i in edl["source"][:-1]] if has_edl else input_node_names
     ):
         # We need the item after the transition to correctly process it,
         # so delay this until the next input
-        if TRANSITION_TYPE_MAP.get(commands.nodeType(rv_node)):
+        if TRANSITION_TYPE_MAP.get(_query(commands.nodeType, rv_node)):
             transition = rv_node
             continue
 
@@ -205,18 +492,23 @@ def _create_track(node_name, *args, **kwargs):
 
         # Now that we have the items surrounding the transition, create it
         if transition:
-            kwargs["pre_item"] = (track[-1] if len(track) > 0 else None,)
+            kwargs["pre_item"] = (previous,)
             kwargs["post_item"] = item
 
             transition_node = create_otio_from_rv_node(transition, *args, **kwargs)
 
             if transition_node:
-                track.append(transition_node)
+                yield transition_node
 
             transition = None
 
-        track.append(item)
-    return track
+        previous = item
+        yield item
+
+        # Nearly all repeated queries are made while creating a single item,
+        # so don't let the snapshot grow with the length of the sequence
+        if _graph_snapshot is not None:
+            _graph_snapshot.clear()
 
 
 def _create_stack(node_name, *args, **kwargs):
@@ -225,21 +517,32 @@ def _create_stack(node_name, *args, **kwargs):
     :param node_name: `str`
     :return: `otio.schema.Stack`
     """
+    stack, input_node_names = _open_stack(node_name, *args, **kwargs)
+    for input_node_name in input_node_names:
+        stack.append(create_otio_from_rv_node(input_node_name, *args, **kwargs))
+
+    return stack
+
+
+def _open_stack(node_name, *args, **kwargs):
+    """
+    Create an empty OTIO Stack for an RVStackGroup along with the names of
+    the nodes that make up its children, in order.
+    :param node_name: `str`
+    :return: (`otio.schema.Stack`, `[str]`)
+    """
     stack_node = group_member_of_type(node_name, "RVStack")
-    fps = commands.getFloatProperty(f"{stack_node}.output.fps")[0]
-    reverse_order = commands.getIntProperty(f"{stack_node}.mode.supportReversedOrderBlending")
+    fps = _query(commands.getFloatProperty, f"{stack_node}.output.fps")[0]
+    reverse_order = _query(commands.getIntProperty, f"{stack_node}.mode.supportReversedOrderBlending")
 
-    input_node_names, _ = commands.nodeConnections(node_name)
+    input_node_names, _ = _query(commands.nodeConnections, node_name)
     if reverse_order and reverse_order[0]:
         input_node_names.reverse()
 
-    stack = otio.schema.Stack(extra_commands.uiName(node_name), metadata=get_node_otio_metadata(node_name))
+    stack = otio.schema.Stack(_query(extra_commands.uiName, node_name), metadata=get_node_otio_metadata(node_name))
     stack.markers.extend(_create_markers(node_name, fps))
 
-    for input_node_name in input_node_names:
-        stack.append(create_otio_from_rv_node(input_node_name, *args, **kwargs))
-
-    return stack
+    return stack, input_node_names
 
 
 def _create_item(node_name, *args, **kwargs):
@@ -259,15 +562,15 @@ def _create_item(node_name, *args, **kwargs):
     active_source_group = node_name
     media_references = {}
 
-    if commands.nodeType(node_name) == "RVSwitchGroup":
+    if _query(commands.nodeType, node_name) == "RVSwitchGroup":
         # handle multi-media reppresentation
         active_key = None
 
-        for src_group in commands.nodeConnections(node_name)[0]:
+        for src_group in _query(commands.nodeConnections, node_name)[0]:
             source = get_source_node(src_group)
-            key = commands.getStringProperty("{}.media.repName".format(source))[0]
+            key = _query(commands.getStringProperty, "{}.media.repName".format(source))[0]
 
-            if commands.getIntProperty("{}.media.active".format(source))[0] == 1:
+            if _query(commands.getIntProperty, "{}.media.active".format(source))[0] == 1:
                 active_key = key
                 active_source = source
                 active_source_group = src_group
@@ -292,7 +595,7 @@ def _create_item(node_name, *args, **kwargs):
     source_path = get_source_path(active_source_group)
     if source_path.startswith("blank,") and source_path.endswith(".movieproc"):
         gap = otio.schema.Gap(
-            name=extra_commands.uiName(node_name),
+            name=_query(extra_commands.uiName, node_name),
             source_range=source_range,
             metadata=get_node_otio_metadata(node_name),
         )
@@ -300,7 +603,7 @@ def _create_item(node_name, *args, **kwargs):
         return gap
 
     item = otio.schema.Clip(
-        name=extra_commands.uiName(node_name),
+        name=_query(extra_commands.uiName, node_name),
         source_range=source_range,
         metadata=get_node_otio_metadata(node_name) or {},
     )
@@ -379,9 +682,9 @@ def _create_transition(rv_trx, *args, **kwargs):
     pre_item = kwargs.get("pre_item")[0]
     post_item = kwargs.get("post_item")
 
-    transition_type = TRANSITION_TYPE_MAP.get(commands.nodeType(rv_trx), otio.schema.TransitionTypes.Custom)
+    transition_type = TRANSITION_TYPE_MAP.get(_query(commands.nodeType, rv_trx), otio.schema.TransitionTypes.Custom)
 
-    trx_inputs, _ = commands.nodeConnections(rv_trx)
+    trx_inputs, _ = _query(commands.nodeConnections, rv_trx)
     if len(trx_inputs) != 2:
         return None
 
@@ -395,15 +698,15 @@ def _create_transition(rv_trx, *args, **kwargs):
     # Assume FPS matches first input (RV Transition don't have FPS settings)
     fps = get_source_fps(out_source)
 
-    duration_frames_prop = commands.getFloatProperty(rv_trx + ".parameters.numFrames")
+    duration_frames_prop = _query(commands.getFloatProperty, rv_trx + ".parameters.numFrames")
     duration_frames = duration_frames_prop[0] if duration_frames_prop else 20
 
     # If we imported from OTIO, respect the original in_offset.  If not,
     # assume the transition frames are split evenly between the two clips
     in_offset_prop = "{}.otio.in_offset".format(rv_trx)
 
-    if commands.propertyExists(in_offset_prop):
-        in_offset_frames = commands.getIntProperty(in_offset_prop)[0]
+    if _query(commands.propertyExists, in_offset_prop):
+        in_offset_frames = _query(commands.getIntProperty, in_offset_prop)[0]
     else:
         in_offset_frames = int(duration_frames / 2)
 
@@ -430,7 +733,7 @@ def _create_transition(rv_trx, *args, **kwargs):
         )
 
     return otio.schema.Transition(
-        name=extra_commands.uiName(rv_trx),
+        name=_query(extra_commands.uiName, rv_trx),
         transition_type=transition_type,
         in_offset=in_offset,
         out_offset=out_offset,
@@ -473,16 +776,16 @@ def _create_markers(node_name, fps):
         return defaultColor
 
     markers = []
-    if not commands.propertyExists(node_name + ".markers.otio_metadata"):
+    if not _query(commands.propertyExists, node_name + ".markers.otio_metadata"):
         return markers
 
-    colors = commands.getFloatProperty(node_name + ".markers.color")
+    colors = _query(commands.getFloatProperty, node_name + ".markers.color")
 
     for name, marker_in, marker_out, metadata, color in zip(
-        commands.getStringProperty(node_name + ".markers.name"),
-        commands.getIntProperty(node_name + ".markers.in"),
-        commands.getIntProperty(node_name + ".markers.out"),
-        commands.getStringProperty(node_name + ".markers.otio_metadata"),
+        _query(commands.getStringProperty, node_name + ".markers.name"),
+        _query(commands.getIntProperty, node_name + ".markers.in"),
+        _query(commands.getIntProperty, node_name + ".markers.out"),
+        _query(commands.getStringProperty, node_name + ".markers.otio_metadata"),
         [colors[x : x + 4] for x in range(0, len(colors), 4)],
     ):
         markers.append(
@@ -507,8 +810,8 @@ def get_node_otio_metadata(node_name, prop_name="metadata"):
     otio_prop = "{}.otio.{}".format(node_name, prop_name)
 
     # Persist the general OTIO metadata separately to match OTIO Reader
-    if commands.propertyExists(otio_prop):
-        metadata_str = commands.getStringProperty(otio_prop)[0]
+    if _query(commands.propertyExists, otio_prop):
+        metadata_str = _query(commands.getStringProperty, otio_prop)[0]
         return otio.core.deserialize_json_from_string(metadata_str)
 
     return {}
@@ -607,7 +910,7 @@ def get_source_path(node_name):
     :param node_name: `str`
     :return: `str`
     """
-    return commands.getStringProperty(get_source_node(node_name) + ".media.movie")[0]
+    return _query(commands.getStringProperty, get_source_node(node_name) + ".media.movie")[0]
 
 
 def get_source_start_frame(node_name):
@@ -616,7 +919,7 @@ def get_source_start_frame(node_name):
     :param node_name: `str`
     :return: `int`
     """
-    start_frame = commands.getIntProperty(get_source_node(node_name) + ".cut.in")[0]
+    start_frame = _query(commands.getIntProperty, get_source_node(node_name) + ".cut.in")[0]
 
     if start_frame == MIN_INT or start_frame == -MAX_INT:
         return None
@@ -630,7 +933,7 @@ def get_source_end_frame(node_name):
     :param node_name: `str`
     :return: `int`
     """
-    end_frame = commands.getIntProperty(get_source_node(node_name) + ".cut.out")[0]
+    end_frame = _query(commands.getIntProperty, get_source_node(node_name) + ".cut.out")[0]
 
     return end_frame if end_frame != MAX_INT else None
 
@@ -644,11 +947,11 @@ def get_source_fps(node_name):
     fps = None
     file_source = group_member_of_type(node_name, "RVFileSource")
     if file_source:
-        fps = commands.getFloatProperty(file_source + ".group.fps")[0]
+        fps = _query(commands.getFloatProperty, file_source + ".group.fps")[0]
 
     image_source = group_member_of_type(node_name, "RVImageSource")
     if image_source:
-        fps = commands.getFloatProperty(image_source + ".image.fps")[0]
+        fps = _query(commands.getFloatProperty, image_source + ".image.fps")[0]
 
     if not fps:
         fps = get_movie_fps(node_name)
@@ -667,8 +970,8 @@ def get_source_name(node_name):
     if not source:
         source = group_member_of_type(node_name, "RVImageSource")
 
-    if source and commands.propertyExists(source + ".ui.name"):
-        return commands.getStringProperty(source + ".ui.name")[0]
+    if source and _query(commands.propertyExists, source + ".ui.name"):
+        return _query(commands.getStringProperty, source + ".ui.name")[0]
 
     return ""
 
@@ -680,7 +983,7 @@ def get_movie_first_frame(node_name):
     :return: `int`
     """
     try:
-        return commands.sourceMediaInfo(get_source_node(node_name)).get("startFrame")
+        return _query(commands.sourceMediaInfo, get_source_node(node_name)).get("startFrame")
     except Exception:
         return None
 
@@ -692,7 +995,7 @@ def get_movie_last_frame(node_name):
     :return: `int`
     """
     try:
-        return commands.sourceMediaInfo(get_source_node(node_name)).get("endFrame")
+        return _query(commands.sourceMediaInfo, get_source_node(node_name)).get("endFrame")
     except Exception:
         return None
 
@@ -704,7 +1007,7 @@ def get_movie_fps(node_name):
     :return: `int`
     """
     try:
-        return commands.sourceMediaInfo(get_source_node(node_name)).get("fps", DEFAULT_FPS)
+        return _query(commands.sourceMediaInfo, get_source_node(node_name)).get("fps", DEFAULT_FPS)
     except Exception:
         return None
 
@@ -716,10 +1019,14 @@ def group_member_of_type(node, member_type):
     :param member_type: `str`
     :return: `str`
     """
-    for n in commands.nodesInGroup(node):
-        if commands.nodeType(n) == member_type:
-            return n
-    return None
+    return _query(_group_members_by_type, node).get(member_type)
+
+
+def _group_members_by_type(node):
+    members = {}
+    for n in _query(commands.nodesInGroup, node):
+        members.setdefault(_query(commands.nodeType, n), n)
+    return members
 
 
 def get_input_node(node, node_type):
@@ -729,10 +1036,10 @@ def get_input_node(node, node_type):
     :param node_type: `str`
     :return: `str`
     """
-    if commands.nodeType(node) == node_type:
+    if _query(commands.nodeType, node) == node_type:
         return node
 
-    inputs, _ = commands.nodeConnections(node)
+    inputs, _ = _query(commands.nodeConnections, node)
     for i in inputs:
         input_node = get_input_node(i, node_type)
         if input_node:
@@ -7,6 +7,7 @@
 from __future__ import print_function
 
 import socket
+import string
 import sys
 import time
 import os
@@ -21,6 +22,28 @@ def log(str):
         print("net: %s\n" % str, file=sys.stderr)
 
 
+def muString(s):
+    """
+    Quote s as a Mu string literal.  Anything but printable ASCII is
+    written as a \\u escape, with as many hex digits as the code point
+    needs.  Mu reads every hex digit that follows \\u, so a hex digit
+    right after an escape is escaped as well.
+    """
+    out = []
+    escaped = False
+    for c in s:
+        if c == '"' or c == "\\":
+            out.append("\\" + c)
+            escaped = False
+        elif " " <= c <= "~" and not (escaped and c in string.hexdigits):
+            out.append(c)
+            escaped = False
+        else:
+            out.append("\\u%04x" % ord(c))
+            escaped = True
+    return '"' + "".join(out) + '"'
+
+
 class RvCommunicator:
     """
     Wrap up connection and communciation with a running RV.  The
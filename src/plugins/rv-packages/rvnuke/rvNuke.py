@@ -12,12 +12,14 @@ import re
 import platform
 import subprocess
 import rvNetwork
+from rvNetwork import muString
 import time
 import sys
 import select
+import socket
 import threading
 
-protocolVersion = 115
+protocolVersion = 116
 
 rvmon = None
 
@@ -43,6 +45,18 @@ def encodeNL(str):
     return str.replace("\n", "#NL#")
 
 
+def muStringArray(values):
+    return "string[] {" + ", ".join(muString(v) for v in values) + "}"
+
+
+def muIntArray(values):
+    return "int[] {" + ", ".join("%d" % int(v) for v in values) + "}"
+
+
+def isReadOrWrite(node):
+    return type(node).__name__ == "Node" and (node.Class() == "Read" or node.Class() == "Write")
+
+
 def initRvMon():
     global rvmon
     if not rvmon:
@@ -61,42 +75,180 @@ def pythonHandler(eventContents):
 
 
 class RvMonitor:
-    class LockedFifo:
+    class Command:
+        """
+        A call to one of the RvMonitor methods below, queued on the Nuke side
+        to be run by the monitor thread.
+        """
+
+        def __init__(self, method, *args):
+            self.method = method
+            self.args = args
+
+        def run(self, monitor):
+            getattr(monitor, self.method)(*self.args)
+
+        def __repr__(self):
+            return "%s%s" % (self.method, repr(self.args))
+
+    class CommandQueue:
+        """
+        Commands waiting to be sent to RV. Appending a command wakes the
+        monitor thread through a socket pair, so it is sent right away rather
+        than on the next poll. Whatever piles up while the thread is busy is
+        coalesced when it takes the commands: only the last of the commands
+        that just bring RV up to date with Nuke's current state is kept, and
+        all the Read node changes are sent in one syncReads call.
+        """
+
+        latestOnly = ("changeFrame", "selectCurrentByNodeName", "removeObsoleteReads", "raiseRv")
+
         def __init__(self):
-            self.first = ()
             self.lock = threading.Lock()
+            self.commands = []
+            self.woken = False
+            try:
+                self.wakeReader, self.wakeWriter = socket.socketpair()
+                self.wakeReader.setblocking(0)
+                self.wakeWriter.setblocking(0)
+            except Exception:
+                log("no wake-up socket, falling back to polling: %s" % sys.exc_info()[1])
+                self.wakeReader = self.wakeWriter = None
 
-        def append(self, data):
+        def append(self, cmd):
             self.lock.acquire()
-            node = [data, ()]
-            if self.first:
-                self.last[1] = node
-            else:
-                self.first = node
-            self.last = node
+            self.commands.append(cmd)
+            wake = not self.woken
+            self.woken = True
             self.lock.release()
 
-        def pop(self):
+            if wake and self.wakeWriter is not None:
+                try:
+                    self.wakeWriter.send(b"w")
+                except Exception:
+                    pass
+
+        def waitables(self):
+            return [self.wakeReader] if self.wakeReader is not None else []
+
+        def take(self):
+            """
+            Remove the queued commands and return them coalesced, in order.
+            """
             #
-            #  don't lock unless we have to
+            #  drain the wake-up bytes first so that a command appended
+            #  after we take the list always leaves one to wake us again
             #
-            node = self.first
-            if node == ():
-                return ()
+            if self.wakeReader is not None:
+                try:
+                    while self.wakeReader.recv(4096):
+                        pass
+                except Exception:
+                    pass
 
             self.lock.acquire()
-            node = self.first
-            if node != ():
-                self.first = node[1]
-                ret = node[0]
-            else:
-                ret = ()
+            commands = self.commands
+            self.commands = []
+            self.woken = False
             self.lock.release()
-            return ret
+
+            return self.coalesce(commands)
 
         def clear(self):
-            while self.pop() != ():
-                pass
+            self.take()
+
+        def coalesce(self, commands):
+            last = {}
+            syncs = []
+            for i, cmd in enumerate(commands):
+                if isinstance(cmd, RvMonitor.Command):
+                    last[cmd.method] = i
+                    if cmd.method == "syncReads":
+                        syncs.append(cmd)
+
+            ret = []
+            for i, cmd in enumerate(commands):
+                if isinstance(cmd, RvMonitor.Command):
+                    if cmd.method == "syncReads":
+                        if last[cmd.method] != i:
+                            continue
+                        cmd = self.mergeSyncReads(syncs)
+                    elif cmd.method in self.latestOnly and last[cmd.method] != i:
+                        continue
+                ret.append(cmd)
+            return ret
+
+        def mergeSyncReads(self, syncs):
+            """
+            One syncReads doing the work of all of syncs, applied in order.
+            """
+            readNodes = []
+            removedNodes = []
+            force = False
+            for cmd in syncs:
+                args = cmd.args + (None, (), False)[len(cmd.args) :]
+                names, gone, force = args[0], args[1], force or args[2]
+
+                if names is None:
+                    #  the full scan finds the nodes deleted before it, and a
+                    #  name deleted earlier may belong to a live node by now
+                    readNodes = None
+                    removedNodes = []
+                else:
+                    #  a node created again after being deleted
+                    removedNodes = [n for n in removedNodes if n not in names]
+                    if readNodes is not None:
+                        readNodes.extend(n for n in names if n not in readNodes)
+
+                for n in gone:
+                    if n not in removedNodes:
+                        removedNodes.append(n)
+                    if readNodes is not None and n in readNodes:
+                        readNodes.remove(n)
+
+            return RvMonitor.Command("syncReads", readNodes, removedNodes, force)
+
+    class ReadMirror:
+        """
+        What RV has been told about the Read and Write nodes: node name ->
+        (media, colorspace, first, last, label, class, offset). The version
+        goes up with every change sent; RV checks that each change was made
+        against the version it has and asks for all the nodes again if not.
+        """
+
+        def __init__(self):
+            self.reads = {}
+            self.version = 0
+
+        def update(self, states, removedNodes, full, force):
+            """
+            Record the current state of the nodes in states (all of them if
+            full) and the nodes that were removed. Returns the base version,
+            the removed names and the (name, state) pairs that were added or
+            changed, or None if RV is already up to date.
+            """
+            if full:
+                removed = [n for n in self.reads if n not in states]
+            else:
+                removed = [n for n in removedNodes if n in self.reads]
+            changed = [(n, st) for n, st in states.items() if force or self.reads.get(n) != st]
+
+            if full and force:
+                #  RV replaces everything it has with states
+                base = -1
+                removed = []
+                self.reads = {}
+            elif removed or changed:
+                base = self.version
+            else:
+                return None
+
+            for n in removed:
+                del self.reads[n]
+            self.reads.update(changed)
+            self.version += 1
+
+            return base, removed, changed
 
     class LockedFlag:
         def __init__(self):
@@ -127,7 +279,8 @@ class RvMonitor:
         self.running = False
         self.selectedNode = None
 
-        self.commands = self.LockedFifo()
+        self.commands = self.CommandQueue()
+        self.reads = self.ReadMirror()
         self.crashFlag = self.LockedFlag()
 
         self.sessionDir = ""
@@ -219,7 +372,7 @@ class RvMonitor:
             return
 
         if self.syncReadChanges and (str(node.Class()) == "Read" or str(node.Class()) == "Write"):
-            self.queueCommand('self.viewReadsInRv(["%s"])' % node.name())
+            self.queueCommand("syncReads", [node.name()])
 
     def onDestroy(self):
         log("onDestroy")
@@ -227,7 +380,7 @@ class RvMonitor:
         if node and type(node).__name__ == "Node":
             log("destroying node of class '%s'" % str(node.Class()))
             if self.syncReadChanges and (str(node.Class()) == "Read" or str(node.Class()) == "Write"):
-                self.queueCommand("self.removeObsoleteReads()")
+                self.queueCommand("syncReads", [], [node.name()])
 
     def updateAndSyncSelection(self, force=False):
         nodes = nuke.selectedNodes()
@@ -244,8 +397,8 @@ class RvMonitor:
             log("updateAndSyncSelection old %s new %s" % (self.selectedNode, node.name()))
             if force or node.name() != self.selectedNode:
                 self.selectedNode = node.name()
-                self.queueCommand("self.selectCurrentByNodeName()")
-                self.queueCommand("self.changeFrame(%d)" % nuke.frame())
+                self.queueCommand("selectCurrentByNodeName")
+                self.queueCommand("changeFrame", nuke.frame())
         else:
             self.selectedNode = None
 
@@ -284,7 +437,7 @@ class RvMonitor:
         #
         elif self.syncFrameChange and str(node.Class()) == "Viewer" and knob.name() == "frame" and self.running:
             log("frame change")
-            self.queueCommand("self.changeFrame(%d)" % knob.value())
+            self.queueCommand("changeFrame", int(knob.value()))
 
         #
         #    Track read/write changes
@@ -304,7 +457,7 @@ class RvMonitor:
             )
         ):
             log("read/write knob changed")
-            self.queueCommand('self.viewReadsInRv(["%s"])' % node.name())
+            self.queueCommand("syncReads", [node.name()])
 
         #
         #    Track read/write name changes
@@ -316,8 +469,7 @@ class RvMonitor:
             and (knob.name() == "name")
         ):
             log("read/write name changed")
-            self.queueCommand("self.removeObsoleteReads()")
-            self.queueCommand('self.viewReadsInRv(["%s"])' % node.name())
+            self.queueCommand("syncReads")
 
         #
         #    Track settings changes
@@ -386,12 +538,9 @@ class RvMonitor:
                 #
                 # log ("send messages to RV")
             try:
-                while 1:
-                    cmd = self.commands.pop()
-                    if cmd == ():
-                        break
+                for cmd in self.commands.take():
                     log("running queued command '%s'" % cmd)
-                    self.eval(cmd)
+                    cmd.run(self)
             except Exception:
                 log("can't send messages to RV, shutting down.")
                 try:
@@ -405,11 +554,11 @@ class RvMonitor:
             # log ("done sending messages to RV")
 
             #
-            #   Wait for messages from RV
+            #   Wait for messages from RV or newly queued commands
             #
             try:
                 # log ("selecting")
-                select.select([self.rvc.sock], [], [], 0.1)
+                select.select([self.rvc.sock] + self.commands.waitables(), [], [], 0.1)
                 # log ("selecting done")
             except Exception:
                 log("rvc select/wait error: %s" % sys.exc_info()[1])
@@ -555,7 +704,17 @@ class RvMonitor:
 
             self.rvc.handlers["remote-python-eval"] = pythonHandler
 
-    def queueCommand(self, cmd):
+    def queueCommand(self, method, *args):
+        """
+        Queue a call to the RvMonitor method with the given name, to be run by
+        the monitor thread. For compatibility a string of python code (like
+        "self.raiseRv()") is still accepted and exec'd.
+        """
+        if re.match(r"^\w+$", method):
+            cmd = self.Command(method, *args)
+        else:
+            cmd = self.Command("eval", method)
+
         log("queueCommand '%s'" % cmd)
         self.commands.append(cmd)
 
@@ -574,21 +733,13 @@ class RvMonitor:
             return
 
         if self.syncReadChanges:
-            readNodes = [
-                n.name()
-                for n in nuke.allNodes()
-                if (type(n).__name__ == "Node" and (n.Class() == "Read" or n.Class() == "Write"))
-            ]
-            if readNodes:
-                self.queueCommand("self.viewReadsInRv(%s)" % str(readNodes))
-
-            self.queueCommand("self.removeObsoleteReads()")
+            self.queueCommand("syncReads", None, [], True)
 
         if self.syncSelection:
             self.updateAndSyncSelection(True)
 
         if self.syncFrameChange:
-            self.queueCommand("self.changeFrame(%d)" % nuke.frame())
+            self.queueCommand("changeFrame", nuke.frame())
 
     def prepForRender(self, node, renderType):
         log("prepForRender %s %s" % (node.name(), renderType))
@@ -666,7 +817,7 @@ class RvMonitor:
         session dir to rv.
         """
         if self.running:
-            self.queueCommand("self.raiseRv()")
+            self.queueCommand("raiseRv")
             return
 
         self.updateFromPrefs()
@@ -680,7 +831,7 @@ class RvMonitor:
             except Exception:
                 pass
 
-        self.queueCommand("self.setSessionDir()")
+        self.queueCommand("setSessionDir")
 
         if not self.running:
             self.running = True
@@ -742,100 +893,82 @@ class RvMonitor:
         Remove any sources corresponding to Reads or Writes that
         have been deleted.
         """
-
-        readNodes = [
-            n.name()
-            for n in nuke.allNodes()
-            if (type(n).__name__ == "Node" and (n.Class() == "Read" or n.Class() == "Write"))
-        ]
-        if not readNodes:
-            readsStr = "string[] {}"
-        else:
-            readsStr = 'string[] {"%s"' % readNodes[0]
-            for i in range(1, len(readNodes)):
-                readsStr += ', "%s"' % readNodes[i]
-            readsStr += "}"
-
-        log("    readsStr %s" % readsStr)
-
-        remote = "require rvnuke_mode; rvnuke_mode.theMode().removeObsoleteReads (" + readsStr + ");"
-
-        log("    remote %s" % remote)
-        self.rvc.remoteEval(remote)
+        self.syncReads()
 
     def viewReadsInRv(self, readNodes):
         """
         Add a source to the session, a sequence held by a file input node.
         """
+        self.syncReads(readNodes, force=True)
 
-        names = []
-        media = []
-        firsts = []
-        lasts = []
-        spaces = []
-        labels = []
-        classes = []
-        offsets = []
-        for n in readNodes:
-            node = nuke.toNode(n)
-            if not node:
+    def readState(self, node):
+        """
+        The properties of a Read or Write node RV needs for its source.
+        """
+        offset = 0
+        if node["frame_mode"].value() == "offset" and node["frame"].value() != "":
+            offset = -int(node["frame"].value())
+
+        return (
+            nuke.filename(node),
+            re.sub(r"default \((.*)\)", r"\g<1>", node["colorspace"].value()),
+            int(node.firstFrame()),
+            int(node.lastFrame()),
+            encodeNL(node["label"].value()),
+            node.Class(),
+            offset,
+        )
+
+    def syncReads(self, readNodes=None, removedNodes=(), force=False):
+        """
+        Bring RV's sources for Read and Write nodes up to date, sending only
+        the nodes added, changed or removed since the last sync. readNodes
+        are the names of the nodes to check, or None to check all of them
+        (which also finds nodes that are gone); removedNodes are nodes being
+        deleted. With force the nodes are sent even if unchanged, and a
+        forced sync of all nodes replaces whatever RV has.
+        """
+        full = readNodes is None
+        if full:
+            nodes = [(n.name(), n) for n in nuke.allNodes() if isReadOrWrite(n)]
+        else:
+            nodes = [(n, nuke.toNode(n)) for n in readNodes]
+
+        states = {}
+        removed = list(removedNodes)
+        for name, node in nodes:
+            if name in removedNodes:
                 continue
-            names.append(node.name())
-            media.append(nuke.filename(node))
-            # firsts.append (node["first"].value())
-            # lasts.append  (node["last"].value())
-            firsts.append(node.firstFrame())
-            lasts.append(node.lastFrame())
-            spaces.append(re.sub("default \((.*)\)", "\g<1>", node["colorspace"].value()))
-            labels.append(encodeNL(node["label"].value()))
-            classes.append(node.Class())
-            ro = "0"
-            if node["frame_mode"].value() == "offset" and node["frame"].value() != "":
-                ro = str(-int(node["frame"].value()))
-            offsets.append(ro)
-
-        log("    names %s" % names)
-        log("    spaces %s" % spaces)
-
-        nameStr = mediaStr = spaceStr = labelStr = classStr = "string[] {"
-        firstStr = lastStr = offsetStr = "int[] {"
-        first = True
-        for i in range(len(names)):
-            if first:
-                comma = ""
-                first = False
+            if node and isReadOrWrite(node):
+                states[name] = self.readState(node)
             else:
-                comma = ","
-
-            nameStr += comma + '"%s"' % names[i]
-            mediaStr += comma + '"%s"' % media[i]
-            spaceStr += comma + '"%s"' % spaces[i]
-            firstStr += comma + "%d" % int(firsts[i])
-            lastStr += comma + "%d" % int(lasts[i])
-            labelStr += comma + '"%s"' % labels[i]
-            classStr += comma + '"%s"' % classes[i]
-            offsetStr += comma + "%s" % int(offsets[i])
-
-        nameStr += "}"
-        mediaStr += "}"
-        spaceStr += "}"
-        firstStr += "}"
-        lastStr += "}"
-        labelStr += "}"
-        classStr += "}"
-        offsetStr += "}"
-
-        log("    nameStr %s" % nameStr)
-
-        remote = "require rvnuke_mode; rvnuke_mode.theMode().viewReadNodes (%s, %s, %s, %s, %s, %s, %s, %s);" % (
-            nameStr,
-            mediaStr,
-            spaceStr,
-            firstStr,
-            lastStr,
-            labelStr,
-            classStr,
-            offsetStr,
+                removed.append(name)
+
+        change = self.reads.update(states, removed, full, force)
+        if change is None:
+            log("    reads up to date (version %d)" % self.reads.version)
+            return
+
+        base, removed, changed = change
+        names = [c[0] for c in changed]
+        log("    reads %d -> %d removed %s changed %s" % (base, self.reads.version, removed, names))
+
+        columns = list(zip(*[c[1] for c in changed])) or [()] * 7
+        remote = (
+            "require rvnuke_mode; rvnuke_mode.theMode().syncReadNodes (%d, %d, %s, %s, %s, %s, %s, %s, %s, %s, %s);"
+            % (
+                base,
+                self.reads.version,
+                muStringArray(removed),
+                muStringArray(names),
+                muStringArray(columns[0]),
+                muStringArray(columns[1]),
+                muIntArray(columns[2]),
+                muIntArray(columns[3]),
+                muStringArray(columns[4]),
+                muStringArray(columns[5]),
+                muIntArray(columns[6]),
+            )
         )
 
         log("    remote %s" % remote)
@@ -1171,7 +1304,7 @@ def viewReadsInRv(all):
 
     rvmon = initRvMon()
     rvmon.initializeRvSide()
-    rvmon.queueCommand("self.viewReadsInRv(%s)" % str(readNodes))
+    rvmon.queueCommand("syncReads", readNodes, [], True)
 
 
 def createCheckpoint():
@@ -1208,20 +1341,18 @@ def createCheckpoint():
         stereo = "mono"
 
     rvmon.queueCommand(
-        "self.initRenderRun('%s', %d, %d, %d, \"%s\", %g, %d, '%s', '%s', '%s', '%s')"
-        % (
-            node.name(),
-            f,
-            f,
-            1,
-            "",
-            0.0,
-            f,
-            encodeNL(node["label"].value()),
-            dateStr,
-            "checkpoint",
-            stereo,
-        )
+        "initRenderRun",
+        node.name(),
+        f,
+        f,
+        1,
+        "",
+        0.0,
+        f,
+        encodeNL(node["label"].value()),
+        dateStr,
+        "checkpoint",
+        stereo,
     )
 
     """
@@ -1413,20 +1544,18 @@ class Render:
             stereo = "mono"
 
         rvmon.queueCommand(
-            "self.initRenderRun('%s', %d, %d, %d, \"%s\", %g, %d, '%s', '%s', '%s', '%s')"
-            % (
-                node.name(),
-                start,
-                end,
-                incr,
-                audioFile,
-                audioOffset,
-                checkpointFrame,
-                encodeNL(node["label"].value()),
-                dateStr,
-                "current",
-                stereo,
-            )
+            "initRenderRun",
+            node.name(),
+            start,
+            end,
+            incr,
+            audioFile,
+            audioOffset,
+            checkpointFrame,
+            encodeNL(node["label"].value()),
+            dateStr,
+            "current",
+            stereo,
         )
 
 
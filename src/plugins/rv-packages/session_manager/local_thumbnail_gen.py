@@ -1,9 +1,9 @@
+import contextlib
 import hashlib
 import logging
 import math
 import os
 import psutil
-import shutil
 import subprocess
 import sys
 import tempfile
@@ -29,8 +29,25 @@ FRAME_WIDTH = 240
 MAX_FILMSTRIP_FRAMES = 25
 MAX_WORKERS = 2
 
+# Previews are kept across RV sessions, and shared between RV instances, in
+# RV_SESSION_MANAGER_THUMBNAIL_CACHE (default: <tmp>/rv_thumbnails), up to
+# RV_SESSION_MANAGER_THUMBNAIL_CACHE_MB megabytes.
+CACHE_DIR_ENV = "RV_SESSION_MANAGER_THUMBNAIL_CACHE"
+CACHE_SIZE_ENV = "RV_SESSION_MANAGER_THUMBNAIL_CACHE_MB"
+DEFAULT_CACHE_SIZE_MB = 512
+# Temporary files older than this are left over from a crashed RV.
+STALE_TEMP_SECONDS = 3600
+# Preview paths are answered from memory; the media file and the cached
+# preview are only checked on disk again once this many seconds have passed.
+REVALIDATE_SECONDS = 30.0
+
 _IS_WIN32 = sys.platform == "win32"
 
+if _IS_WIN32:
+    import msvcrt
+else:
+    import fcntl
+
 
 def _suspend_proc(proc: subprocess.Popen) -> None:
     try:
@@ -46,6 +63,123 @@ def _resume_proc(proc: subprocess.Popen) -> None:
         logger.warning(f"Failed to resume process {proc.pid}")
 
 
+class _PreviewCache:
+    """
+    Persistent preview store shared by every RV instance on the machine.
+
+    Entries are keyed on the media path, its size and modification time and
+    the preview settings, so an edited file gets new previews. Finished
+    previews are moved into place atomically, and the least recently used
+    ones are evicted once the cache grows past its size limit. Eviction
+    holds an exclusive lock on a file in the cache directory, which keeps
+    concurrent RV instances from deleting under each other.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_path = self.directory / ".lock"
+
+    def key(self, media_path: str) -> str:
+        try:
+            st = os.stat(media_path)
+            # Sequence patterns and URLs can't be stat'ed; those are keyed on
+            # the path alone.
+            stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        except (OSError, ValueError):
+            stamp = ""
+        settings = f"{FRAME_WIDTH}:{MAX_FILMSTRIP_FRAMES}"
+        return hashlib.sha256(f"{media_path}\0{stamp}\0{settings}".encode()).hexdigest()[:32]
+
+    def path(self, cache_key: str, path_key: str) -> Path:
+        return self.directory / f"{cache_key}_{path_key.replace('_path', '')}.jpg"
+
+    def lookup(self, cache_key: str, path_key: str) -> Path | None:
+        """Return the cached preview, marking it as recently used, or None."""
+        path = self.path(cache_key, path_key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def temp_path(self, suffix: str) -> Path:
+        """Return a new, unique file in the cache directory for rvio to write."""
+        fd, name = tempfile.mkstemp(prefix=".tmp_", suffix=suffix, dir=self.directory)
+        os.close(fd)
+        return Path(name)
+
+    def commit(self, temp_path: Path, cache_key: str, path_key: str) -> Path | None:
+        """Atomically move a finished preview into place and enforce the size limit."""
+        try:
+            if temp_path.stat().st_size == 0:
+                temp_path.unlink(missing_ok=True)
+                return None
+            path = self.path(cache_key, path_key)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to store preview {temp_path}: {e}")
+            return None
+        self.evict()
+        return path
+
+    @contextlib.contextmanager
+    def locked(self):
+        with open(self._lock_path, "a+b") as lock_file:
+            if _IS_WIN32:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if _IS_WIN32:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def evict(self) -> None:
+        """Delete least recently used previews until the cache fits its size limit."""
+        try:
+            with self.locked():
+                now = time.time()
+                entries = []
+                total = 0
+                for entry in os.scandir(self.directory):
+                    if not entry.is_file() or entry.name == ".lock":
+                        continue
+                    st = entry.stat()
+                    if entry.name.startswith(".tmp_"):
+                        if now - st.st_mtime > STALE_TEMP_SECONDS:
+                            Path(entry.path).unlink(missing_ok=True)
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+
+                if total <= self.max_bytes:
+                    return
+                for _, size, path in sorted(entries):
+                    Path(path).unlink(missing_ok=True)
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+        except OSError as e:
+            logger.warning(f"Failed to evict thumbnail cache {self.directory}: {e}")
+
+
+def _preview_cache_from_env() -> _PreviewCache:
+    directory = Path(os.getenv(CACHE_DIR_ENV) or Path(tempfile.gettempdir()) / "rv_thumbnails")
+    try:
+        max_mb = float(os.getenv(CACHE_SIZE_ENV) or DEFAULT_CACHE_SIZE_MB)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {CACHE_SIZE_ENV}")
+        max_mb = DEFAULT_CACHE_SIZE_MB
+    return _PreviewCache(directory, int(max_mb * 1024 * 1024))
+
+
 class _SignalBridge(QtCore.QObject):
     """Bridges background threads to the main thread via Qt signals."""
 
@@ -64,9 +198,11 @@ class LocalThumbnailGen(rvtypes.MinorMode):
 
     def __init__(self) -> None:
         rvtypes.MinorMode.__init__(self)
-        self._cache: dict[str, dict[str, Path | None]] = {}
-        self._cache_dir = Path(tempfile.gettempdir()) / f"rv_thumbnails_{os.getpid()}"
-        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        # Cache key to path key to (preview path, time.monotonic() it was last checked on disk)
+        self._cache: dict[str, dict[str, tuple[Path, float]]] = {}
+        # (source node, media path) to (cache key, time.monotonic() it was computed)
+        self._cache_keys: dict[tuple[str, str], tuple[str, float]] = {}
+        self._disk_cache = _preview_cache_from_env()
         self._in_flight: set[str] = set()
         # Cache key to set of source node names
         self._cache_key_to_sources: dict[str, set[str]] = {}
@@ -105,7 +241,7 @@ class LocalThumbnailGen(rvtypes.MinorMode):
             (
                 "before-session-deletion",
                 self._on_session_deletion,
-                "Delete all cached local filmstrips and thumbnails on RV close",
+                "Stop local filmstrip and thumbnail generation on RV close",
             ),
             (
                 "before-clear-session",
@@ -167,12 +303,22 @@ class LocalThumbnailGen(rvtypes.MinorMode):
             event.setReturnContent("")
             return
 
-        cache_key = self._cache_key(media_path)
+        cache_key = self._cache_key(source_node, media_path)
 
         self._cache_key_to_sources.setdefault(cache_key, set()).add(source_node)
 
-        cached = self._cache.get(cache_key, {})
-        path = cached.get(path_key)
+        # Answer from memory, but go back to the disk cache every REVALIDATE_SECONDS: another RV
+        # instance may have evicted the file, and the lookup marks it as recently used.
+        now = time.monotonic()
+        cached = self._cache.get(cache_key, {}).get(path_key)
+        if cached and now - cached[1] < REVALIDATE_SECONDS:
+            path = cached[0]
+        else:
+            path = self._disk_cache.lookup(cache_key, path_key)
+            if path:
+                self._cache.setdefault(cache_key, {})[path_key] = (path, now)
+            else:
+                self._cache.get(cache_key, {}).pop(path_key, None)
 
         if path:
             event.setReturnContent(str(path))
@@ -231,8 +377,15 @@ class LocalThumbnailGen(rvtypes.MinorMode):
                 height,
             )
 
-    def _cache_key(self, media_path: str) -> str:
-        return hashlib.sha256(media_path.encode()).hexdigest()[:16]
+    def _cache_key(self, source_node: str, media_path: str) -> str:
+        """Return the cache key of a source's media, stat'ing the media at most every REVALIDATE_SECONDS."""
+        now = time.monotonic()
+        memo = self._cache_keys.get((source_node, media_path))
+        if memo and now - memo[1] < REVALIDATE_SECONDS:
+            return memo[0]
+        cache_key = self._disk_cache.key(media_path)
+        self._cache_keys[(source_node, media_path)] = (cache_key, now)
+        return cache_key
 
     def _get_rvio_bin(self) -> str | None:
         rvio = os.getenv("RV_APP_RVIO")
@@ -426,8 +579,9 @@ class LocalThumbnailGen(rvtypes.MinorMode):
 
         return output_width, output_height
 
-    def _run_suspendable(self, cmd: list[str], cache_key: str, timeout: int = 120) -> None:
-        """Run a subprocess that can be suspended/resumed during playback.
+    def _run_suspendable(self, cmd: list[str], cache_key: str, timeout: int = 120) -> int:
+        """Run a subprocess that can be suspended/resumed during playback and
+        return its exit code.
 
         The timeout counts only non-suspended wall-clock time: while the
         process is frozen during playback the deadline is extended so that
@@ -460,25 +614,26 @@ class LocalThumbnailGen(rvtypes.MinorMode):
                     self._active_procs.remove((proc, cache_key))
                 except ValueError:
                     logger.warning(f"Process {proc.pid} was not in active processes list")
+        return proc.returncode
 
     def _generate_thumbnail(self, cache_key: str, rvio_bin: str, media_path: str, mid_frame: int) -> None:
         """Runs rvio to generate a single-frame thumbnail in a worker thread."""
         if self._shutting_down:
             return
-        output_path = self._cache_dir / f"{cache_key}_thumbnail.jpg"
-        try:
-            self._run_suspendable(
-                [rvio_bin, media_path, "-t", str(mid_frame), "-o", str(output_path)],
-                cache_key,
-            )
-        except Exception as e:
-            logger.error(f"Thumbnail generation failed: {e}")
+        output_path = self._disk_cache.lookup(cache_key, "thumbnail_path")
+        if output_path is None:
+            # rvio picks the output format from the extension, so keep it.
+            temp_path = self._disk_cache.temp_path(".jpg")
+            try:
+                cmd = [rvio_bin, media_path, "-t", str(mid_frame), "-o", str(temp_path)]
+                if self._run_suspendable(cmd, cache_key) == 0:
+                    output_path = self._disk_cache.commit(temp_path, cache_key, "thumbnail_path")
+            except Exception as e:
+                logger.error(f"Thumbnail generation failed: {e}")
+            finally:
+                temp_path.unlink(missing_ok=True)
 
-        self._bridge.finished.emit(
-            cache_key,
-            "thumbnail_path",
-            str(output_path) if output_path.exists() else "",
-        )
+        self._bridge.finished.emit(cache_key, "thumbnail_path", str(output_path or ""))
 
     def _generate_filmstrip(
         self,
@@ -493,13 +648,18 @@ class LocalThumbnailGen(rvtypes.MinorMode):
         """Runs rvio to generate a filmstrip image in a worker thread."""
         if self._shutting_down:
             return
-        output_path = self._cache_dir / f"{cache_key}_filmstrip.jpg"
-        session_path = self._cache_dir / f"filmstrip_{cache_key}.rv"
+        output_path = self._disk_cache.lookup(cache_key, "filmstrip_path")
+        if output_path is not None:
+            self._bridge.finished.emit(cache_key, "filmstrip_path", str(output_path))
+            return
+
+        temp_path = self._disk_cache.temp_path(".jpg")
+        session_path = self._disk_cache.temp_path(".rv")
         try:
             output_width, output_height = self._write_filmstrip_session(
                 session_path, media_path, self._pick_frames(start_frame, end_frame), width, height
             )
-            self._run_suspendable(
+            returncode = self._run_suspendable(
                 [
                     rvio_bin,
                     str(session_path),
@@ -510,28 +670,27 @@ class LocalThumbnailGen(rvtypes.MinorMode):
                     str(output_width),
                     str(output_height),
                     "-o",
-                    str(output_path),
+                    str(temp_path),
                 ],
                 cache_key,
             )
+            if returncode == 0:
+                output_path = self._disk_cache.commit(temp_path, cache_key, "filmstrip_path")
         except Exception as e:
             logger.error(f"Filmstrip generation failed: {e}")
         finally:
             try:
                 session_path.unlink(missing_ok=True)
+                temp_path.unlink(missing_ok=True)
             except Exception as e:
-                logger.warning(f"Failed to delete session file {session_path}: {e}")
+                logger.warning(f"Failed to delete temporary files {session_path}, {temp_path}: {e}")
 
-        self._bridge.finished.emit(
-            cache_key,
-            "filmstrip_path",
-            str(output_path) if output_path.exists() else "",
-        )
+        self._bridge.finished.emit(cache_key, "filmstrip_path", str(output_path or ""))
 
     def _on_generation_done(self, cache_key: str, path_key: str, output_path: str) -> None:
         """Called on the main thread when a single rvio job completes."""
         if output_path:
-            self._cache.setdefault(cache_key, {})[path_key] = Path(output_path)
+            self._cache.setdefault(cache_key, {})[path_key] = (Path(output_path), time.monotonic())
 
         self._in_flight.discard(f"{cache_key}_{path_key}")
         source_nodes = self._cache_key_to_sources.get(cache_key, set())
@@ -633,6 +792,7 @@ class LocalThumbnailGen(rvtypes.MinorMode):
         self._cache_key_to_sources.clear()
         self._deferred_sources.clear()
         self._cache.clear()
+        self._cache_keys.clear()
         with self._procs_lock:
             procs_to_terminate = list(self._active_procs)
         for proc, _ in procs_to_terminate:
@@ -662,13 +822,10 @@ class LocalThumbnailGen(rvtypes.MinorMode):
         self._pool.shutdown(wait=False, cancel_futures=True)
         self._in_flight.clear()
         self._cache_key_to_sources.clear()
-
-        if self._cache_dir.exists():
-            try:
-                shutil.rmtree(self._cache_dir)
-            except Exception as e:
-                logger.warning(f"Failed to delete cache directory {self._cache_dir}: {e}")
+        # The previews stay on disk for the next session; the cache size
+        # limit takes care of old ones.
         self._cache.clear()
+        self._cache_keys.clear()
 
     def _on_source_delete(self, event: Any) -> None:
         """Cancel generation immediately and evict the cache for a removed media source."""
@@ -687,7 +844,8 @@ class LocalThumbnailGen(rvtypes.MinorMode):
         if not media_path:
             return
 
-        cache_key = self._cache_key(media_path)
+        cache_key = self._cache_key(source_node, media_path)
+        self._cache_keys.pop((source_node, media_path), None)
 
         self._deferred_sources.discard(source_node)
 
@@ -714,13 +872,9 @@ class LocalThumbnailGen(rvtypes.MinorMode):
         self._in_flight.discard(f"{cache_key}_thumbnail_path")
         self._in_flight.discard(f"{cache_key}_filmstrip_path")
 
-        cached = self._cache.pop(cache_key, {})
-        for path in cached.values():
-            if path:
-                try:
-                    Path(path).unlink(missing_ok=True)
-                except Exception as e:
-                    logger.warning(f"Failed to delete cached preview {path}: {e}")
+        # Only forget the previews: they stay in the shared on-disk cache,
+        # where other RV instances or a later session may still use them.
+        self._cache.pop(cache_key, None)
 
 
 def createMode() -> LocalThumbnailGen: